@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ClientProfile, Rule, Threshold
+from .models import ClientProfile, Rule, Threshold, SuspiciousLocation, ModelVersion, ClientFeatures, ShadowCandidate, ShadowScore
 
 @admin.register(ClientProfile)
 class ClientProfileAdmin(admin.ModelAdmin):
@@ -65,4 +65,57 @@ class ThresholdAdmin(admin.ModelAdmin):
         ('Threshold Information', {
             'fields': ('key', 'value', 'description')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(SuspiciousLocation)
+class SuspiciousLocationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'category', 'lat', 'lng', 'radius_km', 'enabled', 'updated_at')
+    list_filter = ('category', 'enabled')
+    search_fields = ('name',)
+    readonly_fields = ('created_at', 'updated_at')
+    ordering = ('name',)
+    
+    fieldsets = (
+        ('Location Information', {
+            'fields': ('name', 'category', 'enabled')
+        }),
+        ('Coordinates', {
+            'fields': ('lat', 'lng', 'radius_km')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+@admin.register(ModelVersion)
+class ModelVersionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'params', 'training_rows', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    readonly_fields = ('path', 'params', 'metrics', 'training_rows', 'is_active', 'created_at')
+    ordering = ('-created_at',)
+
+@admin.register(ClientFeatures)
+class ClientFeaturesAdmin(admin.ModelAdmin):
+    list_display = ('client', 'schema_version', 'rebuilt_at', 'updated_at')
+    list_filter = ('schema_version',)
+    search_fields = ('client__first_name', 'client__last_name', 'client__national_id')
+    readonly_fields = ('client', 'schema_version', 'features', 'rebuilt_at', 'updated_at')
+
+@admin.register(ShadowCandidate)
+class ShadowCandidateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'model_version', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    search_fields = ('name',)
+    ordering = ('-created_at',)
+
+@admin.register(ShadowScore)
+class ShadowScoreAdmin(admin.ModelAdmin):
+    list_display = ('transaction_id', 'candidate', 'production_decision', 'shadow_decision', 'production_score', 'shadow_score', 'created_at')
+    list_filter = ('candidate', 'production_decision', 'shadow_decision')
+    search_fields = ('transaction_id',)
+    readonly_fields = (
+        'candidate', 'transaction_id', 'production_score', 'shadow_score', 'production_ml_score', 'shadow_ml_score',
+        'production_decision', 'shadow_decision', 'shadow_triggers', 'shadow_ms', 'created_at'
+    )
+    ordering = ('-created_at',)
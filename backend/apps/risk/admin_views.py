@@ -5,11 +5,18 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Count, Sum, Q
 from django.utils import timezone
 from datetime import timedelta
-from .models import Threshold, Rule, ClientProfile
-from .serializers import ThresholdSerializer, RuleSerializer
+from .models import Threshold, Rule, ClientProfile, SuspiciousLocation
+from .dashboard import get_dashboard_stats, get_daily_trends
+from .serializers import ThresholdSerializer, RuleSerializer, SuspiciousLocationSerializer
 from apps.users.serializers import AdminClientProfileSerializer
 from apps.transactions.serializers import AdminTransactionSerializer, AdminFraudAlertSerializer
-from apps.transactions.models import Transaction, FraudAlert
+from apps.transactions.models import Transaction, FraudAlert, ArchivedTransaction, ArchivedFraudAlert
+from apps.transactions.pagination import KeysetPagination
+from apps.transactions.mixins import ArchiveReadsMixin, EagerLoadingViewSetMixin, ReplicaReadsMixin
+from apps.transactions.filters import filter_transactions, filter_fraud_alerts
+from apps.transactions.exports import (
+    export_response, parse_export_params, TRANSACTION_EXPORT_COLUMNS, FRAUD_ALERT_EXPORT_COLUMNS
+)
 from django.db import models
 from apps.utils.logger import get_system_logger
 
@@ -32,6 +39,12 @@ class ThresholdViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser]
     queryset = Threshold.objects.all()
 
+class SuspiciousLocationViewSet(viewsets.ModelViewSet):
+    """Admin viewset for managing known-fake and high-risk coordinates"""
+    serializer_class = SuspiciousLocationSerializer
+    permission_classes = [permissions.IsAdminUser]
+    queryset = SuspiciousLocation.objects.all().order_by('name')
+
 class ClientProfileAdminViewSet(viewsets.ModelViewSet):
     """Admin viewset for managing client profiles"""
     serializer_class = AdminClientProfileSerializer
@@ -57,52 +70,53 @@ class ClientProfileAdminViewSet(viewsets.ModelViewSet):
         """Create profile with auto-generated bank account number"""
         serializer.save()
 
-class TransactionAdminViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionAdminViewSet(ReplicaReadsMixin, ArchiveReadsMixin, EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Admin viewset for viewing all transactions"""
     serializer_class = AdminTransactionSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
     queryset = Transaction.objects.all()
+    archive_model = ArchivedTransaction
+    archive_filter = staticmethod(filter_transactions)
     
     def get_queryset(self):
-        queryset = Transaction.objects.all()
-        
-        # Filter by client
-        client_id = self.request.query_params.get('client_id', None)
-        if client_id:
-            queryset = queryset.filter(client_id=client_id)
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by transaction type
-        transaction_type = self.request.query_params.get('transaction_type', None)
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
+        return filter_transactions(Transaction.objects.all(), self.request.query_params)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered transactions as CSV or JSON lines (?output=csv|jsonl&after_id=N)"""
+        try:
+            output, after_id = parse_export_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return queryset
+        logger.info(f"Transaction export ({output}, after_id={after_id}) started by admin {request.user.email}")
+        return export_response(self.get_queryset(), TRANSACTION_EXPORT_COLUMNS, output, after_id, 'transactions',
+                               archive_queryset=self.get_archive_queryset())
 
-class FraudAlertAdminViewSet(viewsets.ModelViewSet):
+class FraudAlertAdminViewSet(ReplicaReadsMixin, ArchiveReadsMixin, EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """Admin viewset for managing fraud alerts"""
     serializer_class = AdminFraudAlertSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
     queryset = FraudAlert.objects.all()
+    archive_model = ArchivedFraudAlert
+    archive_filter = staticmethod(filter_fraud_alerts)
     
     def get_queryset(self):
-        queryset = FraudAlert.objects.all()
-        
-        # Filter by level
-        level = self.request.query_params.get('level', None)
-        if level:
-            queryset = queryset.filter(level=level)
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        return filter_fraud_alerts(FraudAlert.objects.all(), self.request.query_params)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered fraud alerts as CSV or JSON lines (?output=csv|jsonl&after_id=N)"""
+        try:
+            output, after_id = parse_export_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return queryset
+        logger.info(f"Fraud alert export ({output}, after_id={after_id}) started by admin {request.user.email}")
+        return export_response(self.get_queryset(), FRAUD_ALERT_EXPORT_COLUMNS, output, after_id, 'fraud-alerts',
+                               archive_queryset=self.get_archive_queryset())
     
     @action(detail=True, methods=['patch'])
     def approve(self, request, pk=None):
@@ -142,68 +156,15 @@ class FraudAlertAdminViewSet(viewsets.ModelViewSet):
         
         return Response({'message': 'Transaction rejected and failed'})
 
-class DashboardViewSet(viewsets.ViewSet):
+class DashboardViewSet(ReplicaReadsMixin, viewsets.ViewSet):
     """Dashboard statistics for admin users"""
     permission_classes = [permissions.IsAdminUser]
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get dashboard statistics"""
+        """Get dashboard statistics from the cached, incrementally maintained snapshot"""
         try:
-            # Calculate date ranges
-            now = timezone.now()
-            last_month = now - timedelta(days=30)
-            last_week = now - timedelta(days=7)
-            
-            # Basic counts
-            total_clients = ClientProfile.objects.count()
-            total_transactions = Transaction.objects.count()
-            pending_alerts = FraudAlert.objects.filter(status='Active').count()
-            total_balance = ClientProfile.objects.aggregate(total=Sum('balance'))['total'] or 0
-            
-            # Recent activity (last 7 days)
-            recent_transactions = Transaction.objects.filter(
-                created_at__gte=last_week
-            ).count()
-            
-            recent_alerts = FraudAlert.objects.filter(
-                created_at__gte=last_week
-            ).count()
-            
-            # Monthly changes
-            last_month_clients = ClientProfile.objects.filter(
-                created_at__gte=last_month
-            ).count()
-            
-            last_month_transactions = Transaction.objects.filter(
-                created_at__gte=last_month
-            ).count()
-            
-            # Calculate percentage changes
-            client_change = ((total_clients - last_month_clients) / max(last_month_clients, 1)) * 100 if last_month_clients > 0 else 0
-            transaction_change = ((total_transactions - last_month_transactions) / max(last_month_transactions, 1)) * 100 if last_month_transactions > 0 else 0
-            
-            # Risk distribution
-            risk_distribution = {
-                'low': FraudAlert.objects.filter(level='LOW').count(),
-                'medium': FraudAlert.objects.filter(level='MEDIUM').count(),
-                'high': FraudAlert.objects.filter(level='HIGH').count(),
-                'critical': FraudAlert.objects.filter(level='CRITICAL').count()
-            }
-            
-            stats = {
-                'total_clients': total_clients,
-                'total_transactions': total_transactions,
-                'pending_alerts': pending_alerts,
-                'total_balance': float(total_balance),
-                'recent_transactions': recent_transactions,
-                'recent_alerts': recent_alerts,
-                'changes': {
-                    'clients': round(client_change, 1),
-                    'transactions': round(transaction_change, 1)
-                },
-                'risk_distribution': risk_distribution
-            }
+            stats = get_dashboard_stats()
             
             logger.info(f"Dashboard stats requested by admin {request.user.email}")
             return Response(stats)
@@ -215,20 +176,42 @@ class DashboardViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """Get per-day transaction and alert trends from the daily rollups"""
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(max(days, 1), 366)
+        
+        try:
+            trends = get_daily_trends(days)
+            logger.info(f"Dashboard trends ({days} days) requested by admin {request.user.email}")
+            return Response({'days': days, 'trends': trends})
+            
+        except Exception as e:
+            logger.error(f"Error fetching dashboard trends: {e}")
+            return Response(
+                {'error': 'Failed to fetch dashboard trends'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
     @action(detail=False, methods=['get'])
     def recent_activity(self, request):
         """Get recent transactions and alerts"""
         try:
             # Recent transactions (last 10)
-            recent_transactions = Transaction.objects.select_related('client').order_by('-created_at')[:10]
+            recent_transactions = AdminTransactionSerializer.setup_eager_loading(
+                Transaction.objects.order_by('-created_at')
+            )[:10]
             
             # Recent fraud alerts (last 10)
-            recent_alerts = FraudAlert.objects.select_related('transaction__client').order_by('-created_at')[:10]
+            recent_alerts = AdminFraudAlertSerializer.setup_eager_loading(
+                FraudAlert.objects.order_by('-created_at')
+            )[:10]
             
             # Serialize data
-            from apps.transactions.serializers import AdminTransactionSerializer
-            from apps.transactions.serializers import AdminFraudAlertSerializer
-            
             transaction_data = AdminTransactionSerializer(recent_transactions, many=True).data
             alert_data = AdminFraudAlertSerializer(recent_alerts, many=True).data
             
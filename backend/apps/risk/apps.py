@@ -5,4 +5,7 @@ class RiskConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.risk'
 
+    def ready(self):
+        import apps.risk.signals
+
 
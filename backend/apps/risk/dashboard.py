@@ -0,0 +1,189 @@
+"""
+Admin dashboard statistics for SafeNetAi
+Reads the daily rollups, cached and bumped incrementally between refreshes
+"""
+
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from apps.utils.logger import get_system_logger
+
+logger = get_system_logger()
+
+SNAPSHOT_CACHE_KEY = 'risk:dashboard:snapshot'
+GENERATION_CACHE_KEY = 'risk:dashboard:generation'
+DELTA_CACHE_KEY_TEMPLATE = 'risk:dashboard:delta:{generation}:{counter}'
+
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+# Counters that creation events can bump without rescanning the tables
+DELTA_COUNTERS = (
+    'total_clients', 'last_month_clients',
+    'total_transactions', 'recent_transactions', 'last_month_transactions',
+    'pending_alerts', 'recent_alerts',
+) + tuple(f'risk_{level}' for level in RISK_LEVELS)
+
+
+def _snapshot_ttl():
+    return getattr(settings, 'DASHBOARD_SNAPSHOT_TTL', 60)
+
+
+def compute_dashboard_counters():
+    """
+    Aggregate the dashboard counters: clients from their table, transactions and alerts
+    from the daily rollups (a few rows per day of history). One query per table.
+    """
+    from apps.transactions.models import TransactionDailyRollup, FraudAlertDailyRollup
+    from .models import ClientProfile
+
+    now = timezone.now()
+    today = timezone.localdate()
+    last_month = today - timedelta(days=30)
+    last_week = today - timedelta(days=7)
+
+    clients = ClientProfile.objects.aggregate(
+        total_clients=Count('id'),
+        last_month_clients=Count('id', filter=Q(created_at__gte=now - timedelta(days=30))),
+        total_balance=Sum('balance'),
+    )
+    transactions = TransactionDailyRollup.objects.aggregate(
+        total_transactions=Sum('transaction_count'),
+        recent_transactions=Sum('transaction_count', filter=Q(day__gt=last_week)),
+        last_month_transactions=Sum('transaction_count', filter=Q(day__gt=last_month)),
+    )
+    # Rollups store levels upper-cased, whichever case RiskEngine wrote
+    alerts = FraudAlertDailyRollup.objects.aggregate(
+        pending_alerts=Sum('alert_count', filter=Q(status='Active')),
+        recent_alerts=Sum('alert_count', filter=Q(day__gt=last_week)),
+        **{
+            f'risk_{level}': Sum('alert_count', filter=Q(level=level.upper()))
+            for level in RISK_LEVELS
+        }
+    )
+
+    counters = {key: value or 0 for key, value in {**clients, **transactions, **alerts}.items()}
+    counters['total_balance'] = float(counters['total_balance'])
+    return counters
+
+
+def get_daily_trends(days):
+    """Per-day transaction counts/amounts by status and alert counts by level, read from the rollups"""
+    from apps.transactions.models import TransactionDailyRollup, FraudAlertDailyRollup
+
+    start = timezone.localdate() - timedelta(days=days - 1)
+    trends = {}
+
+    def day_entry(day):
+        return trends.setdefault(day, {
+            'day': day.isoformat(),
+            'transactions': 0,
+            'amount': 0.0,
+            'by_status': {},
+            'alerts': 0,
+            'by_level': {},
+        })
+
+    for row in TransactionDailyRollup.objects.filter(day__gte=start).values(
+        'day', 'status', 'transaction_count', 'total_amount'
+    ):
+        entry = day_entry(row['day'])
+        entry['transactions'] += row['transaction_count']
+        entry['amount'] += float(row['total_amount'])
+        entry['by_status'][row['status']] = row['transaction_count']
+
+    for row in FraudAlertDailyRollup.objects.filter(day__gte=start).values(
+        'day', 'level'
+    ).annotate(count=Sum('alert_count')).order_by():
+        entry = day_entry(row['day'])
+        entry['alerts'] += row['count']
+        entry['by_level'][row['level'].lower()] = row['count']
+
+    return [trends[day] for day in sorted(trends)]
+
+
+def _percent_change(total, last_month):
+    return ((total - last_month) / max(last_month, 1)) * 100 if last_month > 0 else 0
+
+
+def build_dashboard_stats(counters):
+    """Shape raw counters into the stats payload served by DashboardViewSet.stats"""
+    return {
+        'total_clients': counters['total_clients'],
+        'total_transactions': counters['total_transactions'],
+        'pending_alerts': counters['pending_alerts'],
+        'total_balance': counters['total_balance'],
+        'recent_transactions': counters['recent_transactions'],
+        'recent_alerts': counters['recent_alerts'],
+        'changes': {
+            'clients': round(_percent_change(counters['total_clients'], counters['last_month_clients']), 1),
+            'transactions': round(_percent_change(counters['total_transactions'], counters['last_month_transactions']), 1),
+        },
+        'risk_distribution': {level: counters[f'risk_{level}'] for level in RISK_LEVELS},
+    }
+
+
+def get_dashboard_stats():
+    """
+    Return the dashboard stats from the cached snapshot plus the deltas bumped since it was taken.
+    The tables are only scanned when the snapshot expires (DASHBOARD_SNAPSHOT_TTL seconds).
+    """
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is None:
+        snapshot = refresh_dashboard_snapshot()
+
+    generation = snapshot['generation']
+    delta_keys = {
+        DELTA_CACHE_KEY_TEMPLATE.format(generation=generation, counter=counter): counter
+        for counter in DELTA_COUNTERS
+    }
+    counters = dict(snapshot['counters'])
+    for key, value in cache.get_many(list(delta_keys)).items():
+        counters[delta_keys[key]] += value
+
+    return build_dashboard_stats(counters)
+
+
+def refresh_dashboard_snapshot():
+    """Recompute the counters and start a new delta generation"""
+    snapshot = {
+        'generation': uuid.uuid4().hex,
+        'counters': compute_dashboard_counters(),
+        'computed_at': timezone.now().isoformat(),
+    }
+    ttl = _snapshot_ttl()
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, ttl)
+    cache.set(GENERATION_CACHE_KEY, snapshot['generation'], ttl)
+    return snapshot
+
+
+def invalidate_dashboard_snapshot():
+    """Force the next read to rescan, e.g. after deletions the deltas cannot express"""
+    cache.delete_many([SNAPSHOT_CACHE_KEY, GENERATION_CACHE_KEY])
+
+
+def bump_dashboard_counters(**deltas):
+    """
+    Apply counter deltas to the live snapshot. Without a snapshot there is nothing
+    to correct: the next read aggregates from the database and already sees the change.
+    """
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        return
+
+    ttl = _snapshot_ttl()
+    for counter, delta in deltas.items():
+        if not delta:
+            continue
+        if counter not in DELTA_COUNTERS:
+            logger.warning(f"Unknown dashboard counter: {counter}")
+            continue
+        key = DELTA_CACHE_KEY_TEMPLATE.format(generation=generation, counter=counter)
+        cache.add(key, 0, ttl)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Expired between add and incr; the snapshot went with it
+            pass
@@ -1,8 +1,9 @@
 import math
 from decimal import Decimal
 from django.utils import timezone
-from datetime import timedelta
+from datetime import timedelta, timezone as dt_timezone
 from .models import ClientProfile, Threshold, Rule
+from .feature_store import get_client_features
 from apps.transactions.models import Transaction
 from apps.utils.logger import get_rules_logger, log_rule_evaluation, log_system_event
 
@@ -17,22 +18,62 @@ def haversine_distance(lat1, lng1, lat2, lng2):
     if not all([lat1, lng1, lat2, lng2]):
         return 0
     
+    return great_circle_distance(lat1, lng1, lat2, lng2)
+
+def great_circle_distance(lat1, lng1, lat2, lng2):
+    """
+    Haversine distance in km where only None means missing (returns None):
+    zero is a real latitude or longitude (the equator, the prime meridian)
+    """
+    if any(value is None for value in (lat1, lng1, lat2, lng2)):
+        return None
+    
     # Convert decimal degrees to radians
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    lat1, lng1, lat2, lng2 = map(math.radians, [float(lat1), float(lng1), float(lat2), float(lng2)])
     
     # Haversine formula
     dlat = lat2 - lat1
     dlng = lng2 - lng1
     a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
+    c = 2 * math.asin(math.sqrt(min(a, 1.0)))
     
     # Radius of earth in kilometers
     r = 6371
     return c * r
 
+def has_distance_violation(triggers):
+    """Distance-based triggers always require OTP"""
+    return any('distance exceeded' in trigger.lower() for trigger in triggers)
+
+def decide(rule_score, triggers, requires_otp, ml_score):
+    """
+    The transaction policy on a rule score and an ML score, applied by transaction creation,
+    bulk transfers and shadow scoring: (combined score, decision, OTP reasons).
+    The ML score contributes up to 40 points. OTP ('otp') on any triggered rule, a high combined
+    or AI score, or an explicit/distance requirement; otherwise 'alert' from 40 points, else 'approve'.
+    """
+    combined = rule_score + int(ml_score * 40)
+    
+    otp_reasons = []
+    if triggers:
+        otp_reasons.append(f"Business rules triggered: {len(triggers)}")
+    if combined >= 70:
+        otp_reasons.append(f"High risk score: {combined}")
+    if ml_score >= 0.6:
+        otp_reasons.append(f"High AI score: {ml_score:.3f}")
+    if requires_otp:
+        otp_reasons.append("Risk engine explicit requirement")
+    if has_distance_violation(triggers):
+        otp_reasons.append("MANDATORY distance violation")
+    
+    if otp_reasons:
+        return combined, 'otp', otp_reasons
+    return combined, 'alert' if combined >= 40 else 'approve', otp_reasons
+
 class RiskEngine:
-    def __init__(self):
-        self.thresholds = self._load_thresholds()
+    def __init__(self, threshold_overrides=None):
+        # Overrides let shadow scoring evaluate a candidate threshold set next to the live one
+        self.thresholds = {**self._load_thresholds(), **(threshold_overrides or {})}
         self.rules = self._load_rules()
         logger.info(f"RiskEngine initialized with {len(self.thresholds)} thresholds and {len(self.rules)} rules")
         log_system_event(
@@ -53,9 +94,59 @@ class RiskEngine:
         """Load all enabled rules from database"""
         return Rule.objects.filter(enabled=True)
     
-    def calculate_risk_score(self, transaction):
+    def count_recent_transactions(self, client, as_of=None, exclude_ids=()):
+        """Rule 2's count: the client's transactions in the high-frequency window ending at as_of (default: now)"""
+        as_of = as_of or timezone.now()
+        high_freq_hours = self.thresholds.get('high_frequency_hours', 1)
+        queryset = Transaction.objects.filter(
+            client=client,
+            created_at__gte=as_of - timedelta(hours=high_freq_hours),
+            created_at__lte=as_of
+        )
+        if exclude_ids:
+            queryset = queryset.exclude(id__in=exclude_ids)
+        return queryset.count()
+    
+    def calculate_risk_scores(self, transactions, client_features=None, prior_transaction_count=None):
+        """
+        Score a batch of freshly created transactions from one client.
+        The per-client history lookups (recent count, stored features) run once for the batch;
+        prior_transaction_count, the recent count without the batch, may be precomputed by the caller.
+        Returns: list of (risk_score, triggers, requires_otp, decision) in input order
+        """
+        if not transactions:
+            return []
+        
+        client = transactions[0].client
+        if any(transaction.client_id != client.id for transaction in transactions):
+            raise ValueError("calculate_risk_scores expects transactions from a single client")
+        
+        # Each transaction sees the earlier ones in its batch, as if they had been submitted in turn
+        if prior_transaction_count is None:
+            prior_transaction_count = self.count_recent_transactions(
+                client, exclude_ids=[transaction.id for transaction in transactions]
+            )
+        # The batch is still pending, so the stored history holds only earlier completions
+        if client_features is None:
+            client_features = get_client_features(client)
+        
+        logger.info(f"Batch risk assessment: {len(transactions)} transactions for client {client.id}")
+        return [
+            self.calculate_risk_score(
+                transaction,
+                recent_transaction_count=prior_transaction_count + position,
+                client_features=client_features
+            )
+            for position, transaction in enumerate(transactions, start=1)
+        ]
+    
+    def calculate_risk_score(self, transaction, recent_transaction_count=None, has_verified_history=None, client_features=None,
+                             as_of=None):
         """
         Calculate risk score for a transaction with comprehensive logging
+        recent_transaction_count / has_verified_history / client_features may be precomputed by
+        calculate_risk_scores or the caller (shadow scoring reuses the production read)
+        as_of: when the transaction was scored, for re-scoring it later (history is read up to then)
         Returns: (risk_score, triggers, requires_otp, decision)
         """
         logger.info(f"Starting risk assessment for transaction {transaction.id}")
@@ -66,8 +157,10 @@ class RiskEngine:
         triggers = []
         requires_otp = False  # Initialize to False to prevent UnboundLocalError
         
-        # Get client profile
+        # Get client profile and its stored history features (one keyed read)
         client = transaction.client
+        if client_features is None:
+            client_features = get_client_features(client)
         
         # Rule 1: Large withdrawal/transfer
         large_withdrawal_threshold = self.thresholds.get('large_withdrawal', 10000)
@@ -90,10 +183,9 @@ class RiskEngine:
         # Rule 2: High frequency transactions
         high_freq_threshold = self.thresholds.get('high_frequency_count', 5)
         high_freq_hours = self.thresholds.get('high_frequency_hours', 1)
-        recent_transactions = Transaction.objects.filter(
-            client=client,
-            created_at__gte=timezone.now() - timedelta(hours=high_freq_hours)
-        ).count()
+        if recent_transaction_count is None:
+            recent_transaction_count = self.count_recent_transactions(client, as_of=as_of)
+        recent_transactions = recent_transaction_count
         
         if recent_transactions > high_freq_threshold:
             risk_score += 25
@@ -157,13 +249,10 @@ class RiskEngine:
             distance_from_last_verified = distance_from_home  # Default fallback to home distance
             
             # Find last verified transaction (completed with OTP or low-risk completed)
-            last_verified_transaction = Transaction.objects.filter(
-                client=client,
-                created_at__lt=transaction.created_at,
-                status='completed'
-            ).order_by('-created_at').first()
+            if has_verified_history is None:
+                has_verified_history = client_features.has_verified_history
             
-            if last_verified_transaction and client.last_known_lat and client.last_known_lng:
+            if has_verified_history and client.last_known_lat and client.last_known_lng:
                 # Use the current last_known as the last verified location
                 # (this represents the location from the most recent successful transaction)
                 distance_from_last_verified = haversine_distance(
@@ -258,9 +347,10 @@ class RiskEngine:
             )
         
         # Rule 5: Statistical outlier (previously Rule 5)
-        if client.avg_amount > 0 and client.std_amount > 0:
+        avg_amount, std_amount = client_features.amount_mean, client_features.amount_std
+        if avg_amount > 0 and std_amount > 0:
             z_score_threshold = self.thresholds.get('z_score_threshold', 2.0)
-            z_score = abs((transaction.amount - client.avg_amount) / client.std_amount)
+            z_score = abs((transaction.amount - avg_amount) / std_amount)
             
             if z_score > z_score_threshold:
                 risk_score += 15
@@ -269,18 +359,59 @@ class RiskEngine:
                 logger.warning(f"Rule 5 triggered: {trigger_msg}")
         
         # Rule 6: Unusual time of day (previously Rule 6)
+        # Late night/early morning until the client has a history; from then on, the hours they rarely use
         hour = transaction.created_at.hour
         unusual_hours = [23, 0, 1, 2, 3, 4, 5]  # Late night/early morning
-        if hour in unusual_hours:
-            risk_score += 10
+        if client_features.completed_count >= self.thresholds.get('typical_time_min_history', 10):
+            # The stored hour counts are kept in UTC
+            hour_share = client_features.hour_share(transaction.created_at.astimezone(dt_timezone.utc).hour)
+            unusual_time = hour_share < self.thresholds.get('unusual_hour_share', 0.05)
+            trigger_msg = f"Unusual time for this client: {hour}:00 ({hour_share:.0%} of their transactions)"
+        else:
+            unusual_time = hour in unusual_hours
             trigger_msg = f"Unusual time: {hour}:00"
+        if unusual_time:
+            risk_score += 10
             triggers.append(trigger_msg)
             logger.info(f"Rule 6 triggered: {trigger_msg}")
         
         # Rule 7: Device fingerprint anomaly (temporarily disabled - device_fingerprint field removed)
         # TODO: Re-implement when device fingerprinting is added back
         # Currently skipped due to removed device_fingerprint field
-        
+
+        # Rule 8: Impossible travel against the client's recent-location ring buffer (no history query)
+        if transaction.current_lat is not None and transaction.current_lng is not None:
+            # Import here to avoid circular imports
+            from .location_history import get_recent_locations, detect_impossible_travel
+
+            recent_points = get_recent_locations(client.id, exclude_transaction_id=transaction.id, as_of=as_of)
+            travel = detect_impossible_travel(
+                recent_points,
+                float(transaction.current_lat),
+                float(transaction.current_lng),
+                transaction.created_at or timezone.now(),
+                max_speed_kmh=self.thresholds.get('impossible_travel_speed_kmh', 900),
+                min_distance_km=self.thresholds.get('impossible_travel_min_km', 100)
+            )
+
+            if travel:
+                risk_score += 40
+                trigger_msg = (f"Impossible travel: {travel['distance_km']:.1f}km in {travel['hours']:.2f}h "
+                               f"({travel['speed_kmh']:.0f} km/h)")
+                triggers.append(trigger_msg)
+                logger.warning(f"Rule 8 triggered: {trigger_msg}")
+
+                log_rule_evaluation(
+                    rule_name="Impossible Travel",
+                    transaction_id=transaction.id,
+                    triggered=True,
+                    risk_score=risk_score,
+                    triggers=[
+                        trigger_msg,
+                        f"Previous location: ({travel['from_lat']}, {travel['from_lng']}) at {travel['from_time'].isoformat()}"
+                    ]
+                )
+
         # ENHANCED OTP LOGIC: Effective distance-based mandatory OTP
         # If effective distance rule triggered, OTP is MANDATORY regardless of other thresholds
         high_risk_threshold = self.thresholds.get('high_risk_threshold', 70)
@@ -304,9 +435,11 @@ class RiskEngine:
         
         return risk_score, triggers, requires_otp, decision
     
-    def calculate_enhanced_location_features(self, transaction):
+    def calculate_enhanced_location_features(self, transaction, has_verified_history=None):
         """Calculate enhanced location features for ML model with effective distance logic
         
+        has_verified_history may be precomputed for batches (see calculate_risk_scores)
+        
         Returns:
             dict: Contains distance_from_home, distance_from_last_verified, effective_distance
         """
@@ -341,13 +474,10 @@ class RiskEngine:
             distance_from_last_verified = distance_from_home  # Default fallback
             
             # Find last verified transaction
-            last_verified_transaction = Transaction.objects.filter(
-                client=client,
-                created_at__lt=transaction.created_at,
-                status='completed'
-            ).order_by('-created_at').first()
+            if has_verified_history is None:
+                has_verified_history = get_client_features(client).has_verified_history
             
-            if last_verified_transaction and client.last_known_lat and client.last_known_lng:
+            if has_verified_history and client.last_known_lat and client.last_known_lng:
                 distance_from_last_verified = haversine_distance(
                     float(client.last_known_lat), float(client.last_known_lng),
                     current_transaction_lat, current_transaction_lng
@@ -0,0 +1,203 @@
+"""
+Client feature store for SafeNetAi
+History-derived client features kept current as transactions complete, read by the rule engine and the ML model with one keyed lookup
+"""
+
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import ClientFeatures
+from apps.utils.logger import get_rules_logger
+
+logger = get_rules_logger()
+
+# Bump when the stored features change shape or meaning: rows and cache entries written under
+# another version are rebuilt from history on first read (or ahead of time by rebuild_client_features).
+# A new behavioural feature is a field in empty_history(), _add_completion() and _history_from_database().
+SCHEMA_VERSION = 2
+
+CACHE_KEY_TEMPLATE = 'risk:client_features:v{version}:{client_id}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'CLIENT_FEATURE_CACHE_TTL', 300)
+
+
+def _cache_key(client_id):
+    return CACHE_KEY_TEMPLATE.format(version=SCHEMA_VERSION, client_id=client_id)
+
+
+def empty_history():
+    return {
+        'completed_count': 0,
+        # Decimal sums as strings, exact in JSON
+        'amount_total': '0.00',
+        'amount_squares': '0.0000',
+        'hour_counts': [0] * 24,
+        'last_completed_at': None,
+    }
+
+
+# Amounts have two decimal places, their squares four
+CENT = Decimal('0.01')
+SQUARE_CENT = Decimal('0.0001')
+
+
+def _utc(moment):
+    return moment.astimezone(dt_timezone.utc) if timezone.is_aware(moment) else moment
+
+
+def _add_completion(history, txn):
+    amount = Decimal(str(txn.amount))
+    created_at = _utc(txn.created_at)
+    history['completed_count'] += 1
+    history['amount_total'] = str((Decimal(history['amount_total']) + amount).quantize(CENT))
+    history['amount_squares'] = str((Decimal(history['amount_squares']) + amount * amount).quantize(SQUARE_CENT))
+    history['hour_counts'][created_at.hour] += 1
+    if history['last_completed_at'] is None or created_at.isoformat() > history['last_completed_at']:
+        history['last_completed_at'] = created_at.isoformat()
+
+
+def _history_from_database(client_id, through):
+    """Aggregate the client's live and archived transactions completed by `through`"""
+    from django.db.models import Count, Sum, Max, F, ExpressionWrapper, DecimalField
+    from django.db.models.functions import ExtractHour
+    from apps.transactions.models import Transaction, ArchivedTransaction
+
+    square = ExpressionWrapper(F('amount') * F('amount'), output_field=DecimalField(max_digits=24, decimal_places=4))
+    history = empty_history()
+    total, squares, last_completed_at = Decimal('0'), Decimal('0'), None
+    for model in (Transaction, ArchivedTransaction):
+        completed = model.objects.filter(client_id=client_id, status='completed', updated_at__lte=through)
+        row = completed.aggregate(count=Count('id'), total=Sum('amount'), squares=Sum(square), last=Max('created_at'))
+        if not row['count']:
+            continue
+        history['completed_count'] += row['count']
+        total += Decimal(str(row['total'] or 0))
+        squares += Decimal(str(row['squares'] or 0))
+        if last_completed_at is None or row['last'] > last_completed_at:
+            last_completed_at = row['last']
+
+        by_hour = completed.annotate(hour=ExtractHour('created_at', tzinfo=dt_timezone.utc)).values('hour').annotate(n=Count('id'))
+        for bucket in by_hour.order_by():
+            history['hour_counts'][bucket['hour']] += bucket['n']
+
+    history['amount_total'] = str(total.quantize(CENT))
+    history['amount_squares'] = str(squares.quantize(SQUARE_CENT))
+    history['last_completed_at'] = _utc(last_completed_at).isoformat() if last_completed_at else None
+    return history
+
+
+def rebuild_client_features(client_id):
+    """Recompute a client's stored features from their whole history under the current schema"""
+    rebuilt_at = timezone.now()
+    history = _history_from_database(client_id, rebuilt_at)
+    row, _ = ClientFeatures.objects.update_or_create(
+        client_id=client_id,
+        defaults={'schema_version': SCHEMA_VERSION, 'features': history, 'rebuilt_at': rebuilt_at}
+    )
+    invalidate_cached_features(client_id)
+    logger.info(f"Rebuilt features of client {client_id}: {history['completed_count']} completed transactions")
+    return row
+
+
+def create_client_features(client_id):
+    """Start a new client with an empty history, so their first read needs no rebuild"""
+    ClientFeatures.objects.get_or_create(
+        client_id=client_id,
+        defaults={'schema_version': SCHEMA_VERSION, 'features': empty_history(), 'rebuilt_at': timezone.now()}
+    )
+
+
+def invalidate_cached_features(client_id):
+    key = _cache_key(client_id)
+    cache.delete(key)
+    # A read racing this transaction may have cached the pre-commit state
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_client_features(client_id):
+    """Forget a client's features after a change increments cannot express (a completion undone or deleted)"""
+    ClientFeatures.objects.filter(client_id=client_id).delete()
+    invalidate_cached_features(client_id)
+
+
+def record_completions(transactions):
+    """
+    Fold newly completed transactions into their clients' stored features, one locked row per client.
+    Rows rebuilt after a transaction was saved already count it (rebuilt_at is the watermark);
+    clients without a current row are skipped, as their first read rebuilds from history anyway.
+    """
+    by_client = defaultdict(list)
+    for txn in transactions:
+        by_client[txn.client_id].append(txn)
+
+    for client_id, completed in by_client.items():
+        with transaction.atomic():
+            row = ClientFeatures.objects.select_for_update().filter(client_id=client_id).first()
+            if row is None or row.schema_version != SCHEMA_VERSION:
+                continue
+            unrecorded = [txn for txn in completed if txn.updated_at > row.rebuilt_at]
+            if not unrecorded:
+                continue
+            for txn in unrecorded:
+                _add_completion(row.features, txn)
+            row.save(update_fields=['features', 'updated_at'])
+        invalidate_cached_features(client_id)
+
+
+class FeatureVector:
+    """A client's stored history features, with the statistics derived from them"""
+
+    def __init__(self, client, history):
+        self.client = client
+        self.history = history
+
+    @property
+    def completed_count(self):
+        return self.history['completed_count']
+
+    @property
+    def has_verified_history(self):
+        return self.completed_count > 0
+
+    @property
+    def amount_mean(self):
+        """Mean completed amount to the cent; the profile's (possibly seeded) baseline until there is history"""
+        if not self.completed_count:
+            return self.client.avg_amount
+        return (Decimal(self.history['amount_total']) / self.completed_count).quantize(CENT)
+
+    @property
+    def amount_std(self):
+        """Population standard deviation of completed amounts, same fallback as amount_mean"""
+        if not self.completed_count:
+            return self.client.std_amount
+        mean = Decimal(self.history['amount_total']) / self.completed_count
+        variance = max(Decimal(self.history['amount_squares']) / self.completed_count - mean * mean, Decimal('0'))
+        return variance.sqrt().quantize(CENT)
+
+    def hour_share(self, hour):
+        """Share of completed transactions made in this hour of the day (UTC); the rule engine's typical time"""
+        return self.history['hour_counts'][hour] / self.completed_count if self.completed_count else 0.0
+
+
+def get_client_features(client):
+    """
+    The client's features: a cache hit, else one primary-key read of their ClientFeatures row,
+    rebuilt from history first when it is missing or from an older schema
+    """
+    key = _cache_key(client.id)
+    history = cache.get(key)
+    if history is None:
+        row = ClientFeatures.objects.filter(client_id=client.id).first()
+        if row is None or row.schema_version != SCHEMA_VERSION:
+            row = rebuild_client_features(client.id)
+        history = row.features
+        # Cached once committed, so a rolled-back completion is never served
+        transaction.on_commit(lambda: cache.set(key, history, _cache_timeout()))
+    return FeatureVector(client, history)
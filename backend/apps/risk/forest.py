@@ -0,0 +1,141 @@
+"""
+Compiled isolation forest for SafeNetAi
+Flattens a trained IsolationForest and its StandardScaler into NumPy arrays and scores rows from them without scikit-learn
+"""
+
+import hashlib
+import os
+import numpy as np
+
+# Only NumPy at module level: prediction workers import this instead of unpickling scikit-learn objects
+
+EULER_GAMMA = np.euler_gamma
+
+
+def compiled_path(model_path):
+    """Where the compiled arrays of a .joblib model live"""
+    return f'{os.path.splitext(model_path)[0]}.npz'
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def average_path_length(n_samples):
+    """
+    Average path length of an unsuccessful search in a binary search tree of n_samples points,
+    the normalisation constant of isolation forests (same as scikit-learn's _average_path_length)
+    """
+    n_samples = np.asarray(n_samples, dtype=float)
+    lengths = np.zeros_like(n_samples)
+    lengths[n_samples == 2] = 1.0
+    large = n_samples > 2
+    n = n_samples[large]
+    lengths[large] = 2.0 * (np.log(n - 1.0) + EULER_GAMMA) - 2.0 * (n - 1.0) / n
+    return lengths
+
+
+def export_forest(model, scaler=None):
+    """
+    Flatten a fitted IsolationForest into arrays holding every tree's nodes end to end:
+    `feature` (-1 at leaves), `threshold`, `left` / `right` (absolute node indices) and `leaf_value`,
+    the depth of each leaf plus the expected remaining path length of the samples it still holds.
+    `roots` is each tree's first node. The scaler's mean and scale are kept so raw rows can be scored.
+    """
+    n_features = model.n_features_in_
+    subsampled = model._max_features != n_features
+    features, thresholds, lefts, rights, leaf_values, roots = [], [], [], [], [], []
+    offset = max_depth = 0
+
+    for tree, tree_features in zip(model.estimators_, model.estimators_features_):
+        tree = tree.tree_
+        is_leaf = tree.children_left == -1
+        depth = np.zeros(tree.node_count, dtype=np.int64)
+        # Children always come after their parent, so one pass fills in every depth
+        for node in range(tree.node_count):
+            if not is_leaf[node]:
+                depth[tree.children_left[node]] = depth[tree.children_right[node]] = depth[node] + 1
+
+        # Trees fitted on a feature subset index into that subset
+        feature_map = np.asarray(tree_features) if subsampled else np.arange(n_features)
+        features.append(np.where(is_leaf, -1, feature_map[np.maximum(tree.feature, 0)]))
+        thresholds.append(tree.threshold)
+        # Leaves point at themselves, so rows that reached one stay put while others descend
+        nodes = np.arange(tree.node_count) + offset
+        lefts.append(np.where(is_leaf, nodes, tree.children_left + offset))
+        rights.append(np.where(is_leaf, nodes, tree.children_right + offset))
+        leaf_values.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, int(depth.max()))
+
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'leaf_value': np.concatenate(leaf_values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': np.int32(max_depth),
+        # Mean path length the scores are normalised by
+        'denominator': np.float64(len(model.estimators_) * average_path_length([model._max_samples])[0]),
+        'offset': np.float64(model.offset_),
+        'mean': np.asarray(scaler.mean_ if scaler is not None else np.zeros(n_features), dtype=np.float64),
+        'scale': np.asarray(scaler.scale_ if scaler is not None else np.ones(n_features), dtype=np.float64),
+    }
+
+
+def save_compiled(model, scaler, path, source_digest='', trained_at=''):
+    """Write the exported arrays atomically; source_digest ties them to the .joblib they came from"""
+    arrays = export_forest(model, scaler)
+    temporary = f'{path}.tmp.npz'
+    np.savez(temporary, source_digest=np.str_(source_digest), trained_at=np.str_(trained_at or ''), **arrays)
+    os.replace(temporary, path)
+
+
+class CompiledForest:
+    """Scores rows from exported arrays with the same decision_function as the fitted estimator"""
+
+    def __init__(self, arrays):
+        for name in ('feature', 'threshold', 'left', 'right', 'leaf_value', 'roots', 'mean', 'scale'):
+            setattr(self, name, arrays[name])
+        self.max_depth = int(arrays['max_depth'])
+        self.denominator = float(arrays['denominator'])
+        self.offset = float(arrays['offset'])
+        self.source_digest = str(arrays.get('source_digest', ''))
+        self.trained_at = str(arrays.get('trained_at', '')) or None
+        self.n_estimators = len(self.roots)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def decision_function(self, X, scaled=False):
+        """Same values as IsolationForest.decision_function; raw rows are scaled first unless scaled=True"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if not scaled:
+            X = (X - self.mean) / self.scale
+        # scikit-learn trees compare float32 inputs against their thresholds
+        X = X.astype(np.float32).astype(np.float64)
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_estimators)).copy()
+        # Every step moves each row one level down every tree; leaves loop onto themselves
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            if (feature < 0).all():
+                break
+            go_left = X[rows, np.maximum(feature, 0)] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        depths = self.leaf_value[nodes].sum(axis=1)
+        if self.denominator:
+            scores = 2.0 ** (-depths / self.denominator)
+        else:
+            scores = np.ones_like(depths)
+        return -scores - self.offset
@@ -0,0 +1,117 @@
+"""
+Per-client recent-location ring buffer for SafeNetAi
+Feeds the impossible-travel rule in RiskEngine without querying transaction history
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from .engine import great_circle_distance
+
+CACHE_KEY_TEMPLATE = 'risk:recent_locations:{client_id}'
+
+# Floor on the elapsed time between two points so back-to-back transfers do not divide by zero
+MIN_TRAVEL_HOURS = 1 / 60
+
+
+def _buffer_size():
+    return getattr(settings, 'RECENT_LOCATION_BUFFER_SIZE', 5)
+
+
+def _cache_timeout():
+    return getattr(settings, 'RECENT_LOCATION_CACHE_TTL', 7 * 24 * 3600)
+
+
+def _cache_key(client_id):
+    return CACHE_KEY_TEMPLATE.format(client_id=client_id)
+
+
+def _load_from_database(client_id, exclude_transaction_id=None, as_of=None):
+    """DB fallback: rebuild the buffer from the client's latest located transactions (up to as_of)"""
+    from apps.transactions.models import Transaction
+
+    queryset = Transaction.objects.filter(
+        client_id=client_id,
+        current_lat__isnull=False,
+        current_lng__isnull=False
+    )
+    if exclude_transaction_id:
+        queryset = queryset.exclude(id=exclude_transaction_id)
+    if as_of is not None:
+        queryset = queryset.filter(created_at__lte=as_of)
+
+    rows = queryset.order_by('-created_at').values_list(
+        'current_lat', 'current_lng', 'created_at'
+    )[:_buffer_size()]
+    return [(float(lat), float(lng), created_at.timestamp()) for lat, lng, created_at in rows]
+
+
+def get_recent_locations(client_id, exclude_transaction_id=None, as_of=None):
+    """
+    Return the client's last K (lat, lng, unix_ts) points, newest first.
+    Served from cache; only a cache miss touches the database. With as_of (re-scoring a
+    transaction later, as shadow scoring does), the last K points up to that moment: once
+    newer points have pushed older ones out of the buffer, those are read from the database.
+    """
+    key = _cache_key(client_id)
+    points = cache.get(key)
+    if points is None:
+        points = _load_from_database(client_id, exclude_transaction_id)
+        cache.set(key, points, _cache_timeout())
+    if as_of is not None and any(point[2] > as_of.timestamp() for point in points):
+        points = _load_from_database(client_id, exclude_transaction_id, as_of=as_of)
+    return points
+
+
+def record_recent_location(client_id, lat, lng, when):
+    """Push a point onto the client's ring buffer, dropping the oldest beyond K"""
+    key = _cache_key(client_id)
+    point = (float(lat), float(lng), when.timestamp())
+
+    points = cache.get(key)
+    if points is None:
+        points = _load_from_database(client_id)
+    if point in points:
+        return points
+
+    points = sorted([point] + list(points), key=lambda p: p[2], reverse=True)[:_buffer_size()]
+    cache.set(key, points, _cache_timeout())
+    return points
+
+
+def clear_recent_locations(client_id):
+    """Forget the cached buffer so the next read rebuilds it from the database"""
+    cache.delete(_cache_key(client_id))
+
+
+def detect_impossible_travel(points, lat, lng, when, max_speed_kmh, min_distance_km):
+    """
+    Return the fastest implied movement from any buffered point to (lat, lng) at `when`
+    as a dict (distance_km, hours, speed_kmh, from_lat, from_lng, from_time), or None
+    when every movement is below `max_speed_kmh`. Constant cost: at most K comparisons.
+    """
+    current_ts = when.timestamp()
+    worst = None
+
+    for point_lat, point_lng, point_ts in points:
+        if point_ts > current_ts:
+            continue
+
+        # Zero is a real coordinate (the equator, the prime meridian); only None means missing
+        distance = great_circle_distance(point_lat, point_lng, lat, lng)
+        if distance is None or distance < min_distance_km:
+            continue
+
+        hours = max((current_ts - point_ts) / 3600, MIN_TRAVEL_HOURS)
+        speed = distance / hours
+        if speed > max_speed_kmh and (worst is None or speed > worst['speed_kmh']):
+            worst = {
+                'distance_km': distance,
+                'hours': hours,
+                'speed_kmh': speed,
+                'from_lat': point_lat,
+                'from_lng': point_lng,
+                'from_time': datetime.fromtimestamp(point_ts, tz=dt_timezone.utc),
+            }
+
+    return worst
@@ -0,0 +1,150 @@
+"""
+In-memory grid index of suspicious coordinates for SafeNetAi
+Backs the location integrity check on transfers with O(1) lookups
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from .engine import great_circle_distance
+from apps.utils.logger import get_rules_logger, log_system_event
+
+logger = get_rules_logger()
+
+VERSION_CACHE_KEY = 'risk:suspicious_locations:version'
+
+# Km per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.32
+
+# Entries spanning more cells than this are kept in a short list checked on every lookup
+MAX_CELLS_PER_ENTRY = 256
+
+
+class SuspiciousLocationIndex:
+    """
+    Uniform lat/lng grid. Each entry is stored in every cell its radius touches,
+    so a lookup only inspects the entries of the single cell containing the point.
+    """
+
+    def __init__(self, entries, cell_deg=0.25):
+        self.cell_deg = cell_deg
+        self.lng_cells = int(round(360 / cell_deg))
+        self.cells = defaultdict(list)
+        self.wide_entries = []
+        self.size = 0
+        for entry in entries:
+            self.add(entry)
+
+    def _cell(self, lat, lng):
+        row = int(math.floor((lat + 90) / self.cell_deg))
+        col = int(math.floor((lng + 180) / self.cell_deg)) % self.lng_cells
+        return row, col
+
+    def add(self, entry):
+        """Add an entry dict with keys id, name, category, lat, lng, radius_km"""
+        lat, lng, radius_km = entry['lat'], entry['lng'], entry['radius_km']
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 89.9)))
+        lng_span = min(radius_km / (KM_PER_DEGREE * cos_lat), 180)
+
+        min_row, min_col = self._cell(max(lat - lat_span, -90), lng - lng_span)
+        max_row, max_col = self._cell(min(lat + lat_span, 90), lng + lng_span)
+        col_count = (max_col - min_col) % self.lng_cells + 1
+        if lng_span >= 180:
+            col_count = self.lng_cells
+
+        self.size += 1
+        if (max_row - min_row + 1) * col_count > MAX_CELLS_PER_ENTRY:
+            self.wide_entries.append(entry)
+            return
+
+        for row in range(min_row, max_row + 1):
+            for offset in range(col_count):
+                self.cells[(row, (min_col + offset) % self.lng_cells)].append(entry)
+
+    def lookup(self, lat, lng):
+        """Return all entries whose radius contains (lat, lng)"""
+        candidates = self.cells.get(self._cell(lat, lng), [])
+        if self.wide_entries:
+            candidates = candidates + self.wide_entries
+
+        matches = []
+        for entry in candidates:
+            # Not haversine_distance: it treats zero coordinates as missing and returns 0 for them
+            distance = great_circle_distance(entry['lat'], entry['lng'], lat, lng)
+            if distance is not None and distance <= entry['radius_km']:
+                matches.append(entry)
+        return matches
+
+
+_index = None
+_index_version = None
+_last_version_check = 0.0
+_lock = threading.Lock()
+
+
+def build_suspicious_location_index():
+    """Load all enabled suspicious locations from the database into a new index"""
+    from .models import SuspiciousLocation
+
+    entries = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'lat': float(row['lat']),
+            'lng': float(row['lng']),
+            'radius_km': row['radius_km'],
+        }
+        for row in SuspiciousLocation.objects.filter(enabled=True).values(
+            'id', 'name', 'category', 'lat', 'lng', 'radius_km'
+        ).iterator(chunk_size=5000)
+    ]
+    index = SuspiciousLocationIndex(
+        entries, cell_deg=getattr(settings, 'SUSPICIOUS_LOCATION_CELL_DEG', 0.25)
+    )
+    logger.info(f"Suspicious location index built: {index.size} entries, "
+                f"{len(index.cells)} cells, {len(index.wide_entries)} wide regions")
+    return index
+
+
+def get_suspicious_location_index():
+    """
+    Return the process-wide index, rebuilding it when an admin edit bumped the shared version.
+    The shared version is re-read at most every SUSPICIOUS_LOCATION_INDEX_CHECK_SECONDS.
+    """
+    global _index, _index_version, _last_version_check
+
+    now = time.monotonic()
+    check_interval = getattr(settings, 'SUSPICIOUS_LOCATION_INDEX_CHECK_SECONDS', 5)
+    if _index is not None and now - _last_version_check < check_interval:
+        return _index
+
+    with _lock:
+        version = cache.get(VERSION_CACHE_KEY, 0)
+        _last_version_check = now
+        if _index is None or version != _index_version:
+            _index = build_suspicious_location_index()
+            _index_version = version
+        return _index
+
+
+def invalidate_suspicious_location_index():
+    """Drop the local index and bump the shared version so other workers rebuild too"""
+    global _index
+
+    with _lock:
+        _index = None
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
+
+    log_system_event(
+        "Suspicious location index invalidated",
+        "risk_engine",
+        "INFO"
+    )
@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+import time
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from apps.risk.forest import CompiledForest, file_digest, save_compiled
+from apps.risk.ml import FraudMLModel
+
+# Run in a fresh interpreter so each loader's peak RSS is measured on its own
+RSS_PROBE = '''
+import sys
+path = sys.argv[2]
+if sys.argv[1] == 'compiled':
+    from apps.risk.forest import CompiledForest
+    model = CompiledForest.load(path)
+else:
+    import joblib
+    model = joblib.load(path)['model']
+# VmHWM starts afresh at exec, unlike ru_maxrss which keeps the forking parent's peak
+with open('/proc/self/status') as status:
+    print(next(line.split()[1] for line in status if line.startswith('VmHWM')))
+'''
+
+class Command(BaseCommand):
+    help = 'Export the trained fraud model to NumPy arrays for scikit-learn-free scoring and check it scores the same'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Synthetic rows scored by both models to compare them (default: 1000)'
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Also time single-row scoring and measure the peak RSS of loading each model (Linux)'
+        )
+
+    def handle(self, *args, **options):
+        ml_model = FraudMLModel()
+        if not os.path.exists(ml_model.model_path):
+            raise CommandError(f'No trained model at {ml_model.model_path}; run train_fraud_model first')
+
+        model_data = joblib.load(ml_model.model_path)
+        model, scaler = model_data['model'], model_data['scaler']
+        save_compiled(model, scaler, ml_model.compiled_path, file_digest(ml_model.model_path), model_data.get('trained_at'))
+        forest = CompiledForest.load(ml_model.compiled_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {forest.n_estimators} trees ({len(forest.feature)} nodes) to {ml_model.compiled_path}: '
+            f'{os.path.getsize(ml_model.compiled_path) / 1024:.0f} KiB '
+            f'(joblib: {os.path.getsize(ml_model.model_path) / 1024:.0f} KiB)'
+        ))
+
+        # Rows spread around the training distribution, in raw (unscaled) units
+        rng = np.random.default_rng(42)
+        X = rng.normal(scale=2.0, size=(options['rows'], model.n_features_in_)) * forest.scale + forest.mean
+        expected = model.decision_function(scaler.transform(X) if scaler is not None else X)
+        difference = np.abs(forest.decision_function(X) - expected).max()
+        style = self.style.SUCCESS if difference < 1e-9 else self.style.ERROR
+        self.stdout.write(style(f'Max score difference over {options["rows"]} rows: {difference:.3g}'))
+
+        if options['benchmark']:
+            self.benchmark(model, scaler, forest, X[:1], ml_model)
+
+    def benchmark(self, model, scaler, forest, row, ml_model):
+        for name, score in (
+            ('scikit-learn', lambda: model.decision_function(scaler.transform(row) if scaler is not None else row)),
+            ('compiled', lambda: forest.decision_function(row)),
+        ):
+            timings = []
+            for _ in range(200):
+                start = time.perf_counter()
+                score()
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f'{name} single-row score: median {np.median(timings):.3f}ms')
+
+        for name, path in (('scikit-learn', ml_model.model_path), ('compiled', ml_model.compiled_path)):
+            result = subprocess.run(
+                [sys.executable, '-c', RSS_PROBE, 'compiled' if name == 'compiled' else 'joblib', path],
+                capture_output=True, text=True, cwd=os.getcwd()
+            )
+            if result.returncode:
+                self.stdout.write(self.style.ERROR(f'{name} RSS probe failed: {result.stderr.strip()}'))
+            else:
+                # VmHWM is in KiB
+                self.stdout.write(f'{name} loader peak RSS: {int(result.stdout.split()[-1]) / 1024:.1f} MiB')
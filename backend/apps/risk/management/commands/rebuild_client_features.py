@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from apps.risk.feature_store import SCHEMA_VERSION, rebuild_client_features
+from apps.risk.models import ClientProfile, ClientFeatures
+
+class Command(BaseCommand):
+    help = 'Recompute stored client features from transaction history (after a schema bump, or to repair drift)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--client',
+            type=int,
+            action='append',
+            default=None,
+            help='Only this client profile id (repeatable; default: every client)'
+        )
+        parser.add_argument(
+            '--stale-only',
+            action='store_true',
+            help='Only clients without a row under the current schema; the rest are kept up to date incrementally'
+        )
+
+    def handle(self, *args, **options):
+        clients = ClientProfile.objects.order_by('pk')
+        if options['client']:
+            clients = clients.filter(pk__in=options['client'])
+        if options['stale_only']:
+            current = ClientFeatures.objects.filter(schema_version=SCHEMA_VERSION).values('client_id')
+            clients = clients.exclude(pk__in=current)
+
+        rebuilt = 0
+        for client_id in clients.values_list('pk', flat=True).iterator():
+            rebuild_client_features(client_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt features of {rebuilt} clients under schema v{SCHEMA_VERSION}.'
+        ))
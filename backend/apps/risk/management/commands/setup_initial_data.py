@@ -19,6 +19,10 @@ class Command(BaseCommand):
             ('location_time_hours', 1, 'Location time window (hours)'),
             ('z_score_threshold', 2.0, 'Z-score threshold for statistical outliers'),
             ('high_risk_threshold', 70, 'High risk threshold for OTP requirement'),
+            ('impossible_travel_speed_kmh', 900, 'Implied speed between recent locations that counts as impossible travel (km/h)'),
+            ('impossible_travel_min_km', 100, 'Minimum distance between recent locations checked for impossible travel (km)'),
+            ('typical_time_min_history', 10, 'Completed transactions after which unusual time is judged against the client\'s own hours'),
+            ('unusual_hour_share', 0.05, 'Share of a client\'s completed transactions below which an hour counts as unusual for them'),
         ]
         
         for key, value, description in thresholds_data:
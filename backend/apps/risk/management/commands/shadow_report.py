@@ -0,0 +1,76 @@
+from collections import Counter
+from datetime import timedelta
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.risk.models import ShadowCandidate, ShadowScore
+
+class Command(BaseCommand):
+    help = 'Compare shadow scoring candidates with production: decision agreement and score deltas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--candidate',
+            action='append',
+            default=None,
+            help='Only this candidate, by name (repeatable; default: every candidate with scores in the window)'
+        )
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Report on transactions shadow-scored in the last N hours (default: 24)'
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        candidates = ShadowCandidate.objects.select_related('model_version').order_by('name')
+        if options['candidate']:
+            candidates = candidates.filter(name__in=options['candidate'])
+            missing = set(options['candidate']) - {candidate.name for candidate in candidates}
+            if missing:
+                raise CommandError(f'Unknown shadow candidates: {", ".join(sorted(missing))}')
+
+        reported = 0
+        for candidate in candidates:
+            rows = list(ShadowScore.objects.filter(candidate=candidate, created_at__gte=since).values_list(
+                'production_decision', 'shadow_decision', 'production_score', 'shadow_score',
+                'production_ml_score', 'shadow_ml_score', 'shadow_ms'
+            ))
+            if rows or options['candidate']:
+                self.report(candidate, rows, options['hours'])
+                reported += 1
+
+        if not reported:
+            self.stdout.write(self.style.WARNING(f'No shadow scores in the last {options["hours"]} hours.'))
+
+    def report(self, candidate, rows, hours):
+        version = f'model version {candidate.model_version_id}' if candidate.model_version_id else 'production model'
+        self.stdout.write(self.style.SUCCESS(
+            f'{candidate.name}: thresholds {candidate.thresholds or "unchanged"}, {version}, '
+            f'{len(rows)} transactions in the last {hours} hours'
+        ))
+        if not rows:
+            return
+
+        production, shadow = [row[0] for row in rows], [row[1] for row in rows]
+        production_otp = np.array([decision == 'otp' for decision in production])
+        shadow_otp = np.array([decision == 'otp' for decision in shadow])
+        score_delta = np.array([row[3] - row[2] for row in rows], dtype=float)
+        ml_delta = np.array([row[5] - row[4] for row in rows])
+        shadow_ms = np.array([row[6] for row in rows])
+
+        agreement = np.mean([p == s for p, s in zip(production, shadow)])
+        self.stdout.write(f'  Decision agreement: {agreement:.1%} (OTP agreement {np.mean(production_otp == shadow_otp):.1%})')
+        self.stdout.write(f'  OTP rate: production {production_otp.mean():.1%}, shadow {shadow_otp.mean():.1%}')
+        disagreements = Counter((p, s) for p, s in zip(production, shadow) if p != s)
+        for (production_decision, shadow_decision), count in disagreements.most_common():
+            self.stdout.write(f'    {production_decision} -> {shadow_decision}: {count}')
+        self.stdout.write(
+            f'  Score delta (shadow - production): mean {score_delta.mean():+.2f}, '
+            f'mean absolute {np.abs(score_delta).mean():.2f}, p95 absolute {np.percentile(np.abs(score_delta), 95):.0f}'
+        )
+        self.stdout.write(
+            f'  ML score delta: mean {ml_delta.mean():+.4f}, mean absolute {np.abs(ml_delta).mean():.4f}'
+        )
+        self.stdout.write(f'  Shadow scoring time: mean {shadow_ms.mean():.1f} ms, p95 {np.percentile(shadow_ms, 95):.1f} ms')
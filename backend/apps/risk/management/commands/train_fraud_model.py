@@ -1,10 +1,35 @@
+import time
 from django.core.management.base import BaseCommand
 from apps.risk.ml import FraudMLModel
 
 class Command(BaseCommand):
     help = 'Train the fraud detection model using historical transaction data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Refit on the checkpointed feature sample plus the transactions created since the last run, '
+                 'instead of the whole history (client statistics are left alone)'
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=None,
+            help='Keep running and train every N seconds, e.g. 3600 with --incremental (default: run once)'
+        )
+
     def handle(self, *args, **options):
+        while True:
+            if options['incremental']:
+                self.train_incremental()
+            else:
+                self.train()
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def train(self):
         self.stdout.write('Starting fraud model training...')
         
         # Update client statistics first
@@ -23,3 +48,14 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.WARNING('Model training failed or insufficient data. Using rule-based detection only.')
             )
+
+    def train_incremental(self):
+        self.stdout.write('Starting incremental fraud model training...')
+        
+        ml_model = FraudMLModel()
+        if ml_model.train_incremental():
+            self.stdout.write(self.style.SUCCESS('Fraud detection model is up to date.'))
+        else:
+            self.stdout.write(
+                self.style.WARNING('Incremental training failed or insufficient data. Keeping the current model.')
+            )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:39
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+# Coordinates previously hard-coded in TransactionViewSet.create
+DEFAULT_SUSPICIOUS_LOCATIONS = [
+    ('Null Island', 'null_island', '0.0', '0.0'),
+    ('Google HQ', 'vpn_exit', '37.4419', '-122.1430'),
+    ('Times Square', 'fake_location', '40.7589', '-73.9851'),
+    ('London center', 'fake_location', '51.5074', '-0.1278'),
+    ('Paris center', 'fake_location', '48.8566', '2.3522'),
+]
+
+
+def seed_suspicious_locations(apps, schema_editor):
+    SuspiciousLocation = apps.get_model('risk', 'SuspiciousLocation')
+    SuspiciousLocation.objects.bulk_create([
+        SuspiciousLocation(name=name, category=category, lat=Decimal(lat), lng=Decimal(lng), radius_km=0.1)
+        for name, category, lat, lng in DEFAULT_SUSPICIOUS_LOCATIONS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0004_clientprofile_address_clientprofile_city_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuspiciousLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.CharField(choices=[('null_island', 'Null Island'), ('vpn_exit', 'VPN Exit'), ('fake_location', 'Common Fake Location'), ('fraud_hotspot', 'Fraud Hotspot'), ('other', 'Other')], default='other', max_length=20)),
+                ('lat', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('lng', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('radius_km', models.FloatField(default=0.1, help_text='Match radius around the point (km)')),
+                ('enabled', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Suspicious Location',
+                'verbose_name_plural': 'Suspicious Locations',
+            },
+        ),
+        migrations.RunPython(seed_suspicious_locations, migrations.RunPython.noop),
+    ]
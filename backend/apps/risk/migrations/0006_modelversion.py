@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0005_suspiciouslocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255)),
+                ('params', models.JSONField(default=dict)),
+                ('metrics', models.JSONField(default=dict)),
+                ('training_rows', models.IntegerField(default=0)),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Model Version',
+                'verbose_name_plural': 'Model Versions',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0006_modelversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientFeatures',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='features', serialize=False, to='risk.clientprofile')),
+                ('schema_version', models.PositiveIntegerField()),
+                ('features', models.JSONField(default=dict)),
+                ('rebuilt_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Client Features',
+                'verbose_name_plural': 'Client Features',
+            },
+        ),
+    ]
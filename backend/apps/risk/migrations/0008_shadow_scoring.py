@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0007_clientfeatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShadowCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('thresholds', models.JSONField(blank=True, default=dict, help_text='Threshold key to value, overriding the live thresholds')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('model_version', models.ForeignKey(blank=True, help_text='Scored instead of the production model; leave empty to keep the production ML score', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='shadow_candidates', to='risk.modelversion')),
+            ],
+            options={
+                'verbose_name': 'Shadow Candidate',
+                'verbose_name_plural': 'Shadow Candidates',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShadowScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField()),
+                ('production_score', models.IntegerField()),
+                ('shadow_score', models.IntegerField()),
+                ('production_ml_score', models.FloatField()),
+                ('shadow_ml_score', models.FloatField()),
+                ('production_decision', models.CharField(choices=[('approve', 'Approve'), ('alert', 'Approve with alert'), ('otp', 'Require OTP')], max_length=10)),
+                ('shadow_decision', models.CharField(choices=[('approve', 'Approve'), ('alert', 'Approve with alert'), ('otp', 'Require OTP')], max_length=10)),
+                ('shadow_triggers', models.JSONField(default=list)),
+                ('shadow_ms', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='risk.shadowcandidate')),
+            ],
+            options={
+                'verbose_name': 'Shadow Score',
+                'verbose_name_plural': 'Shadow Scores',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['candidate', 'created_at'], name='shadow_candidate_created_idx')],
+            },
+        ),
+    ]
@@ -47,6 +47,13 @@ class ClientProfile(models.Model):
             if existing_profile.exists():
                 raise ValidationError({'national_id': 'A client profile with this National ID already exists.'})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored owner so a relinked profile invalidates the previous user's cache
+        instance._loaded_user_id = instance.__dict__.get('user_id')
+        return instance
+
     def save(self, *args, **kwargs):
         # Generate account number if not provided
         if not self.bank_account_number:
@@ -85,3 +92,126 @@ class Threshold(models.Model):
     class Meta:
         verbose_name = "Threshold"
         verbose_name_plural = "Thresholds"
+
+class SuspiciousLocation(models.Model):
+    """
+    Known-fake or high-risk coordinates checked on every transfer.
+    A point is an entry with a small radius; a region is the same with a larger radius.
+    """
+    CATEGORY_CHOICES = [
+        ('null_island', 'Null Island'),
+        ('vpn_exit', 'VPN Exit'),
+        ('fake_location', 'Common Fake Location'),
+        ('fraud_hotspot', 'Fraud Hotspot'),
+        ('other', 'Other'),
+    ]
+
+    name = models.CharField(max_length=100)
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
+    lat = models.DecimalField(max_digits=9, decimal_places=6)
+    lng = models.DecimalField(max_digits=9, decimal_places=6)
+    radius_km = models.FloatField(default=0.1, help_text="Match radius around the point (km)")
+    enabled = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.lat}, {self.lng}) r={self.radius_km}km"
+
+    class Meta:
+        verbose_name = "Suspicious Location"
+        verbose_name_plural = "Suspicious Locations"
+
+class ModelVersion(models.Model):
+    """
+    A fraud model registered by the hyperparameter sweep, with the parameters and scores it was picked on.
+    The active version is the one installed as the production model; full retrains reuse its parameters.
+    """
+    path = models.CharField(max_length=255)
+    params = models.JSONField(default=dict)
+    metrics = models.JSONField(default=dict)
+    training_rows = models.IntegerField(default=0)
+    is_active = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Model version {self.id}{' (active)' if self.is_active else ''}: {self.params}"
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = "Model Version"
+        verbose_name_plural = "Model Versions"
+
+class ClientFeatures(models.Model):
+    """
+    A client's history-derived features (apps.risk.feature_store), stored as of `rebuilt_at` plus every
+    completion recorded since. Rows written under another schema_version are rebuilt on first read.
+    """
+    client = models.OneToOneField(ClientProfile, on_delete=models.CASCADE, primary_key=True, related_name='features')
+    schema_version = models.PositiveIntegerField()
+    features = models.JSONField(default=dict)
+    rebuilt_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Features of client {self.client_id} (schema v{self.schema_version})"
+
+    class Meta:
+        verbose_name = "Client Features"
+        verbose_name_plural = "Client Features"
+
+class ShadowCandidate(models.Model):
+    """
+    Threshold overrides and/or a registered model version scored next to production on live
+    transactions (apps.risk.shadow). Its decisions are only recorded, never acted on.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    thresholds = models.JSONField(default=dict, blank=True, help_text="Threshold key to value, overriding the live thresholds")
+    model_version = models.ForeignKey(
+        ModelVersion, on_delete=models.SET_NULL, null=True, blank=True, related_name='shadow_candidates',
+        help_text="Scored instead of the production model; leave empty to keep the production ML score"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name}{' (active)' if self.is_active else ''}"
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = "Shadow Candidate"
+        verbose_name_plural = "Shadow Candidates"
+
+class ShadowScore(models.Model):
+    """Production and candidate outcomes for one scored transaction"""
+    DECISIONS = [
+        ('approve', 'Approve'),
+        ('alert', 'Approve with alert'),
+        ('otp', 'Require OTP'),
+    ]
+
+    candidate = models.ForeignKey(ShadowCandidate, on_delete=models.CASCADE, related_name='scores')
+    # Not a foreign key: comparisons outlive the archival of the transactions they were made on
+    transaction_id = models.BigIntegerField()
+    production_score = models.IntegerField()
+    shadow_score = models.IntegerField()
+    production_ml_score = models.FloatField()
+    shadow_ml_score = models.FloatField()
+    production_decision = models.CharField(max_length=10, choices=DECISIONS)
+    shadow_decision = models.CharField(max_length=10, choices=DECISIONS)
+    shadow_triggers = models.JSONField(default=list)
+    # Time the candidate took to score, on the background executor
+    shadow_ms = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Shadow score of transaction {self.transaction_id} by {self.candidate_id}: {self.production_decision} / {self.shadow_decision}"
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # shadow_report: one candidate over a time window
+            models.Index(fields=['candidate', 'created_at'], name='shadow_candidate_created_idx'),
+        ]
+        verbose_name = "Shadow Score"
+        verbose_name_plural = "Shadow Scores"
@@ -0,0 +1,136 @@
+"""
+Prediction cache for SafeNetAi
+In-process LRU + TTL cache of ML scores keyed by the model version and the quantized inputs of a transaction
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+
+# Overridden by the ML_PREDICTION_* settings
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL_SECONDS = 60
+DEFAULT_AMOUNT_STEP = '1'
+DEFAULT_COORDINATE_DECIMALS = 3
+
+
+class PredictionCache:
+    """
+    Least-recently-used mapping with a time to live per entry, safe to share between threads.
+    Counts hits, misses, evictions (LRU) and expirations (TTL) for hit-rate monitoring.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """The process-wide cache, sized from settings on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache(
+                    max_size=getattr(settings, 'ML_PREDICTION_CACHE_SIZE', DEFAULT_MAX_SIZE),
+                    ttl=getattr(settings, 'ML_PREDICTION_CACHE_TTL', DEFAULT_TTL_SECONDS)
+                )
+    return _cache
+
+
+def reset_prediction_cache():
+    """Drop the cache so the next use re-reads the settings (tests)"""
+    global _cache
+    _cache = None
+
+
+def _quantize(value, step):
+    if value is None:
+        return None
+    step = Decimal(step)
+    return (Decimal(str(value)) / step).quantize(Decimal('1'), rounding=ROUND_HALF_UP) * step
+
+
+def _coordinate(value):
+    if value in (None, ''):
+        return None
+    return round(float(value), getattr(settings, 'ML_PREDICTION_COORDINATE_DECIMALS', DEFAULT_COORDINATE_DECIMALS))
+
+
+def prediction_key(transaction, model_version):
+    """
+    Everything the feature vector is computed from, quantized so near-identical what-if requests
+    share a key: the amount to ML_PREDICTION_AMOUNT_STEP, coordinates to ~100 m, time to the hour.
+    The client's updated_at stands in for its balance and known locations, so a changed profile
+    (e.g. after a completed transfer) misses. Returns None when the inputs cannot be keyed, or the
+    model was not loaded from a file.
+    """
+    client = transaction.client
+    if model_version is None or transaction.created_at is None or client.pk is None:
+        return None
+    created_at = transaction.created_at
+    return (
+        model_version,
+        client.pk,
+        client.updated_at,
+        transaction.transaction_type,
+        _quantize(transaction.amount, getattr(settings, 'ML_PREDICTION_AMOUNT_STEP', DEFAULT_AMOUNT_STEP)),
+        _coordinate(transaction.current_lat),
+        _coordinate(transaction.current_lng),
+        created_at.hour,
+        created_at.weekday(),
+    )
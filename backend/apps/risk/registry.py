@@ -0,0 +1,68 @@
+"""
+Fraud model registry for SafeNetAi
+Stores swept model artifacts next to the production model and records them as ModelVersion rows
+"""
+
+import os
+import shutil
+import joblib
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from .forest import compiled_path, file_digest, save_compiled
+from .models import ModelVersion
+from apps.utils.logger import get_ai_logger, log_system_event
+
+logger = get_ai_logger()
+
+# What train() used before the sweep existed, and still uses until a version is activated
+DEFAULT_PARAMS = {'contamination': 0.1, 'n_estimators': 100, 'max_samples': 'auto'}
+
+
+def model_dir():
+    return getattr(settings, 'ML_MODEL_DIR', os.path.join(settings.BASE_DIR, 'models'))
+
+
+def active_version():
+    return ModelVersion.objects.filter(is_active=True).first()
+
+
+def training_params():
+    """IsolationForest parameters for full retrains: the active version's, else the defaults"""
+    version = active_version()
+    return {**DEFAULT_PARAMS, **(version.params if version else {})}
+
+
+def register_model_version(model, scaler, params, metrics, training_rows):
+    """Save a fitted model in the production file layout under models/registry/ and record it"""
+    trained_at = datetime.now(dt_timezone.utc)
+    path = os.path.join(model_dir(), 'registry', f'fraud_isolation-{trained_at:%Y%m%d%H%M%S}.joblib')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump({'model': model, 'scaler': scaler, 'trained_at': trained_at.isoformat()}, path)
+
+    version = ModelVersion.objects.create(path=path, params=params, metrics=metrics, training_rows=training_rows)
+    logger.info(f"Registered fraud model version {version.id}: {params}")
+    log_system_event("Fraud model version registered", "fraud_ml_model", "INFO", {
+        "version": version.id, "params": params, "path": path
+    })
+    return version
+
+
+def activate(version, model_path):
+    """Install a registered version (and its compiled export) as the production model and mark it the only active one"""
+    temporary = f'{model_path}.tmp'
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    shutil.copyfile(version.path, temporary)
+    # Workers loading the model never see a half-written file
+    os.replace(temporary, model_path)
+    model_data = joblib.load(model_path)
+    save_compiled(
+        model_data['model'], model_data['scaler'], compiled_path(model_path),
+        file_digest(model_path), model_data.get('trained_at')
+    )
+    with transaction.atomic():
+        ModelVersion.objects.filter(is_active=True).exclude(pk=version.pk).update(is_active=False)
+        ModelVersion.objects.filter(pk=version.pk).update(is_active=True)
+    version.is_active = True
+    logger.info(f"Activated fraud model version {version.id}")
+    log_system_event("Fraud model version activated", "fraud_ml_model", "INFO", {"version": version.id})
@@ -0,0 +1,65 @@
+"""
+Feature reservoir for SafeNetAi
+Bounded, recency-biased sample of training feature vectors, checkpointed to disk between incremental training runs
+"""
+
+import os
+import joblib
+import numpy as np
+
+
+class FeatureReservoir:
+    """
+    Fixed-capacity sample of feature rows. Until it is full every row is kept; after that each
+    new row overwrites a random slot, so a row survives n later rows with probability
+    (1 - 1/capacity)^n. The sample leans towards recent behaviour without a hard cut-off,
+    and it only ever costs `capacity` rows to refit on.
+    """
+
+    def __init__(self, capacity, n_features, seed=None):
+        self.capacity = capacity
+        self.rows = np.empty((0, n_features))
+        # Transactions fed in so far, and the highest transaction id among them
+        self.seen = 0
+        self.last_id = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, rows, last_id=None):
+        rows = np.asarray(rows, dtype=float).reshape(-1, self.rows.shape[1])
+        self.seen += len(rows)
+        free = self.capacity - len(self.rows)
+        if free > 0:
+            self.rows = np.vstack([self.rows, rows[:free]])
+            rows = rows[free:]
+        if len(rows):
+            slots = self.rng.integers(0, self.capacity, size=len(rows))
+            # Assigned in order, so a later row wins when two land on the same slot
+            self.rows[slots] = rows
+        if last_id is not None:
+            self.last_id = max(self.last_id, last_id)
+
+    def save(self, path):
+        """Write the checkpoint atomically, so a crash mid-write leaves the previous one intact"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        joblib.dump({
+            'capacity': self.capacity,
+            'rows': self.rows,
+            'seen': self.seen,
+            'last_id': self.last_id,
+            'rng': self.rng.bit_generator.state,
+        }, temporary)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        data = joblib.load(path)
+        reservoir = cls(data['capacity'], data['rows'].shape[1])
+        reservoir.rows = data['rows']
+        reservoir.seen = data['seen']
+        reservoir.last_id = data['last_id']
+        reservoir.rng.bit_generator.state = data['rng']
+        return reservoir
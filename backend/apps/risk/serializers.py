@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Rule, Threshold
+from .models import Rule, Threshold, SuspiciousLocation
 
 class RuleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -10,3 +10,9 @@ class ThresholdSerializer(serializers.ModelSerializer):
     class Meta:
         model = Threshold
         fields = ['id', 'key', 'value', 'description']
+
+class SuspiciousLocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SuspiciousLocation
+        fields = ['id', 'name', 'category', 'lat', 'lng', 'radius_km', 'enabled', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
@@ -0,0 +1,179 @@
+"""
+Shadow scoring for SafeNetAi
+Re-scores live transactions with candidate thresholds or model versions on a background executor and records both decisions
+"""
+
+import copy
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from apps.utils.logger import get_ai_logger
+
+logger = get_ai_logger()
+
+# Overridden by the SHADOW_* settings
+DEFAULT_MAX_WORKERS = 1
+DEFAULT_MAX_PENDING = 100
+
+
+def shadow_enabled():
+    return getattr(settings, 'SHADOW_SCORING_ENABLED', False)
+
+
+class ShadowExecutor:
+    """
+    Background thread pool with a bounded backlog: when candidates fall behind live traffic,
+    new jobs are dropped (and counted) instead of queueing without limit
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='shadow-scoring')
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = self.completed = self.dropped = self.failed = 0
+
+    def submit(self, job):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                logger.warning(f"Shadow scoring backlog full ({self.max_pending}): dropped transaction {job['transaction'].id}")
+                return False
+            self.pending += 1
+            self.submitted += 1
+        self._pool.submit(self._run, job)
+        return True
+
+    def _run(self, job):
+        # Worker threads hold their own connections; drop stale ones around each job
+        close_old_connections()
+        try:
+            score_in_shadow(job)
+            succeeded = True
+        except Exception as e:
+            succeeded = False
+            logger.error(f"Shadow scoring failed for transaction {job['transaction'].id}: {e}")
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.pending -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_shadow_executor():
+    """The process-wide executor, sized from settings on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ShadowExecutor(
+                    max_workers=getattr(settings, 'SHADOW_MAX_WORKERS', DEFAULT_MAX_WORKERS),
+                    max_pending=getattr(settings, 'SHADOW_MAX_PENDING', DEFAULT_MAX_PENDING)
+                )
+    return _executor
+
+
+def submit_shadow_scoring(scored_transaction, rule_score, triggers, requires_otp, ml_score, client_features,
+                          recent_transaction_count):
+    """
+    Queue a copy of a transaction the request path just scored, with the production inputs to the
+    decision and what it was scored on: the stored client features, Rule 2's recent count and the
+    scoring time, so candidates do not see transactions made after it. Costs the request two shallow
+    copies: the job is handed to the executor once the transaction commits, and is dropped if it rolls back.
+    """
+    if not shadow_enabled() or random.random() >= getattr(settings, 'SHADOW_SAMPLE_RATE', 1.0):
+        return
+    # Frozen now: the request goes on to complete the transaction and move the client's balance
+    snapshot = copy.copy(scored_transaction)
+    snapshot.client = copy.copy(scored_transaction.client)
+    job = {
+        'transaction': snapshot,
+        'rule_score': rule_score,
+        'triggers': list(triggers),
+        'requires_otp': requires_otp,
+        'ml_score': ml_score,
+        'client_features': client_features,
+        'recent_transaction_count': recent_transaction_count,
+        'scored_at': timezone.now(),
+    }
+    transaction.on_commit(lambda: get_shadow_executor().submit(job))
+
+
+def score_in_shadow(job):
+    """Score one queued transaction with every active candidate and record the comparisons"""
+    # Import here to avoid circular imports
+    from .engine import RiskEngine, decide
+    from .ml import FraudMLModel
+    from .models import ShadowCandidate, ShadowScore
+
+    snapshot, client_features = job['transaction'], job['client_features']
+    production_score, production_decision, _ = decide(job['rule_score'], job['triggers'], job['requires_otp'], job['ml_score'])
+
+    results = []
+    for candidate in ShadowCandidate.objects.filter(is_active=True).select_related('model_version'):
+        started = time.monotonic()
+        # Each half a candidate does not replace keeps the production value
+        rule_score, triggers, requires_otp = job['rule_score'], job['triggers'], job['requires_otp']
+        if candidate.thresholds:
+            # The production count only holds for the production window; another window is recounted as of scoring
+            recent_transaction_count = None if 'high_frequency_hours' in candidate.thresholds else job['recent_transaction_count']
+            rule_score, triggers, requires_otp, _ = RiskEngine(threshold_overrides=candidate.thresholds).calculate_risk_score(
+                snapshot, recent_transaction_count=recent_transaction_count, client_features=client_features,
+                as_of=job['scored_at']
+            )
+        ml_score = job['ml_score']
+        if candidate.model_version is not None:
+            ml_score = FraudMLModel(model_path=candidate.model_version.path).predict_batch(
+                [snapshot], has_verified_history=client_features.has_verified_history
+            )[0]
+        shadow_score, shadow_decision, _ = decide(rule_score, triggers, requires_otp, ml_score)
+
+        results.append(ShadowScore(
+            candidate=candidate,
+            transaction_id=snapshot.id,
+            production_score=production_score,
+            shadow_score=shadow_score,
+            production_ml_score=job['ml_score'],
+            shadow_ml_score=ml_score,
+            production_decision=production_decision,
+            shadow_decision=shadow_decision,
+            shadow_triggers=triggers,
+            shadow_ms=round((time.monotonic() - started) * 1000, 3),
+        ))
+        if shadow_decision != production_decision:
+            logger.info(f"Shadow candidate {candidate.name} disagrees on transaction {snapshot.id}: "
+                        f"{production_decision} ({production_score}) vs {shadow_decision} ({shadow_score})")
+
+    if results:
+        ShadowScore.objects.bulk_create(results)
+    return results
+
+
+def shadow_stats():
+    """Executor counters for monitoring, or None when shadow scoring is off"""
+    if not shadow_enabled():
+        return None
+    return get_shadow_executor().stats()
+
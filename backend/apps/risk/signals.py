@@ -1,2 +1,75 @@
-# This file is no longer needed as signals have been moved to the transactions app
-# The fraud detection signals are now in apps.transactions.signals
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SuspiciousLocation, ClientProfile
+from .location_index import invalidate_suspicious_location_index
+from .dashboard import bump_dashboard_counters
+from .feature_store import create_client_features, record_completions, invalidate_client_features
+from apps.transactions.models import Transaction, FraudAlert
+from apps.transactions.rollups import rollups_preserved
+
+# Fraud detection signals for transactions live in apps.transactions.signals
+
+@receiver(post_save, sender=SuspiciousLocation)
+@receiver(post_delete, sender=SuspiciousLocation)
+def rebuild_suspicious_location_index(sender, instance, **kwargs):
+    """Rebuild the in-memory suspicious location index whenever an admin edits it"""
+    invalidate_suspicious_location_index()
+
+# Dashboard deltas only cover creations and reviews; deletions (archival, admin cleanup)
+# are picked up when the snapshot expires and is rebuilt from the daily rollups
+
+@receiver(post_save, sender=ClientProfile)
+def count_new_client(sender, instance, created, **kwargs):
+    """Keep the cached dashboard snapshot current when a client is created"""
+    if created:
+        transaction.on_commit(lambda: bump_dashboard_counters(total_clients=1, last_month_clients=1))
+
+@receiver(post_save, sender=Transaction)
+def count_new_transaction(sender, instance, created, **kwargs):
+    """Keep the cached dashboard snapshot current when a transaction is created"""
+    if created:
+        transaction.on_commit(lambda: bump_dashboard_counters(
+            total_transactions=1, recent_transactions=1, last_month_transactions=1
+        ))
+
+@receiver(post_save, sender=FraudAlert)
+def count_fraud_alert(sender, instance, created, **kwargs):
+    """Keep the cached dashboard snapshot current when an alert is raised or reviewed"""
+    if created:
+        deltas = {
+            'recent_alerts': 1,
+            'pending_alerts': 1 if instance.status == 'Active' else 0,
+        }
+        level_counter = f'risk_{str(instance.level).lower()}'
+        deltas[level_counter] = 1
+    else:
+        previous_status = getattr(instance, '_loaded_status', None)
+        if previous_status is None or previous_status == instance.status:
+            return
+        deltas = {'pending_alerts': (instance.status == 'Active') - (previous_status == 'Active')}
+    
+    transaction.on_commit(lambda: bump_dashboard_counters(**deltas))
+
+@receiver(post_save, sender=ClientProfile)
+def start_client_features(sender, instance, created, **kwargs):
+    """New clients get an empty feature row instead of a rebuild on their first transaction"""
+    if created:
+        create_client_features(instance.id)
+
+@receiver(post_save, sender=Transaction)
+def update_client_features(sender, instance, created, update_fields=None, **kwargs):
+    """Fold completions into the client's stored features; a completion taken back forces a rebuild"""
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    previous_status = None if created else getattr(instance, '_loaded_status', None)
+    if instance.status == 'completed' and (created or previous_status not in (None, 'completed')):
+        record_completions([instance])
+    elif previous_status == 'completed' and instance.status != 'completed':
+        invalidate_client_features(instance.client_id)
+
+@receiver(post_delete, sender=Transaction)
+def forget_deleted_completion(sender, instance, **kwargs):
+    # Archived rows still count towards the client's history
+    if instance.status == 'completed' and not rollups_preserved():
+        invalidate_client_features(instance.client_id)
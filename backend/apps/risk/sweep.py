@@ -0,0 +1,84 @@
+"""
+Hyperparameter sweep for SafeNetAi
+Fits Isolation Forest candidates in parallel worker processes and scores them on held-out and analyst-labelled transactions
+"""
+
+import time
+import numpy as np
+
+# Kept free of Django imports: joblib's worker processes import this module to unpickle evaluate_candidate
+
+DEFAULT_GRID = {
+    'contamination': [0.01, 0.02, 0.05, 0.1],
+    'max_samples': ['auto', 512, 1024, 4096],
+    'n_estimators': [100, 200, 400],
+}
+
+
+def parameter_grid(grid=None):
+    """Every combination of the grid's values, as IsolationForest keyword arguments"""
+    from sklearn.model_selection import ParameterGrid
+    return list(ParameterGrid(grid or DEFAULT_GRID))
+
+
+def split_holdout(X, holdout):
+    """The oldest rows to train on and the newest `holdout` fraction to evaluate on (rows in id order)"""
+    cut = len(X) - int(len(X) * holdout)
+    return X[:cut], X[cut:]
+
+
+def evaluate_candidate(params, X_train, X_holdout, X_labelled, y_labelled, random_state=42):
+    """
+    Fit one candidate and score it. On the held-out rows, the share flagged should match the
+    contamination the candidate was fitted for (calibration_error is relative to it). On the
+    labelled rows (1 = alert rejected as fraud, 0 = approved), anomaly scores should rank fraud
+    first (roc_auc) and the flagged set should catch it (precision / recall).
+    """
+    from sklearn.ensemble import IsolationForest
+    from sklearn.metrics import roc_auc_score
+
+    started = time.monotonic()
+    # One core per candidate: the sweep already runs a candidate on every core
+    model = IsolationForest(random_state=random_state, n_jobs=1, **params).fit(X_train)
+    metrics = {'params': params, 'fit_seconds': round(time.monotonic() - started, 3)}
+
+    if len(X_holdout):
+        flag_rate = float(np.mean(model.predict(X_holdout) == -1))
+        metrics['holdout_flag_rate'] = round(flag_rate, 4)
+        metrics['calibration_error'] = round(abs(flag_rate - params['contamination']) / params['contamination'], 4)
+    else:
+        metrics['holdout_flag_rate'] = metrics['calibration_error'] = None
+
+    metrics['roc_auc'] = metrics['precision'] = metrics['recall'] = None
+    if len(X_labelled):
+        y_labelled = np.asarray(y_labelled)
+        flagged = model.predict(X_labelled) == -1
+        fraud = y_labelled == 1
+        if fraud.any() and not fraud.all():
+            # score_samples is higher for normal rows; negate so fraud should rank high
+            metrics['roc_auc'] = round(float(roc_auc_score(y_labelled, -model.score_samples(X_labelled))), 4)
+        if flagged.any():
+            metrics['precision'] = round(float(np.mean(fraud[flagged])), 4)
+        if fraud.any():
+            metrics['recall'] = round(float(np.mean(flagged[fraud])), 4)
+    return metrics
+
+
+def rank_key(metrics):
+    """Best first: labelled ROC AUC, then recall, then held-out calibration"""
+    return (
+        -(metrics['roc_auc'] if metrics['roc_auc'] is not None else 0),
+        -(metrics['recall'] if metrics['recall'] is not None else 0),
+        metrics['calibration_error'] if metrics['calibration_error'] is not None else float('inf'),
+    )
+
+
+def run_sweep(candidates, X_train, X_holdout, X_labelled, y_labelled, n_jobs=-1, verbose=0):
+    """Evaluate every candidate across n_jobs processes; returns their metrics, best first"""
+    from joblib import Parallel, delayed
+
+    results = Parallel(n_jobs=n_jobs, verbose=verbose)(
+        delayed(evaluate_candidate)(params, X_train, X_holdout, X_labelled, y_labelled)
+        for params in candidates
+    )
+    return sorted(results, key=rank_key)
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import TestCase
+from decimal import Decimal
+from apps.risk.dashboard import get_dashboard_stats, get_daily_trends, build_dashboard_stats, compute_dashboard_counters
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction, FraudAlert
+from apps.transactions.rollups import rebuild_rollups
+
+class DashboardSnapshotTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+        transactions = Transaction.objects.bulk_create([
+            Transaction(client=self.client_profile, amount=Decimal('100.00'), risk_score=score)
+            for score in (10, 45, 75, 90)
+        ])
+        FraudAlert.objects.bulk_create([
+            FraudAlert(transaction=transactions[1], level='Medium', risk_score=45),
+            FraudAlert(transaction=transactions[2], level='High', risk_score=75),
+            FraudAlert(transaction=transactions[3], level='CRITICAL', risk_score=90, status='Reviewed'),
+        ])
+        # bulk_create skips the rollup signals
+        rebuild_rollups()
+    
+    def _fresh_stats(self):
+        return build_dashboard_stats(compute_dashboard_counters())
+    
+    def test_cold_read_is_one_query_per_table(self):
+        """Test that a cold snapshot aggregates each table once and warm reads hit no table"""
+        with self.assertNumQueries(3):
+            stats = get_dashboard_stats()
+        with self.assertNumQueries(0):
+            get_dashboard_stats()
+        
+        self.assertEqual(stats['total_transactions'], 4)
+        self.assertEqual(stats['pending_alerts'], 2)
+        self.assertEqual(stats['risk_distribution'], {'low': 0, 'medium': 1, 'high': 1, 'critical': 1})
+    
+    def test_creation_bumps_cached_counters(self):
+        """Test that new clients, transactions and alerts are reflected without a rescan"""
+        get_dashboard_stats()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            client_profile = ClientProfile.objects.create(
+                first_name='Jane',
+                last_name='Roe',
+                national_id='987654321',
+                balance=Decimal('1000.00')
+            )
+            new_transaction = Transaction.objects.create(client=client_profile, amount=Decimal('50.00'))
+            FraudAlert.objects.create(transaction=new_transaction, level='High', risk_score=80)
+        
+        with self.assertNumQueries(0):
+            stats = get_dashboard_stats()
+        fresh = self._fresh_stats()
+        for key in ('total_clients', 'total_transactions', 'recent_transactions',
+                    'pending_alerts', 'recent_alerts', 'risk_distribution'):
+            self.assertEqual(stats[key], fresh[key], key)
+    
+    def test_review_decrements_pending_alerts(self):
+        """Test that resolving an active alert lowers the pending count"""
+        get_dashboard_stats()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            alert = FraudAlert.objects.get(level='High')
+            alert.status = 'Reviewed'
+            alert.save()
+            alert.save()
+        
+        self.assertEqual(get_dashboard_stats()['pending_alerts'], 1)
+    
+    def test_daily_trends_read_rollups(self):
+        """Test that trends come from the rollups: one query per rollup table"""
+        with self.assertNumQueries(2):
+            trends = get_daily_trends(30)
+        
+        self.assertEqual(len(trends), 1)
+        self.assertEqual(trends[0]['transactions'], 4)
+        self.assertEqual(trends[0]['by_level'], {'medium': 1, 'high': 1, 'critical': 1})
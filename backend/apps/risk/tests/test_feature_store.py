@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from apps.risk.engine import RiskEngine
+from apps.risk.feature_store import SCHEMA_VERSION, get_client_features, rebuild_client_features
+from apps.risk.models import ClientProfile, ClientFeatures
+from apps.transactions.models import Transaction
+
+class ClientFeatureStoreTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+
+    def _transaction(self, amount, status='completed'):
+        return Transaction.objects.create(
+            client=self.client_profile, amount=Decimal(amount), transaction_type='transfer', status=status
+        )
+
+    def _stored(self):
+        return ClientFeatures.objects.get(client=self.client_profile).features
+
+    def test_completions_are_folded_in_incrementally(self):
+        self.assertEqual(self._stored()['completed_count'], 0)
+        self._transaction('100.00')
+        self._transaction('300.00')
+        pending = self._transaction('500.00', status='pending')
+        self._transaction('900.00', status='failed')
+        self.assertEqual(self._stored()['completed_count'], 2)
+
+        pending.status = 'completed'
+        pending.save()
+        features = get_client_features(self.client_profile)
+        self.assertEqual(features.completed_count, 3)
+        self.assertEqual(features.amount_mean, Decimal('300.00'))
+        self.assertEqual(features.amount_std, Decimal('163.30'))
+        self.assertEqual(sum(features.history['hour_counts']), 3)
+        self.assertEqual(features.hour_share(pending.created_at.hour), 1.0)
+        self.assertTrue(features.has_verified_history)
+
+        # The same numbers as recomputing from the history
+        self.assertEqual(rebuild_client_features(self.client_profile.id).features, features.history)
+
+    def test_rebuilt_row_does_not_count_a_completion_twice(self):
+        ClientFeatures.objects.filter(client=self.client_profile).delete()
+        # Scoring the new row rebuilds the store with it included, before the completion is recorded
+        self._transaction('100.00')
+        self.assertEqual(self._stored()['completed_count'], 1)
+
+    def test_undone_completion_and_old_schema_are_rebuilt(self):
+        completed = self._transaction('100.00')
+        self._transaction('200.00')
+        completed.status = 'failed'
+        completed.save()
+        self.assertFalse(ClientFeatures.objects.filter(client=self.client_profile).exists())
+        self.assertEqual(get_client_features(self.client_profile).completed_count, 1)
+
+        ClientFeatures.objects.filter(client=self.client_profile).update(schema_version=SCHEMA_VERSION - 1, features={})
+        cache.clear()
+        self.assertEqual(get_client_features(self.client_profile).amount_mean, Decimal('200.00'))
+
+    def test_engine_reads_history_from_the_store(self):
+        self.client_profile.avg_amount = Decimal('100.00')
+        self.client_profile.std_amount = Decimal('10.00')
+        self.client_profile.save()
+        transaction = self._transaction('1000.00', status='pending')
+        # Without completions the profile's seeded baseline is used
+        self.assertTrue(any('Statistical outlier' in trigger for trigger in RiskEngine().calculate_risk_score(transaction)[1]))
+
+        for amount in ('900.00', '1100.00'):
+            self._transaction(amount)
+        features = get_client_features(self.client_profile)
+        self.assertEqual((features.amount_mean, features.amount_std), (Decimal('1000.00'), Decimal('100.00')))
+        self.assertFalse(any('Statistical outlier' in trigger for trigger in RiskEngine().calculate_risk_score(transaction)[1]))
+
+    def test_engine_judges_time_of_day_against_the_clients_hours(self):
+        night = timezone.now().replace(hour=2, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        for _ in range(10):
+            self._transaction('100.00')
+        Transaction.objects.update(created_at=night)
+        rebuild_client_features(self.client_profile.id)
+        self.assertEqual(get_client_features(self.client_profile).hour_share(2), 1.0)
+
+        def time_triggers(created_at):
+            transaction = self._transaction('100.00', status='pending')
+            Transaction.objects.filter(pk=transaction.pk).update(created_at=created_at)
+            transaction.refresh_from_db()
+            score, triggers, _, _ = RiskEngine().calculate_risk_score(transaction, recent_transaction_count=0)
+            return score, [trigger for trigger in triggers if 'Unusual time' in trigger]
+
+        # 2:00 is this client's usual hour; midday, which they never use, is the unusual one
+        usual_score, usual = time_triggers(night)
+        unusual_score, unusual = time_triggers(night.replace(hour=14))
+        self.assertEqual(usual, [])
+        self.assertEqual(unusual, ['Unusual time for this client: 14:00 (0% of their transactions)'])
+        self.assertEqual(unusual_score - usual_score, 10)
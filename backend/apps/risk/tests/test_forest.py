@@ -0,0 +1,49 @@
+import os
+import tempfile
+import joblib
+import numpy as np
+from django.test import TestCase
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from apps.risk.forest import CompiledForest, compiled_path, export_forest, file_digest, save_compiled
+from apps.risk.ml import FraudMLModel
+
+class CompiledForestTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(loc=50, scale=10, size=(600, 5))
+        self.scaler = StandardScaler().fit(self.X)
+        self.rows = rng.normal(loc=50, scale=25, size=(300, 5))
+
+    def test_matches_scikit_learn(self):
+        """Test that compiled scores equal decision_function, with and without feature subsampling"""
+        for max_features in (1.0, 0.6):
+            model = IsolationForest(n_estimators=30, max_features=max_features, random_state=1)
+            model.fit(self.scaler.transform(self.X))
+            forest = CompiledForest(export_forest(model, self.scaler))
+
+            expected = model.decision_function(self.scaler.transform(self.rows))
+            np.testing.assert_allclose(forest.decision_function(self.rows), expected, atol=1e-12)
+            np.testing.assert_allclose(forest.decision_function(self.rows[0]), expected[:1], atol=1e-12)
+
+    def test_ml_model_prefers_current_export(self):
+        model = IsolationForest(n_estimators=20, random_state=1).fit(self.scaler.transform(self.X))
+        with tempfile.TemporaryDirectory() as directory, self.settings(ML_MODEL_DIR=directory):
+            model_path = os.path.join(directory, 'fraud_isolation.joblib')
+            joblib.dump({'model': model, 'scaler': self.scaler}, model_path)
+            save_compiled(model, self.scaler, compiled_path(model_path), file_digest(model_path))
+
+            ml_model = FraudMLModel()
+            self.assertIsNotNone(ml_model.forest)
+            self.assertIsNone(ml_model.model)
+            np.testing.assert_allclose(
+                ml_model.decision_scores(self.rows),
+                model.decision_function(self.scaler.transform(self.rows)),
+                atol=1e-12
+            )
+
+            # A model file replaced without re-exporting is loaded as is
+            joblib.dump({'model': model, 'scaler': None}, model_path)
+            ml_model = FraudMLModel()
+            self.assertIsNone(ml_model.forest)
+            self.assertIsNotNone(ml_model.model)
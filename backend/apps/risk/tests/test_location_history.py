@@ -0,0 +1,102 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from apps.risk.models import ClientProfile
+from apps.risk.engine import RiskEngine
+from apps.risk.location_history import (
+    get_recent_locations, record_recent_location, detect_impossible_travel
+)
+from apps.transactions.models import Transaction
+
+ALGIERS = (36.7538, 3.0588)
+ORAN = (35.6971, -0.6308)
+PARIS = (48.8566, 2.3522)
+
+class RecentLocationBufferTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+    
+    def test_buffer_keeps_last_k_points_newest_first(self):
+        """Test that the ring buffer is capped and ordered newest first"""
+        now = timezone.now()
+        with self.settings(RECENT_LOCATION_BUFFER_SIZE=3):
+            for minutes in range(5):
+                record_recent_location(self.client_profile.id, 36.0 + minutes, 3.0, now + timedelta(minutes=minutes))
+            points = get_recent_locations(self.client_profile.id)
+        
+        self.assertEqual([point[0] for point in points], [40.0, 39.0, 38.0])
+    
+    def test_database_fallback_on_cache_miss(self):
+        """Test that a cold buffer is rebuilt from located transactions, then served from cache"""
+        Transaction.objects.create(
+            client=self.client_profile,
+            amount=Decimal('100.00'),
+            current_lat=Decimal(str(ALGIERS[0])),
+            current_lng=Decimal(str(ALGIERS[1]))
+        )
+        cache.clear()
+        
+        with self.assertNumQueries(1):
+            points = get_recent_locations(self.client_profile.id)
+        self.assertEqual(len(points), 1)
+        
+        with self.assertNumQueries(0):
+            get_recent_locations(self.client_profile.id)
+    
+    def test_detector_flags_only_impossible_speeds(self):
+        """Test the speed-based detector against buffered points"""
+        now = timezone.now()
+        points = [(ALGIERS[0], ALGIERS[1], (now - timedelta(minutes=30)).timestamp())]
+        
+        travel = detect_impossible_travel(points, PARIS[0], PARIS[1], now, max_speed_kmh=900, min_distance_km=100)
+        self.assertIsNotNone(travel)
+        self.assertGreater(travel['speed_kmh'], 900)
+        
+        # Algiers -> Oran (~350km) in 5 hours is a plausible drive
+        points = [(ALGIERS[0], ALGIERS[1], (now - timedelta(hours=5)).timestamp())]
+        self.assertIsNone(detect_impossible_travel(points, ORAN[0], ORAN[1], now, max_speed_kmh=900, min_distance_km=100))
+    
+    def test_detector_flags_travel_on_the_equator_and_prime_meridian(self):
+        """Test that zero coordinates are real positions, not missing ones"""
+        now = timezone.now()
+        earlier = (now - timedelta(minutes=10)).timestamp()
+        
+        travel = detect_impossible_travel([(0.0, 10.0, earlier)], 0.0, 100.0, now, max_speed_kmh=900, min_distance_km=100)
+        self.assertIsNotNone(travel)
+        self.assertAlmostEqual(travel['distance_km'], 10007.5, delta=1)
+        self.assertIsNotNone(detect_impossible_travel([(10.0, 0.0, earlier)], 50.0, 0.0, now, max_speed_kmh=900, min_distance_km=100))
+
+class ImpossibleTravelRuleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+    
+    def test_rule_triggers_from_buffer_without_queries(self):
+        """Test that RiskEngine raises an impossible travel trigger using only the cached buffer"""
+        record_recent_location(self.client_profile.id, ALGIERS[0], ALGIERS[1], timezone.now() - timedelta(minutes=20))
+        transaction = Transaction.objects.create(
+            client=self.client_profile,
+            amount=Decimal('100.00'),
+            current_lat=Decimal(str(PARIS[0])),
+            current_lng=Decimal(str(PARIS[1]))
+        )
+        
+        with self.assertNumQueries(0):
+            points = get_recent_locations(self.client_profile.id, exclude_transaction_id=transaction.id)
+        self.assertEqual(len(points), 1)
+        
+        risk_score, triggers, requires_otp, decision = RiskEngine().calculate_risk_score(transaction)
+        self.assertTrue(any(trigger.startswith('Impossible travel') for trigger in triggers))
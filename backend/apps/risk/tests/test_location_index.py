@@ -0,0 +1,97 @@
+from django.test import TestCase
+from django.core.cache import cache
+from decimal import Decimal
+from apps.risk.models import SuspiciousLocation
+from apps.risk.location_index import (
+    SuspiciousLocationIndex, get_suspicious_location_index, invalidate_suspicious_location_index
+)
+
+class SuspiciousLocationIndexTestCase(TestCase):
+    def test_point_match_within_radius(self):
+        """Test that a point matches only within its radius"""
+        index = SuspiciousLocationIndex([
+            {'id': 1, 'name': 'Times Square', 'category': 'fake_location',
+             'lat': 40.7589, 'lng': -73.9851, 'radius_km': 0.1},
+        ])
+        
+        self.assertEqual(len(index.lookup(40.7589, -73.9851)), 1)
+        self.assertEqual(len(index.lookup(40.7594, -73.9851)), 1)
+        self.assertEqual(index.lookup(40.7689, -73.9851), [])
+    
+    def test_null_island_matches(self):
+        """Test that zero coordinates are matched despite haversine treating them as missing"""
+        index = SuspiciousLocationIndex([
+            {'id': 1, 'name': 'Null Island', 'category': 'null_island',
+             'lat': 0.0, 'lng': 0.0, 'radius_km': 0.1},
+        ])
+        
+        self.assertEqual(len(index.lookup(0.0, 0.0)), 1)
+    
+    def test_zero_coordinates_are_not_treated_as_missing(self):
+        """Test that points on the equator or prime meridian are only matched within the radius"""
+        index = SuspiciousLocationIndex([
+            {'id': 1, 'name': 'Kampala', 'category': 'fraud_hotspot',
+             'lat': 0.3, 'lng': 30.0, 'radius_km': 5},
+            {'id': 2, 'name': 'Equator', 'category': 'other',
+             'lat': 0.0, 'lng': 30.2, 'radius_km': 5},
+        ], cell_deg=1.0)
+        
+        # Same cell as both entries, ~33 km and ~22 km away
+        self.assertEqual(index.lookup(0.0, 30.0), [])
+        self.assertEqual([entry['id'] for entry in index.lookup(0.0, 30.21)], [2])
+    
+    def test_region_spanning_cells_and_antimeridian(self):
+        """Test that regions are found from every cell they cover, including across longitude 180"""
+        index = SuspiciousLocationIndex([
+            {'id': 1, 'name': 'Hotspot', 'category': 'fraud_hotspot',
+             'lat': 36.75, 'lng': 3.05, 'radius_km': 30},
+            {'id': 2, 'name': 'Fiji', 'category': 'other',
+             'lat': -17.0, 'lng': 179.95, 'radius_km': 20},
+        ], cell_deg=0.1)
+        
+        self.assertEqual(len(index.lookup(36.95, 3.05)), 1)
+        self.assertEqual(len(index.lookup(36.75, 3.35)), 1)
+        self.assertEqual(index.lookup(37.10, 3.05), [])
+        self.assertEqual(len(index.lookup(-17.0, -179.95)), 1)
+    
+    def test_wide_regions(self):
+        """Test that very large regions are still matched"""
+        index = SuspiciousLocationIndex([
+            {'id': 1, 'name': 'Continent', 'category': 'other',
+             'lat': 10.0, 'lng': 20.0, 'radius_km': 2000},
+        ], cell_deg=0.1)
+        
+        self.assertEqual(len(index.wide_entries), 1)
+        self.assertEqual(len(index.lookup(15.0, 25.0)), 1)
+        self.assertEqual(index.lookup(-40.0, 20.0), [])
+
+class SuspiciousLocationIndexRebuildTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_suspicious_location_index()
+    
+    def test_seeded_locations_loaded(self):
+        """Test that the migrated default coordinates are indexed"""
+        index = get_suspicious_location_index()
+        names = [match['name'] for match in index.lookup(48.8566, 2.3522)]
+        self.assertEqual(names, ['Paris center'])
+    
+    def test_index_rebuilt_on_admin_edit(self):
+        """Test that saving or deleting a location rebuilds the index"""
+        self.assertEqual(get_suspicious_location_index().lookup(36.7538, 3.0588), [])
+        
+        location = SuspiciousLocation.objects.create(
+            name='Algiers hotspot',
+            category='fraud_hotspot',
+            lat=Decimal('36.7538'),
+            lng=Decimal('3.0588'),
+            radius_km=5
+        )
+        self.assertEqual(len(get_suspicious_location_index().lookup(36.7538, 3.0588)), 1)
+        
+        location.enabled = False
+        location.save()
+        self.assertEqual(get_suspicious_location_index().lookup(36.7538, 3.0588), [])
+        
+        location.delete()
+        self.assertEqual(get_suspicious_location_index().lookup(36.7538, 3.0588), [])
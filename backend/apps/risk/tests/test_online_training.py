@@ -0,0 +1,97 @@
+import os
+import tempfile
+import numpy as np
+from unittest import mock
+from django.test import TestCase
+from decimal import Decimal
+from apps.risk.ml import FraudMLModel
+from apps.transactions.archive import stream_transactions
+from apps.risk.models import ClientProfile
+from apps.risk.reservoir import FeatureReservoir
+from apps.transactions.models import Transaction
+
+class FeatureReservoirTestCase(TestCase):
+    def test_capacity_and_recency(self):
+        """Test that the sample stays bounded and is mostly made of recent rows"""
+        reservoir = FeatureReservoir(capacity=100, n_features=2, seed=1)
+        reservoir.add(np.zeros((100, 2)), last_id=100)
+        reservoir.add(np.ones((300, 2)), last_id=400)
+
+        self.assertEqual(len(reservoir), 100)
+        self.assertEqual(reservoir.seen, 400)
+        self.assertEqual(reservoir.last_id, 400)
+        # Each old row survives 300 replacements with probability 0.99^300, about 5%
+        self.assertGreater(reservoir.rows[:, 0].sum(), 85)
+
+    def test_checkpoint_round_trip(self):
+        reservoir = FeatureReservoir(capacity=10, n_features=3, seed=1)
+        reservoir.add(np.arange(15 * 3).reshape(15, 3), last_id=15)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reservoir.joblib')
+            reservoir.save(path)
+            restored = FeatureReservoir.load(path)
+
+        np.testing.assert_array_equal(restored.rows, reservoir.rows)
+        self.assertEqual((restored.seen, restored.last_id), (15, 15))
+        # The random stream carries on where it stopped
+        self.assertEqual(restored.rng.integers(0, 1000), reservoir.rng.integers(0, 1000))
+
+class IncrementalTrainingTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', national_id='123456789', balance=Decimal('50000.00')
+        )
+        self._create(12)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _create(self, count):
+        Transaction.objects.bulk_create([
+            Transaction(client=self.client_profile, amount=Decimal(100 + index), transaction_type='transfer')
+            for index in range(count)
+        ])
+
+    def _model(self):
+        with self.settings(ML_MODEL_DIR=self.directory.name):
+            return FraudMLModel()
+
+    def test_only_new_transactions_are_featurized(self):
+        self.assertTrue(self._model().train_incremental())
+        reservoir = self._model().load_reservoir()
+        self.assertEqual(reservoir.seen, 12)
+        self.assertEqual(reservoir.last_id, Transaction.objects.latest('pk').pk)
+
+        self._create(3)
+        ml_model = self._model()
+        self.assertTrue(ml_model.available)
+        self.assertTrue(ml_model.train_incremental())
+        reservoir = ml_model.load_reservoir()
+        self.assertEqual(reservoir.seen, 15)
+        self.assertEqual(len(reservoir), 15)
+        self.assertEqual(reservoir.last_id, Transaction.objects.latest('pk').pk)
+
+    def test_full_training_seeds_the_reservoir(self):
+        ml_model = self._model()
+        self.assertTrue(ml_model.train())
+        self.assertEqual(ml_model.load_reservoir().seen, 12)
+        self.assertIsNotNone(self._model().forest)
+
+    def test_rows_committed_during_full_training_are_left_for_the_next_run(self):
+        def stream_with_a_concurrent_insert(**filters):
+            for index, transaction in enumerate(stream_transactions(**filters)):
+                if index == 0:
+                    self._create(1)
+                yield transaction
+
+        ml_model = self._model()
+        with mock.patch('apps.risk.ml.stream_transactions', side_effect=stream_with_a_concurrent_insert):
+            self.assertTrue(ml_model.train())
+        reservoir = ml_model.load_reservoir()
+        self.assertEqual(reservoir.seen, 12)
+        self.assertLess(reservoir.last_id, Transaction.objects.latest('pk').pk)
+
+        ml_model = self._model()
+        self.assertTrue(ml_model.train_incremental())
+        self.assertEqual(ml_model.load_reservoir().seen, 13)
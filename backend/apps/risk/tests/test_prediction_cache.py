@@ -0,0 +1,94 @@
+import os
+import tempfile
+import joblib
+import numpy as np
+from unittest import mock
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from sklearn.ensemble import IsolationForest
+from apps.risk.ml import FraudMLModel
+from apps.risk.models import ClientProfile
+from apps.risk.prediction_cache import PredictionCache, get_prediction_cache, reset_prediction_cache
+from apps.transactions.models import Transaction
+from apps.users.models import User
+
+class PredictionCacheTestCase(APITestCase):
+    def test_lru_and_ttl(self):
+        cache = PredictionCache(max_size=2, ttl=60)
+        cache.set('a', 0.1)
+        cache.set('b', 0.2)
+        self.assertEqual(cache.get('a'), 0.1)
+        # 'b' is now the least recently used
+        cache.set('c', 0.3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 0.3)
+
+        expiring = PredictionCache(max_size=2, ttl=0)
+        expiring.set('a', 0.1)
+        self.assertIsNone(expiring.get('a'))
+        self.assertEqual(
+            {key: cache.stats()[key] for key in ('hits', 'misses', 'evictions', 'hit_rate')},
+            {'hits': 2, 'misses': 1, 'evictions': 1, 'hit_rate': 0.6667}
+        )
+        self.assertEqual(expiring.stats()['expirations'], 1)
+
+class CachedPredictionTestCase(APITestCase):
+    def setUp(self):
+        reset_prediction_cache()
+        self.addCleanup(reset_prediction_cache)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = self.settings(ML_MODEL_DIR=self.directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self._save_model(random_state=1)
+
+        self.user = User.objects.create_user(
+            email='client@example.com', first_name='John', last_name='Doe', password='ClientPass123!'
+        )
+        self.profile = ClientProfile.objects.create(
+            user=self.user, first_name='John', last_name='Doe', national_id='123456789',
+            balance=Decimal('50000.00'), home_lat=Decimal('36.7538'), home_lng=Decimal('3.0588')
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def _save_model(self, random_state):
+        X = np.random.default_rng(random_state).normal(size=(200, 9))
+        model = IsolationForest(n_estimators=10, random_state=random_state).fit(X)
+        joblib.dump({'model': model, 'scaler': None}, os.path.join(self.directory.name, 'fraud_isolation.joblib'))
+
+    def _predict(self, amount, lat='36.7538'):
+        return self.client.post('/api/ai/predict/', {
+            'amount': amount, 'transaction_type': 'transfer', 'current_lat': lat, 'current_lng': '3.0588'
+        }, format='json')
+
+    def test_repeated_what_if_skips_extraction(self):
+        with mock.patch.object(FraudMLModel, 'prepare_features', autospec=True,
+                               side_effect=lambda model, transaction: np.zeros((1, 9))) as prepare:
+            first = self._predict('1000.20')
+            self.assertEqual(first.status_code, 200)
+            # Within the amount step and ~100 m of the first request
+            second = self._predict('1000.40', lat='36.7539')
+            self.assertEqual(prepare.call_count, 1)
+            self.assertEqual(second.data['anomaly_score'], first.data['anomaly_score'])
+
+            self._predict('2500.00')
+            self.assertEqual(prepare.call_count, 2)
+
+            # The create path shares the entries
+            transaction = Transaction(
+                client=self.profile, amount=Decimal('1000.00'), current_lat=Decimal('36.7538'),
+                current_lng=Decimal('3.0588'), created_at=timezone.now()
+            )
+            FraudMLModel().predict(transaction)
+            self.assertEqual(prepare.call_count, 2)
+
+            # A new model file is a new version
+            self._save_model(random_state=2)
+            self._predict('1000.20')
+            self.assertEqual(prepare.call_count, 3)
+
+        self.assertEqual(get_prediction_cache().stats()['hits'], 2)
@@ -0,0 +1,151 @@
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+import joblib
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from sklearn.ensemble import IsolationForest
+from apps.risk.engine import RiskEngine, decide
+from apps.risk.feature_store import get_client_features
+from apps.risk.location_history import clear_recent_locations, get_recent_locations, record_recent_location
+from apps.risk.models import ClientProfile, ModelVersion, ShadowCandidate, ShadowScore
+from apps.risk.shadow import ShadowExecutor, score_in_shadow, submit_shadow_scoring
+from apps.transactions.models import Transaction
+
+class ShadowScoringTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _model_version(self):
+        path = os.path.join(self.directory.name, 'candidate.joblib')
+        X = np.random.default_rng(0).normal(size=(200, 9))
+        joblib.dump({'model': IsolationForest(n_estimators=10, random_state=0).fit(X), 'scaler': None}, path)
+        return ModelVersion.objects.create(path=path)
+
+    def _scored_transaction(self):
+        transaction = Transaction.objects.create(
+            client=self.client_profile, amount=Decimal('500.00'), transaction_type='transfer'
+        )
+        # Midday, clear of the unusual-hours rule
+        Transaction.objects.filter(pk=transaction.pk).update(created_at=timezone.now().replace(hour=12))
+        transaction.refresh_from_db()
+        return transaction, self._production_inputs(transaction)
+
+    def _production_inputs(self, transaction):
+        # As the create view scores it
+        engine = RiskEngine()
+        client_features = get_client_features(self.client_profile)
+        recent_transaction_count = engine.count_recent_transactions(self.client_profile)
+        rule_score, triggers, requires_otp, _ = engine.calculate_risk_score(
+            transaction, recent_transaction_count=recent_transaction_count, client_features=client_features
+        )
+        return rule_score, triggers, requires_otp, 0.2, client_features, recent_transaction_count
+
+    def _job(self, transaction, production):
+        with self.settings(SHADOW_SCORING_ENABLED=True), mock.patch('apps.risk.shadow.get_shadow_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                submit_shadow_scoring(transaction, *production)
+            return executor.return_value.submit.call_args[0][0]
+
+    def test_candidates_score_a_copy_after_commit(self):
+        ShadowCandidate.objects.create(name='strict', thresholds={'large_withdrawal': 100})
+        ShadowCandidate.objects.create(name='candidate-model', model_version=self._model_version())
+        transaction, production = self._scored_transaction()
+        self.assertEqual(decide(*production[:4]), (8, 'approve', []))
+
+        with self.settings(SHADOW_SCORING_ENABLED=True), mock.patch('apps.risk.shadow.get_shadow_executor') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                submit_shadow_scoring(transaction, *production)
+                # Nothing runs on the request path before the transaction commits
+                executor.return_value.submit.assert_not_called()
+                transaction.amount = Decimal('1.00')
+            job = executor.return_value.submit.call_args[0][0]
+
+        results = {score.candidate.name: score for score in score_in_shadow(job)}
+        self.assertEqual(ShadowScore.objects.count(), 2)
+        strict = results['strict']
+        self.assertEqual((strict.production_decision, strict.shadow_decision), ('approve', 'otp'))
+        self.assertEqual(strict.shadow_score, 38)
+        self.assertTrue(any('Large' in trigger for trigger in strict.shadow_triggers))
+        # Rules unchanged, only the ML score comes from the registered version
+        model = results['candidate-model']
+        self.assertEqual(model.production_ml_score, 0.2)
+        self.assertNotEqual(model.shadow_ml_score, 0.2)
+        self.assertEqual(model.shadow_triggers, production[1])
+
+    def test_candidate_with_production_thresholds_agrees(self):
+        """Later transactions, and locations pushed out of the buffer since, do not reach the shadow score"""
+        ShadowCandidate.objects.create(name='production', thresholds={'large_withdrawal': 10000, 'high_frequency_count': 5})
+        earlier = Transaction.objects.create(
+            client=self.client_profile, amount=Decimal('100.00'), transaction_type='transfer',
+            current_lat=Decimal('36.753800'), current_lng=Decimal('3.058800')
+        )
+        transaction = Transaction.objects.create(
+            client=self.client_profile, amount=Decimal('100.00'), transaction_type='transfer',
+            current_lat=Decimal('48.856600'), current_lng=Decimal('2.352200')
+        )
+        Transaction.objects.filter(pk=earlier.pk).update(created_at=timezone.now() - timedelta(minutes=40))
+        Transaction.objects.filter(pk=transaction.pk).update(created_at=timezone.now() - timedelta(minutes=30))
+        earlier.refresh_from_db()
+        transaction.refresh_from_db()
+        clear_recent_locations(self.client_profile.id)
+        record_recent_location(self.client_profile.id, earlier.current_lat, earlier.current_lng, earlier.created_at)
+
+        production = self._production_inputs(transaction)
+        self.assertTrue(any('Impossible travel' in trigger for trigger in production[1]))
+        job = self._job(transaction, production)
+
+        # After scoring: enough transactions to trip Rule 2 on a recount, and to evict the earlier location
+        for _ in range(6):
+            later = Transaction.objects.create(
+                client=self.client_profile, amount=Decimal('100.00'), transaction_type='transfer',
+                current_lat=Decimal('48.856600'), current_lng=Decimal('2.352200')
+            )
+            record_recent_location(self.client_profile.id, later.current_lat, later.current_lng, later.created_at)
+        self.assertTrue(all(point[2] > job['scored_at'].timestamp() for point in get_recent_locations(self.client_profile.id)))
+
+        score = score_in_shadow(job)[0]
+        self.assertEqual(score.shadow_triggers, production[1])
+        self.assertEqual((score.shadow_score, score.shadow_decision), (score.production_score, score.production_decision))
+
+        out = StringIO()
+        call_command('shadow_report', stdout=out)
+        self.assertIn('Decision agreement: 100.0%', out.getvalue())
+
+    def test_full_backlog_drops_jobs(self):
+        executor = ShadowExecutor(max_workers=1, max_pending=0)
+        transaction, _ = self._scored_transaction()
+        self.assertFalse(executor.submit({'transaction': transaction}))
+        self.assertEqual(executor.stats()['dropped'], 1)
+
+    def test_report(self):
+        candidate = ShadowCandidate.objects.create(name='strict', thresholds={'large_withdrawal': 100})
+        for production_decision, shadow_decision, shadow_score in (('approve', 'approve', 10), ('approve', 'otp', 40)):
+            ShadowScore.objects.create(
+                candidate=candidate, transaction_id=1, production_score=10, shadow_score=shadow_score,
+                production_ml_score=0.2, shadow_ml_score=0.2, production_decision=production_decision,
+                shadow_decision=shadow_decision, shadow_ms=2.0
+            )
+        ShadowScore.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+        out = StringIO()
+        call_command('shadow_report', stdout=out)
+        report = out.getvalue()
+        self.assertIn('strict', report)
+        self.assertIn('Decision agreement: 50.0% (OTP agreement 50.0%)', report)
+        self.assertIn('approve -> otp: 1', report)
+        self.assertIn('mean +15.00', report)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+from decimal import Decimal
+from apps.risk.models import ClientProfile, ModelVersion
+from apps.risk.registry import DEFAULT_PARAMS, training_params
+from apps.risk.sweep import evaluate_candidate, rank_key
+from apps.transactions.models import Transaction, FraudAlert
+
+class SweepEvaluationTestCase(TestCase):
+    def test_labelled_outliers_rank_first(self):
+        rng = np.random.default_rng(0)
+        X_train = rng.normal(size=(500, 3))
+        X_labelled = np.vstack([rng.normal(size=(20, 3)), rng.normal(loc=8, size=(5, 3))])
+        y_labelled = [0] * 20 + [1] * 5
+
+        metrics = evaluate_candidate(
+            {'contamination': 0.05, 'max_samples': 'auto', 'n_estimators': 50},
+            X_train, rng.normal(size=(100, 3)), X_labelled, y_labelled
+        )
+        self.assertGreater(metrics['roc_auc'], 0.95)
+        self.assertEqual(metrics['recall'], 1.0)
+        self.assertLess(metrics['calibration_error'], 1)
+
+    def test_unlabelled_candidates_rank_by_calibration(self):
+        worse = {'roc_auc': None, 'recall': None, 'calibration_error': 0.5}
+        better = {'roc_auc': None, 'recall': None, 'calibration_error': 0.1}
+        labelled = {'roc_auc': 0.7, 'recall': 0.5, 'calibration_error': 0.9}
+        self.assertEqual(sorted([worse, better, labelled], key=rank_key), [labelled, better, worse])
+
+class SweepCommandTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        client = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', national_id='123456789', balance=Decimal('50000.00')
+        )
+        transactions = Transaction.objects.bulk_create([
+            Transaction(client=client, amount=Decimal(100 + index * 10), transaction_type='transfer', status='completed')
+            for index in range(30)
+        ] + [
+            Transaction(client=client, amount=Decimal('900000.00'), transaction_type='transfer', status='failed')
+            for _ in range(2)
+        ])
+        FraudAlert.objects.bulk_create([
+            FraudAlert(transaction=transaction, level='HIGH', risk_score=80, status='Reviewed')
+            for transaction in transactions[-4:]
+        ])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_registers_and_activates_best_candidate(self):
+        self.assertEqual(training_params(), DEFAULT_PARAMS)
+        out = StringIO()
+        with self.settings(ML_MODEL_DIR=self.directory.name):
+            call_command(
+                'sweep_fraud_model', '--contamination', '0.05,0.1', '--max-samples', 'auto',
+                '--n-estimators', '20', '--n-jobs', '1', '--activate', stdout=out
+            )
+
+        version = ModelVersion.objects.get()
+        self.assertTrue(version.is_active)
+        self.assertEqual(version.training_rows, 32)
+        self.assertIn(version.params['contamination'], (0.05, 0.1))
+        self.assertEqual(training_params(), version.params)
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, 'fraud_isolation.joblib')))
+        self.assertIn('23 training, 5 held-out and 4 labelled', out.getvalue())
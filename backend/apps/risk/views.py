@@ -1,3 +1,5 @@
+from decimal import Decimal
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -15,19 +17,20 @@ def predict_fraud(request):
         # Create a mock transaction object for prediction
         # In a real implementation, you'd get the actual transaction
         from apps.transactions.models import Transaction
-        from apps.risk.models import ClientProfile
         
         # This is a simplified version - in practice you'd validate the data
         # and create a proper transaction object
-        client_profile = ClientProfile.objects.get(user=request.user)
+        client_profile = request.client_profile.get()
         
-        # Create a temporary transaction for prediction
+        # Create a temporary transaction for prediction, timed now as create would be
+        # (location_lat / location_lng are accepted as older names for current_lat / current_lng)
         transaction = Transaction(
             client=client_profile,
-            amount=transaction_data.get('amount', 0),
+            amount=Decimal(str(transaction_data.get('amount', 0))),
             transaction_type=transaction_data.get('transaction_type', 'transfer'),
-            location_lat=transaction_data.get('location_lat'),
-            location_lng=transaction_data.get('location_lng'),
+            current_lat=transaction_data.get('current_lat', transaction_data.get('location_lat')),
+            current_lng=transaction_data.get('current_lng', transaction_data.get('location_lng')),
+            created_at=timezone.now(),
         )
         
         # Get ML prediction
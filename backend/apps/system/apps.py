@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class SystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.system'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from .sqlite import apply_sqlite_pragmas
+
+        if getattr(settings, 'SQLITE_TUNING', False):
+            connection_created.connect(apply_sqlite_pragmas, dispatch_uid='apps.system.sqlite_pragmas')
@@ -0,0 +1,151 @@
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.risk.models import ClientProfile
+from apps.users.models import User
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+import os
+import random
+import statistics
+import tempfile
+import time
+
+BENCH_PREFIX = 'BENCH'
+
+class Command(BaseCommand):
+    help = ('Benchmark API request latency with a fresh database connection per request and with persistent connections, '
+            'in a throwaway test database (the configured one is never touched)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Timed requests per connection mode (default: 200)'
+        )
+        parser.add_argument(
+            '--path',
+            default='/api/client/transactions/',
+            help='Authenticated GET endpoint to request (default: /api/client/transactions/)'
+        )
+        parser.add_argument(
+            '--conn-max-age',
+            type=int,
+            default=600,
+            help='CONN_MAX_AGE used for the persistent run (default: 600)'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+
+        connection = connections['default']
+        if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            self.stdout.write(self.style.WARNING(
+                'A connection pool is configured: both runs reuse pooled connections, so expect similar numbers'
+            ))
+
+        # The benchmark account (and the signals it fires) must never reach a live database.
+        # SQLite test databases default to in-memory ones, whose connections are never closed,
+        # so it gets a temporary file instead and fresh connections really reopen it.
+        verbosity = options['verbosity']
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite' and not connection.settings_dict['TEST'].get('NAME'):
+                connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+            old_config = setup_databases(verbosity, interactive=False, aliases={'default'})
+            self.stdout.write(f'Benchmarking in test database {connection.settings_dict["NAME"]}')
+            try:
+                self.benchmark(options)
+            finally:
+                teardown_databases(old_config, verbosity)
+
+    def benchmark(self, options):
+        connection = connections['default']
+        user = self._create_user()
+        self.handler = WSGIHandler()
+        self.token = str(RefreshToken.for_user(user).access_token)
+        original = (connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+        try:
+            self.stdout.write(self.style.WARNING(f'\nFRESH: CONN_MAX_AGE=0 ({connection.vendor})'))
+            fresh = self._run(options['path'], options['requests'], conn_max_age=0, health_checks=False)
+
+            self.stdout.write(self.style.WARNING(
+                f'\nPERSISTENT: CONN_MAX_AGE={options["conn_max_age"]}, CONN_HEALTH_CHECKS=True'
+            ))
+            persistent = self._run(options['path'], options['requests'],
+                                   conn_max_age=options['conn_max_age'], health_checks=True)
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'], connection.settings_dict['CONN_HEALTH_CHECKS'] = original
+
+        self._report(fresh, persistent)
+
+    def _create_user(self):
+        run_id = random.randint(100000, 999999)
+        user = User.objects.create_user(
+            email=f'{BENCH_PREFIX.lower()}-{run_id}@safenetai.local',
+            first_name='Bench',
+            last_name='User',
+            password=None
+        )
+        ClientProfile.objects.create(
+            user=user,
+            first_name='Bench',
+            last_name='User',
+            national_id=f'{BENCH_PREFIX}{run_id}'
+        )
+        return user
+
+    def _request(self, path):
+        """Run one request through the full WSGI stack, including the request_finished connection cleanup"""
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+            'wsgi.input': BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = self.handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return statuses[0]
+
+    def _run(self, path, count, conn_max_age, health_checks):
+        connection = connections['default']
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+
+        status = self._request(path)
+        if not status.startswith('200'):
+            raise CommandError(f'GET {path} returned {status}')
+
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            self._request(path)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        results = {
+            'p50_ms': statistics.median(timings),
+            'p95_ms': timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0],
+            'mean_ms': statistics.mean(timings),
+        }
+        self.stdout.write(f'p50 {results["p50_ms"]:.3f}ms, p95 {results["p95_ms"]:.3f}ms, mean {results["mean_ms"]:.3f}ms')
+        return results
+
+    def _report(self, fresh, persistent):
+        self.stdout.write(self.style.SUCCESS('\nSummary (request latency)'))
+        self.stdout.write(f'{"metric":<10}{"fresh":>12}{"persistent":>14}{"saved":>12}')
+        for metric in ('p50_ms', 'p95_ms', 'mean_ms'):
+            saved = fresh[metric] - persistent[metric]
+            self.stdout.write(f'{metric[:-3]:<10}{fresh[metric]:>10.3f}ms{persistent[metric]:>12.3f}ms{saved:>10.3f}ms')
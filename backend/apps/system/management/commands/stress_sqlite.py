@@ -0,0 +1,154 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import F
+from apps.risk.models import ClientProfile
+from apps.system.sqlite import is_database_locked, retry_on_locked
+from apps.transactions.models import Transaction
+from decimal import Decimal
+import random
+import statistics
+import threading
+import time
+
+BENCH_PREFIX = 'BENCH'
+
+class Command(BaseCommand):
+    help = 'Stress concurrent SQLite writers and readers; run with SQLITE_TUNING off and on to compare'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=8,
+            help='Concurrent writer threads (default: 8)'
+        )
+        parser.add_argument(
+            '--writes',
+            type=int,
+            default=25,
+            help='Transactions created per writer (default: 25)'
+        )
+        parser.add_argument(
+            '--readers',
+            type=int,
+            default=2,
+            help='Concurrent reader threads running listing queries meanwhile (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'The default database is {connection.vendor}, not SQLite')
+        if options['writers'] < 1 or options['writes'] < 1:
+            raise CommandError('--writers and --writes must be at least 1')
+
+        with connection.cursor() as cursor:
+            journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        tuning = getattr(settings, 'SQLITE_TUNING', False)
+        self.stdout.write(self.style.SUCCESS(
+            f'SQLITE_TUNING={tuning}, journal_mode={journal_mode}: '
+            f'{options["writers"]} writers x {options["writes"]} writes, {options["readers"]} readers'
+        ))
+
+        run_id = random.randint(100000, 999999)
+        clients = ClientProfile.objects.bulk_create([
+            ClientProfile(
+                first_name='Bench',
+                last_name=f'Writer {index}',
+                national_id=f'{BENCH_PREFIX}{run_id}{index:03d}',
+                bank_account_number=f'{BENCH_PREFIX}{run_id}{index:03d}',
+                balance=Decimal('1000000.00')
+            )
+            for index in range(options['writers'])
+        ])
+
+        self.lock = threading.Lock()
+        self.write_timings, self.read_timings = [], []
+        self.locked_errors = 0
+        self.other_errors = []
+        self.writing = threading.Event()
+        self.writing.set()
+
+        try:
+            started = time.perf_counter()
+            writers = [threading.Thread(target=self._writer, args=(client, options['writes'])) for client in clients]
+            readers = [threading.Thread(target=self._reader, args=(clients,)) for _ in range(options['readers'])]
+            for thread in writers + readers:
+                thread.start()
+            for thread in writers:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            self.writing.clear()
+            for thread in readers:
+                thread.join()
+
+            self._report(options['writers'] * options['writes'], elapsed)
+        finally:
+            Transaction.objects.filter(client__in=clients).delete()
+            ClientProfile.objects.filter(national_id__startswith=f'{BENCH_PREFIX}{run_id}').delete()
+
+    @retry_on_locked
+    @transaction.atomic
+    def _write(self, client):
+        Transaction.objects.create(
+            client=client,
+            amount=Decimal(random.randint(100, 5000)),
+            transaction_type='withdraw',
+            status='completed',
+            description=BENCH_PREFIX
+        )
+        ClientProfile.objects.filter(pk=client.pk).update(balance=F('balance') - 1)
+
+    def _writer(self, client, count):
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                try:
+                    self._write(client)
+                except Exception as e:
+                    with self.lock:
+                        if is_database_locked(e):
+                            self.locked_errors += 1
+                        else:
+                            self.other_errors.append(str(e))
+                    continue
+                with self.lock:
+                    self.write_timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+
+    def _reader(self, clients):
+        try:
+            while self.writing.is_set():
+                start = time.perf_counter()
+                try:
+                    list(Transaction.objects.filter(client=random.choice(clients)).order_by('-created_at')[:20])
+                except Exception as e:
+                    with self.lock:
+                        if is_database_locked(e):
+                            self.locked_errors += 1
+                        else:
+                            self.other_errors.append(str(e))
+                    continue
+                with self.lock:
+                    self.read_timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+
+    def _percentile(self, timings, fraction):
+        ordered = sorted(timings)
+        return ordered[max(int(len(ordered) * fraction) - 1, 0)]
+
+    def _report(self, attempted, elapsed):
+        self.stdout.write(self.style.SUCCESS('\nSummary'))
+        self.stdout.write(f'writes: {len(self.write_timings)}/{attempted} committed in {elapsed:.2f}s '
+                          f'({len(self.write_timings) / elapsed:.1f}/s)')
+        for name, timings in (('write', self.write_timings), ('read', self.read_timings)):
+            if timings:
+                self.stdout.write(f'{name} latency: p50 {statistics.median(timings):.2f}ms, '
+                                  f'p95 {self._percentile(timings, 0.95):.2f}ms, '
+                                  f'max {max(timings):.2f}ms over {len(timings)} operations')
+        style = self.style.ERROR if self.locked_errors else self.style.SUCCESS
+        self.stdout.write(style(f'"database is locked" errors: {self.locked_errors}'))
+        for error in sorted(set(self.other_errors)):
+            self.stdout.write(self.style.ERROR(f'other error: {error}'))
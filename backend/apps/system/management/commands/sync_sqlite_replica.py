@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from apps.system.routers import REPLICA_ALIAS, replica_configured
+import sqlite3
+import time
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary into the SQLite replica file, simulating replication for local testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=float,
+            default=None,
+            help='Keep running and copy every N seconds, simulating replication lag (default: copy once)'
+        )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica configured; set DATABASE_REPLICA_URL, e.g. sqlite:///db-replica.sqlite3')
+        primary, replica = connections['default'], connections[REPLICA_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Only SQLite primaries and replicas can be synced; use real replication otherwise')
+
+        while True:
+            started = time.perf_counter()
+            self.sync(str(primary.settings_dict['NAME']), str(replica.settings_dict['NAME']))
+            self.stdout.write(self.style.SUCCESS(
+                f'Replica {replica.settings_dict["NAME"]} synced in {time.perf_counter() - started:.2f}s'
+            ))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def sync(self, source_path, target_path):
+        """Online backup: readers of either file see a consistent snapshot throughout"""
+        connections[REPLICA_ALIAS].close()
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
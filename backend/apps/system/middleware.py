@@ -0,0 +1,16 @@
+from django.utils.deprecation import MiddlewareMixin
+from .routers import pin_to_primary, reset_routing, wrote_recently
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Middleware to scope read-replica routing to a request: every request starts on the primary,
+    and a user who wrote during the request keeps reading from the primary for the sticky window
+    """
+
+    def process_request(self, request):
+        reset_routing()
+
+    def process_response(self, request, response):
+        if wrote_recently():
+            pin_to_primary(getattr(request, 'user', None))
+        return response
@@ -0,0 +1,99 @@
+"""
+Read-replica routing for SafeNetAi
+Sends opted-in read-only queries (admin listings, dashboard, exports, ML training) to the 'replica' database
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+REPLICA_ALIAS = 'replica'
+PIN_CACHE_KEY = 'replica:pin:{user_id}'
+
+# Set for code that tolerates replication lag; everything else reads from 'default'
+_replica_reads = ContextVar('replica_reads', default=False)
+# time.monotonic() of the last write made in this context
+_last_write = ContextVar('replica_last_write', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def sticky_seconds():
+    """How long reads stay on the primary after a write, so users see their own changes"""
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def _pin_key(user):
+    return PIN_CACHE_KEY.format(user_id=user.pk)
+
+
+def is_pinned(user):
+    """Whether the user wrote within the sticky window (in any request)"""
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user)))
+
+
+def pin_to_primary(user):
+    if user and user.is_authenticated:
+        cache.set(_pin_key(user), 1, sticky_seconds())
+
+
+def wrote_recently():
+    last_write = _last_write.get()
+    return last_write is not None and time.monotonic() - last_write < sticky_seconds()
+
+
+def route_reads_to_replica(request):
+    """Send the rest of this request's reads to the replica, unless the user wrote recently"""
+    if replica_configured() and not is_pinned(request.user):
+        _replica_reads.set(True)
+
+
+def reset_routing():
+    """Start a request with reads on the primary (ReplicaRoutingMiddleware)"""
+    _replica_reads.set(False)
+    _last_write.set(None)
+
+
+@contextmanager
+def replica_reads():
+    """Read from the replica inside the block, e.g. for batch jobs outside a request"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica only when the current context opted in, a replica is configured,
+    no transaction is open on the primary and nothing was written within the sticky window.
+    Writes and migrations always use the primary; the replica gets its schema by replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and replica_configured()
+            and not connections['default'].in_atomic_block
+            and not wrote_recently()
+        ):
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        _last_write.set(time.monotonic())
+        # Also for instances read from the replica, which Django would otherwise save back there
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on both sides, so objects read from either may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
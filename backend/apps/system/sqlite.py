@@ -0,0 +1,89 @@
+"""
+SQLite tuning for SafeNetAi
+Opt-in (SQLITE_TUNING) connection pragmas and a retry wrapper for writes that hit "database is locked"
+"""
+
+import functools
+import random
+import time
+from django.conf import settings
+from django.db import OperationalError, connections
+from apps.utils.logger import get_system_logger, log_system_event
+
+logger = get_system_logger()
+
+# Overridden by the SQLITE_* settings
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 64000
+DEFAULT_WRITE_RETRIES = 5
+DEFAULT_RETRY_BACKOFF = 0.05
+
+
+def sqlite_tuning_enabled():
+    return getattr(settings, 'SQLITE_TUNING', False)
+
+
+def sqlite_pragmas():
+    """The PRAGMA statements run on every new SQLite connection, in order"""
+    return [
+        # Readers keep reading the last committed snapshot while a writer appends to the WAL
+        'PRAGMA journal_mode=WAL',
+        # Wait for the write lock instead of failing straight away
+        f'PRAGMA busy_timeout={int(getattr(settings, "SQLITE_BUSY_TIMEOUT_MS", DEFAULT_BUSY_TIMEOUT_MS))}',
+        # With WAL, NORMAL only syncs at checkpoints: durable across crashes of the app, not of the OS
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA mmap_size={int(getattr(settings, "SQLITE_MMAP_SIZE", DEFAULT_MMAP_SIZE))}',
+        # Negative cache_size is in KiB rather than pages
+        f'PRAGMA cache_size=-{int(getattr(settings, "SQLITE_CACHE_SIZE_KB", DEFAULT_CACHE_SIZE_KB))}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created receiver: tune each new SQLite connection (registered by SystemConfig.ready)"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+
+
+def is_database_locked(exc):
+    return isinstance(exc, OperationalError) and 'database is locked' in str(exc)
+
+
+def retry_on_locked(func=None, *, using='default', retries=None, backoff=None):
+    """
+    Re-run `func` when SQLite reports "database is locked", with jittered exponential backoff.
+
+    Wrap the outermost transaction (put it above @transaction.atomic): a locked error inside
+    an atomic block has already rolled the block back, so only a fresh attempt can succeed.
+    Calls made while a transaction is open are not retried. No-op unless SQLITE_TUNING is on
+    and `using` is a SQLite database.
+    """
+    if func is None:
+        return functools.partial(retry_on_locked, using=using, retries=retries, backoff=backoff)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        connection = connections[using]
+        if not sqlite_tuning_enabled() or connection.vendor != 'sqlite' or connection.in_atomic_block:
+            return func(*args, **kwargs)
+
+        max_retries = getattr(settings, 'SQLITE_WRITE_RETRIES', DEFAULT_WRITE_RETRIES) if retries is None else retries
+        delay = getattr(settings, 'SQLITE_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF) if backoff is None else backoff
+        for attempt in range(max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_database_locked(exc) or attempt == max_retries:
+                    if is_database_locked(exc):
+                        log_system_event("SQLite write gave up while locked", "sqlite", "ERROR", {
+                            "function": func.__qualname__, "attempts": attempt + 1
+                        })
+                    raise
+                logger.warning(f"Database locked in {func.__qualname__}, retry {attempt + 1}/{max_retries}")
+                time.sleep(delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    return wrapper
@@ -0,0 +1,89 @@
+from unittest import mock
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from apps.risk.models import ClientProfile
+from apps.system import routers
+from apps.system.routers import ReplicaRouter, replica_reads, reset_routing
+from apps.transactions.models import Transaction, FraudAlert
+from apps.users.models import User
+
+@override_settings(REPLICA_STICKY_SECONDS=5)
+class ReplicaRouterTestCase(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        for patcher in (
+            mock.patch('apps.system.routers.replica_configured', return_value=True),
+            # TestCase wraps each test in a transaction, which keeps reads on the primary
+            mock.patch.object(connection, 'in_atomic_block', False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        reset_routing()
+        self.addCleanup(reset_routing)
+
+    def test_reads_stay_on_primary_unless_opted_in(self):
+        self.assertIsNone(self.router.db_for_read(Transaction))
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+        self.assertIsNone(self.router.db_for_read(Transaction))
+
+    def test_writes_always_go_to_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(Transaction), 'default')
+
+    def test_reads_follow_own_writes_for_sticky_window(self):
+        with mock.patch('apps.system.routers.time.monotonic', return_value=100.0) as clock, replica_reads():
+            self.router.db_for_write(Transaction)
+            self.assertIsNone(self.router.db_for_read(Transaction))
+            clock.return_value += 6
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+
+    def test_no_replica_configured(self):
+        with mock.patch('apps.system.routers.replica_configured', return_value=False), replica_reads():
+            self.assertIsNone(self.router.db_for_read(Transaction))
+
+    def test_only_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'transactions'))
+        self.assertFalse(self.router.allow_migrate('replica', 'transactions'))
+
+
+class ReplicaRoutingViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(reset_routing)
+        patcher = mock.patch('apps.system.routers.replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            password='AdminPass123!'
+        )
+        client = ClientProfile.objects.create(first_name='John', last_name='Doe', national_id='123456789')
+        txn = Transaction.objects.create(client=client, amount=Decimal('100.00'), status='pending')
+        self.alert = FraudAlert.objects.create(transaction=txn, level='HIGH', risk_score=80, triggers=['Large amount'])
+        self.client.force_authenticate(user=self.admin)
+
+    def test_admin_listing_reads_from_replica(self):
+        self.client.get('/api/admin/transactions/')
+        self.assertTrue(routers._replica_reads.get())
+
+    def test_client_requests_stay_on_primary(self):
+        self.client.get('/api/client/transactions/')
+        self.assertFalse(routers._replica_reads.get())
+
+    def test_admin_reads_own_writes_from_primary(self):
+        """Test that an admin who just reviewed an alert is pinned to the primary"""
+        self.client.patch(f'/api/admin/fraud-alerts/{self.alert.id}/approve/')
+        self.client.get('/api/admin/fraud-alerts/')
+        self.assertFalse(routers._replica_reads.get())
+
+        cache.clear()
+        self.client.get('/api/admin/fraud-alerts/')
+        self.assertTrue(routers._replica_reads.get())
@@ -0,0 +1,69 @@
+from unittest import mock
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, override_settings
+from apps.system.sqlite import apply_sqlite_pragmas, retry_on_locked
+
+class SqlitePragmaTestCase(TestCase):
+    @override_settings(SQLITE_BUSY_TIMEOUT_MS=1234, SQLITE_CACHE_SIZE_KB=2000)
+    def test_pragmas_applied_to_connection(self):
+        # A separate connection: synchronous cannot change inside the test's transaction
+        new_connection = connection.copy()
+        self.addCleanup(new_connection.close)
+        new_connection.ensure_connection()
+        apply_sqlite_pragmas(sender=None, connection=new_connection)
+        with new_connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 1234)
+            self.assertEqual(cursor.execute('PRAGMA cache_size').fetchone()[0], -2000)
+            # 1 = NORMAL
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+
+@override_settings(SQLITE_TUNING=True)
+class RetryOnLockedTestCase(TestCase):
+    # TestCase wraps each test in a transaction; the wrapper only retries outermost calls
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'in_atomic_block', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sleep = mock.patch('apps.system.sqlite.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_retries_until_lock_clears(self):
+        func = mock.Mock(side_effect=[OperationalError('database is locked'), OperationalError('database is locked'), 'ok'])
+        func.__qualname__ = 'write'
+        self.assertEqual(retry_on_locked(func)(), 'ok')
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_gives_up_after_retries(self):
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        func.__qualname__ = 'write'
+        with self.assertRaises(OperationalError):
+            retry_on_locked(func, retries=2)()
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        func = mock.Mock(side_effect=OperationalError('no such table: foo'))
+        func.__qualname__ = 'write'
+        with self.assertRaises(OperationalError):
+            retry_on_locked(func)()
+        self.assertEqual(func.call_count, 1)
+
+    @override_settings(SQLITE_TUNING=False)
+    def test_disabled_without_tuning(self):
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        func.__qualname__ = 'write'
+        with self.assertRaises(OperationalError):
+            retry_on_locked(func)()
+        self.assertEqual(func.call_count, 1)
+
+
+@override_settings(SQLITE_TUNING=True)
+class RetryInsideTransactionTestCase(TestCase):
+    def test_not_retried_inside_open_transaction(self):
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        func.__qualname__ = 'write'
+        with transaction.atomic(), self.assertRaises(OperationalError):
+            retry_on_locked(func)()
+        self.assertEqual(func.call_count, 1)
@@ -224,9 +224,16 @@ def get_system_info(request):
             'logs_directory': str(settings.LOGS_DIR)
         }
         
+        # Import here to avoid circular imports
+        from apps.risk.prediction_cache import get_prediction_cache
+        from apps.risk.shadow import shadow_stats
+        
         return Response({
             'database': db_info,
             'cache': cache_info,
+            # Per worker process
+            'ml_prediction_cache': get_prediction_cache().stats(),
+            'shadow_scoring': shadow_stats(),
             'email': email_info,
             'logging': logging_info,
             'debug_mode': settings.DEBUG,
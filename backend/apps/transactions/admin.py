@@ -48,15 +48,15 @@ class FraudAlertAdmin(admin.ModelAdmin):
 
 @admin.register(TransactionOTP)
 class TransactionOTPAdmin(admin.ModelAdmin):
-    list_display = ('transaction', 'user', 'otp', 'expires_at', 'used', 'attempts')
+    list_display = ('transaction', 'batch', 'user', 'otp', 'expires_at', 'used', 'attempts')
     list_filter = ('used', 'created_at')
     search_fields = ('transaction__id', 'user__email')
-    readonly_fields = ('transaction', 'user', 'otp', 'created_at', 'expires_at', 'used', 'attempts')
+    readonly_fields = ('transaction', 'batch', 'user', 'otp', 'created_at', 'expires_at', 'used', 'attempts')
     ordering = ('-created_at',)
     
     fieldsets = (
         ('OTP Information', {
-            'fields': ('transaction', 'user', 'otp')
+            'fields': ('transaction', 'batch', 'user', 'otp')
         }),
         ('Status', {
             'fields': ('used', 'attempts')
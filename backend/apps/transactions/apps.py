@@ -7,3 +7,7 @@ class TransactionsConfig(AppConfig):
     
     def ready(self):
         import apps.transactions.signals
+        from django.db.models.signals import post_migrate
+        from .partitions import ensure_partitions_after_migrate
+
+        post_migrate.connect(ensure_partitions_after_migrate, sender=self, dispatch_uid='apps.transactions.partitions')
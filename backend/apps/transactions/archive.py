@@ -0,0 +1,140 @@
+"""
+Hot/cold archival for SafeNetAi
+Moves settled transactions and their fraud alerts past the archive horizon out of the hot tables, in bounded batches
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+from .filters import parse_created_bound
+from .models import Transaction, FraudAlert, ArchivedTransaction, ArchivedFraudAlert
+from .rollups import preserve_rollups
+from apps.utils.logger import get_transactions_logger, log_system_event
+
+logger = get_transactions_logger()
+
+# Pending transactions still move money; they stay live however old they are
+ARCHIVABLE_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+def archive_horizon():
+    return timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365))
+
+
+def archive_cutoff(now=None):
+    """Transactions created before this are due for the archive"""
+    return (now or timezone.now()) - archive_horizon()
+
+
+def archivable_transactions(cutoff):
+    """Settled transactions created before cutoff whose alert (if any) is no longer under review"""
+    return Transaction.objects.filter(
+        created_at__lt=cutoff, status__in=ARCHIVABLE_STATUSES
+    ).exclude(fraud_alert__status='Active')
+
+
+def _copy(source, model):
+    """An archive row with the source row's column values, primary key included"""
+    return model(**{
+        field.attname: getattr(source, field.attname)
+        for field in model._meta.concrete_fields
+        if field.name != 'archived_at'
+    })
+
+
+def archive_transactions(cutoff=None, batch_size=None, pause=None, max_batches=None):
+    """
+    Move archivable transactions and their fraud alerts into the archive tables, oldest
+    primary keys first. Each batch is one transaction: copy the rows, then delete the
+    originals (their OTPs cascade away). The daily rollups keep counting the moved rows.
+    Sleeps `pause` seconds between batches. Returns counts and timing like the sweeper.
+    """
+    cutoff = cutoff or archive_cutoff()
+    batch_size = batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 1000)
+    pause = getattr(settings, 'ARCHIVE_PAUSE_SECONDS', 0.05) if pause is None else pause
+
+    candidates = archivable_transactions(cutoff)
+    moved_transactions = moved_alerts = batches = 0
+    last_pk = None
+    started = time.monotonic()
+
+    while max_batches is None or batches < max_batches:
+        page = candidates if last_pk is None else candidates.filter(pk__gt=last_pk)
+        ids = list(page.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+
+        with transaction.atomic(), preserve_rollups():
+            # Re-check under the row locks: a row may have changed since the ids were read
+            rows = list(candidates.filter(pk__in=ids).select_for_update(of=('self',)))
+            alerts = list(FraudAlert.objects.filter(transaction__in=rows))
+            ArchivedTransaction.objects.bulk_create([_copy(row, ArchivedTransaction) for row in rows])
+            ArchivedFraudAlert.objects.bulk_create([_copy(alert, ArchivedFraudAlert) for alert in alerts])
+            Transaction.objects.filter(pk__in=[row.pk for row in rows]).delete()
+
+        moved_transactions += len(rows)
+        moved_alerts += len(alerts)
+        batches += 1
+        last_pk = ids[-1]
+
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    elapsed = time.monotonic() - started
+    metrics = {
+        'cutoff': cutoff.isoformat(),
+        'transactions': moved_transactions,
+        'fraud_alerts': moved_alerts,
+        'batches': batches,
+        'elapsed_seconds': round(elapsed, 3),
+    }
+    if moved_transactions:
+        logger.info(f"Archived {moved_transactions} transactions and {moved_alerts} fraud alerts "
+                    f"created before {cutoff:%Y-%m-%d} in {batches} batches ({elapsed:.2f}s)")
+        log_system_event("Transactions archived", "archive", "INFO", metrics)
+    return metrics
+
+
+def reaches_archive(params):
+    """Whether a listing's created_after / created_before filters reach back past the archive horizon"""
+    cutoff = archive_cutoff()
+    return any(
+        bound is not None and bound < cutoff
+        for bound in (parse_created_bound(params, 'created_after'), parse_created_bound(params, 'created_before'))
+    )
+
+
+def stream_transactions(chunk_size=None, **filters):
+    """
+    Yield live transactions, then archived ones, matching `filters`, in constant memory.
+    Archived rows carry the same fields (and client), so consumers can treat both alike.
+    """
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    for model in (Transaction, ArchivedTransaction):
+        yield from model.objects.filter(**filters).select_related('client').order_by('pk').iterator(chunk_size=chunk_size)
+
+
+def client_amount_stats(client):
+    """
+    Mean and population standard deviation of a client's amounts across live and archived
+    transactions, from one count/sum/sum-of-squares aggregate per table
+    """
+    square = ExpressionWrapper(F('amount') * F('amount'), output_field=DecimalField(max_digits=24, decimal_places=4))
+    count, total, squares = 0, Decimal('0'), Decimal('0')
+    for model in (Transaction, ArchivedTransaction):
+        row = model.objects.filter(client=client).aggregate(count=Count('id'), total=Sum('amount'), squares=Sum(square))
+        count += row['count']
+        total += Decimal(str(row['total'] or 0))
+        squares += Decimal(str(row['squares'] or 0))
+
+    if not count:
+        return {'count': 0, 'avg_amount': None, 'std_amount': None}
+    mean = total / count
+    variance = max(squares / count - mean * mean, Decimal('0'))
+    return {'count': count, 'avg_amount': mean, 'std_amount': variance.sqrt()}
@@ -0,0 +1,79 @@
+"""
+Query parameter filters for SafeNetAi transaction APIs
+Shared by the admin listings and exports so both accept the same parameters
+"""
+
+from datetime import datetime
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_created_bound(params, name):
+    """The created_after / created_before parameter as an aware datetime (a bare date means its midnight)"""
+    value = params.get(name, None)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, datetime.min.time()) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Expected an ISO 8601 date or datetime'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_created(queryset, params):
+    """Apply the created_after (inclusive) / created_before (exclusive) query parameters"""
+    created_after = parse_created_bound(params, 'created_after')
+    if created_after:
+        queryset = queryset.filter(created_at__gte=created_after)
+    created_before = parse_created_bound(params, 'created_before')
+    if created_before:
+        queryset = queryset.filter(created_at__lt=created_before)
+    return queryset
+
+
+def filter_transactions(queryset, params):
+    """Apply the client_id / status / transaction_type / created_* query parameters"""
+    # Filter by client
+    client_id = params.get('client_id', None)
+    if client_id:
+        queryset = queryset.filter(client_id=client_id)
+    
+    # Filter by status
+    status_filter = params.get('status', None)
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    
+    # Filter by transaction type
+    transaction_type = params.get('transaction_type', None)
+    if transaction_type:
+        queryset = queryset.filter(transaction_type=transaction_type)
+    
+    return filter_created(queryset, params)
+
+
+def filter_fraud_alerts(queryset, params):
+    """Apply the client_id / level / status / created_* query parameters"""
+    # Filter by client
+    client_id = params.get('client_id', None)
+    if client_id:
+        queryset = queryset.filter(transaction__client_id=client_id)
+    
+    # Filter by level
+    level = params.get('level', None)
+    if level:
+        queryset = queryset.filter(level=level)
+    
+    # Filter by status
+    status_filter = params.get('status', None)
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    
+    return filter_created(queryset, params)
@@ -0,0 +1,130 @@
+"""
+Idempotency-Key support for SafeNetAi
+Lets clients retry a POST safely: a repeated key replays the stored response instead of re-running the request
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+from apps.utils.logger import get_transactions_logger, log_system_event
+
+logger = get_transactions_logger()
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _key_ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+
+def request_fingerprint(request, ignore_fields=()):
+    """SHA-256 of the method, path and canonical JSON body, minus fields that legitimately vary per retry"""
+    if hasattr(request.data, 'lists'):
+        body = {key: values if len(values) > 1 else values[0] for key, values in request.data.lists()}
+    else:
+        body = dict(request.data)
+    for field in ignore_fields:
+        body.pop(field, None)
+
+    canonical = json.dumps(
+        {'method': request.method, 'path': request.path, 'body': body},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _claim(user, key, request_hash):
+    """
+    Insert the key, or return the row another request already stored under it.
+    Runs inside the caller's transaction, so a concurrent duplicate blocks on the unique
+    index until the first request commits and then sees its stored response.
+    """
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user,
+                key=key,
+                request_hash=request_hash,
+                expires_at=timezone.now() + _key_ttl()
+            ), True
+    except IntegrityError:
+        existing = IdempotencyKey.objects.select_for_update().get(user=user, key=key)
+        if existing.is_expired():
+            existing.delete()
+            return _claim(user, key, request_hash)
+        return existing, False
+
+
+def _replay(existing, request_hash, user):
+    if existing.request_hash != request_hash:
+        logger.warning(f"Idempotency key {existing.key} reused with a different payload by {user.email}")
+        return Response({
+            'error': 'Idempotency-Key was already used with a different request payload.'
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    if existing.response_status is None:
+        return Response({
+            'error': 'A request with this Idempotency-Key is still being processed.'
+        }, status=status.HTTP_409_CONFLICT)
+
+    logger.info(f"Replaying stored response for idempotency key {existing.key} (user {user.email})")
+    response = Response(existing.response_body, status=existing.response_status)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(ignore_fields=()):
+    """
+    Decorator for viewset actions that run inside transaction.atomic. With an Idempotency-Key
+    header, the first request claims the key and its 2xx response is stored in the same
+    transaction; retries with the same key and payload get that response back without
+    running the action. Non-2xx outcomes release the key so a corrected retry can proceed.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER, '').strip()
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({
+                    'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            request_hash = request_fingerprint(request, ignore_fields)
+            record, claimed = _claim(request.user, key, request_hash)
+            if not claimed:
+                return _replay(record, request_hash, request.user)
+
+            response = view_method(self, request, *args, **kwargs)
+
+            if transaction.get_connection().needs_rollback:
+                # The action's transaction is being rolled back, and the claim with it
+                return response
+
+            if status.is_success(response.status_code):
+                record.response_status = response.status_code
+                record.response_body = response.data
+                if isinstance(response.data, dict):
+                    record.transaction_id = response.data.get('transaction_id')
+                record.save(update_fields=['response_status', 'response_body', 'transaction'])
+            else:
+                record.delete()
+                log_system_event(
+                    "Idempotency key released after unsuccessful request",
+                    "transactions",
+                    "INFO",
+                    {"user_id": request.user.id, "status_code": response.status_code}
+                )
+            return response
+        return wrapper
+    return decorator
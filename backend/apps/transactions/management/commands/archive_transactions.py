@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.transactions.archive import archive_cutoff, archive_transactions
+
+class Command(BaseCommand):
+    help = 'Move settled transactions and their fraud alerts older than the archive horizon into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Archive transactions created more than N days ago (default: ARCHIVE_AFTER_DAYS, 365)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Transactions moved per database transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.05,
+            help='Seconds to sleep between batches (default: 0.05)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after N batches (default: no limit)'
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=None,
+            help='Keep running and archive every N seconds, e.g. as a worker process (default: run once)'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['older_than_days'] is not None and options['older_than_days'] < 1:
+            raise CommandError('--older-than-days must be at least 1')
+
+        while True:
+            self.archive(options)
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def archive(self, options):
+        if options['older_than_days'] is None:
+            cutoff = archive_cutoff()
+        else:
+            cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+
+        metrics = archive_transactions(
+            cutoff=cutoff,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {metrics["transactions"]} transactions and {metrics["fraud_alerts"]} fraud alerts '
+            f'created before {cutoff:%Y-%m-%d} in {metrics["batches"]} batches ({metrics["elapsed_seconds"]}s)'
+        ))
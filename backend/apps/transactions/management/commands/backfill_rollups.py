@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.transactions.models import Transaction, ArchivedTransaction
+from apps.transactions.rollups import rebuild_rollups
+from datetime import timedelta
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily transaction and fraud alert rollups from the raw and archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only rebuild the last N days (default: all history)'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help='Days rebuilt per database transaction (default: 31)'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        today = timezone.localdate()
+        if options['days'] is not None:
+            start_day = today - timedelta(days=options['days'] - 1)
+        else:
+            # Archived transactions are the oldest history
+            firsts = [
+                model.objects.order_by('created_at').values_list('created_at', flat=True).first()
+                for model in (ArchivedTransaction, Transaction)
+            ]
+            first = min((value for value in firsts if value is not None), default=None)
+            if first is None:
+                rebuild_rollups()
+                self.stdout.write(self.style.SUCCESS('No transactions; rollups cleared'))
+                return
+            start_day = timezone.localtime(first).date()
+
+        totals = {'transaction_rows': 0, 'client_rows': 0, 'alert_rows': 0}
+        chunk_start = start_day
+        while chunk_start <= today:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), today)
+            written = rebuild_rollups(chunk_start, chunk_end)
+            for key, value in written.items():
+                totals[key] += value
+            self.stdout.write(f'  {chunk_start}..{chunk_end}: {written["transaction_rows"]} status, '
+                              f'{written["client_rows"]} client, {written["alert_rows"]} alert rows')
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollups rebuilt from {start_day}: {totals["transaction_rows"]} status, '
+            f'{totals["client_rows"]} client, {totals["alert_rows"]} alert rows'
+        ))
@@ -0,0 +1,215 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction, TransactionOTP, FraudAlert
+from apps.users.models import User
+from decimal import Decimal
+from datetime import timedelta
+import random
+import statistics
+import time
+
+BENCH_PREFIX = 'BENCH'
+
+class Command(BaseCommand):
+    help = ('Benchmark the scoring and listing hot-path queries with and without the composite indexes, '
+            'in a throwaway test database (the configured one is never touched)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=200,
+            help='Number of benchmark client profiles to generate (default: 200)'
+        )
+        parser.add_argument(
+            '--transactions',
+            type=int,
+            default=100000,
+            help='Number of benchmark transactions to generate (default: 100000)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Timed runs per query and index state (default: 50)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the test database and its dataset instead of destroying it afterwards'
+        )
+
+    def handle(self, *args, **options):
+        # Dropping indexes and bulk-inserting ~100k rows must never happen on a live database:
+        # run against a freshly migrated test database, as the test runner would
+        verbosity = options['verbosity']
+        old_config = setup_databases(verbosity, interactive=False, keepdb=options['keep'], aliases={'default'})
+        self.stdout.write(f'Benchmarking in test database {connection.settings_dict["NAME"]}')
+        try:
+            self.benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity, keepdb=options['keep'])
+
+    def benchmark(self, options):
+        self.iterations = options['iterations']
+
+        self.stdout.write(self.style.SUCCESS('Generating benchmark dataset...'))
+        clients, user = self._generate_dataset(options['clients'], options['transactions'])
+        self.stdout.write(f'Dataset ready: {Transaction.objects.count()} transactions, '
+                          f'{TransactionOTP.objects.count()} OTPs, {FraudAlert.objects.count()} fraud alerts')
+
+        try:
+            queries = self._build_queries(user)
+
+            self.stdout.write(self.style.WARNING('\nBEFORE: hot-path indexes dropped'))
+            self._set_indexes(enabled=False)
+            before = self._run_queries(queries, clients)
+
+            self.stdout.write(self.style.WARNING('\nAFTER: hot-path indexes in place'))
+            self._set_indexes(enabled=True)
+            after = self._run_queries(queries, clients)
+
+            self._report(before, after)
+        finally:
+            self._set_indexes(enabled=True)
+            if not options['keep']:
+                self.stdout.write('Removing benchmark dataset...')
+                ClientProfile.objects.filter(national_id__startswith=BENCH_PREFIX).delete()
+                User.objects.filter(email__startswith=BENCH_PREFIX.lower()).delete()
+
+    def _generate_dataset(self, num_clients, num_transactions):
+        """Bulk-insert clients, transactions spread over a year, OTPs and fraud alerts"""
+        run_id = random.randint(100000, 999999)
+        user = User.objects.create_user(
+            email=f'{BENCH_PREFIX.lower()}-{run_id}@safenetai.local',
+            first_name='Bench',
+            last_name='User',
+            password=None
+        )
+
+        clients = ClientProfile.objects.bulk_create([
+            ClientProfile(
+                first_name='Bench',
+                last_name=f'Client {i}',
+                national_id=f'{BENCH_PREFIX}{run_id}{i:06d}',
+                balance=Decimal('100000.00')
+            )
+            for i in range(num_clients)
+        ])
+
+        # created_at is auto_now_add; switch it off so the rows can be spread over time
+        created_at_field = Transaction._meta.get_field('created_at')
+        created_at_field.auto_now_add = False
+        now = timezone.now()
+        statuses = ['completed'] * 7 + ['pending', 'failed', 'cancelled']
+        batch_size = 5000
+        try:
+            for start in range(0, num_transactions, batch_size):
+                batch = []
+                for _ in range(min(batch_size, num_transactions - start)):
+                    batch.append(Transaction(
+                        client=random.choice(clients),
+                        amount=Decimal(random.randint(100, 200000)),
+                        status=random.choice(statuses),
+                        risk_score=random.randint(0, 100),
+                        created_at=now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+                    ))
+                with transaction.atomic():
+                    created = Transaction.objects.bulk_create(batch)
+                    TransactionOTP.objects.bulk_create([
+                        TransactionOTP(
+                            transaction=txn,
+                            user=user,
+                            otp=f'{random.randint(100000, 999999)}',
+                            expires_at=txn.created_at + timedelta(minutes=10),
+                            used=random.random() < 0.8
+                        )
+                        for txn in created if txn.status != 'completed' or random.random() < 0.1
+                    ])
+                    FraudAlert.objects.bulk_create([
+                        FraudAlert(
+                            transaction=txn,
+                            level=random.choice(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']),
+                            risk_score=txn.risk_score,
+                            status=random.choice(['Active', 'Reviewed', 'Resolved'])
+                        )
+                        for txn in created if txn.risk_score >= 60
+                    ])
+                self.stdout.write(f'  {start + len(batch)}/{num_transactions} transactions')
+        finally:
+            created_at_field.auto_now_add = True
+
+        return clients, user
+
+    def _build_queries(self, user):
+        """The exact queries issued by RiskEngine, the OTP services and the admin listings"""
+        now = timezone.now()
+        sample_otp = TransactionOTP.objects.filter(user=user).order_by('?').values_list('transaction_id', flat=True).first()
+
+        # (name, queryset builder for a client, how the caller evaluates it)
+        return [
+            ('engine: high frequency count', lambda client: Transaction.objects.filter(
+                client=client, created_at__gte=now - timedelta(hours=1)
+            ), 'count'),
+            ('engine: last verified transaction', lambda client: Transaction.objects.filter(
+                client=client, created_at__lt=now, status='completed'
+            ).order_by('-created_at')[:1], 'list'),
+            ('otp: active code lookup', lambda client: TransactionOTP.objects.filter(
+                transaction_id=sample_otp, user=user, used=False
+            )[:1], 'list'),
+            ('admin: transactions by status', lambda client: Transaction.objects.filter(
+                status='failed'
+            ).order_by('-created_at')[:50], 'list'),
+            ('admin: transactions by type', lambda client: Transaction.objects.filter(
+                transaction_type='transfer', created_at__gte=now - timedelta(days=7)
+            ).order_by('-created_at')[:50], 'list'),
+            ('admin: fraud alerts by status', lambda client: FraudAlert.objects.filter(
+                status='Active'
+            ).order_by('-created_at')[:50], 'list'),
+        ]
+
+    def _run_queries(self, queries, clients):
+        """Time each query over random clients and capture its EXPLAIN plan"""
+        results = {}
+        for name, build, evaluate in queries:
+            plan = build(clients[0]).explain()
+            timings = []
+            for _ in range(self.iterations):
+                queryset = build(random.choice(clients))
+                start = time.perf_counter()
+                if evaluate == 'count':
+                    queryset.count()
+                else:
+                    list(queryset)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {
+                'plan': plan,
+                'mean_ms': statistics.mean(timings),
+                'p95_ms': sorted(timings)[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0],
+            }
+            self.stdout.write(f'\n{name}: mean {results[name]["mean_ms"]:.3f}ms, p95 {results[name]["p95_ms"]:.3f}ms')
+            self.stdout.write(plan)
+        return results
+
+    def _set_indexes(self, enabled):
+        """Drop or recreate the Meta.indexes of the hot-path models"""
+        with connection.schema_editor() as schema_editor:
+            for model in (Transaction, TransactionOTP, FraudAlert):
+                existing = connection.introspection.get_constraints(connection.cursor(), model._meta.db_table)
+                for index in model._meta.indexes:
+                    if enabled and index.name not in existing:
+                        schema_editor.add_index(model, index)
+                    elif not enabled and index.name in existing:
+                        schema_editor.remove_index(model, index)
+
+    def _report(self, before, after):
+        self.stdout.write(self.style.SUCCESS('\nSummary (mean latency)'))
+        self.stdout.write(f'{"query":<36}{"before":>12}{"after":>12}{"speedup":>10}')
+        for name in before:
+            speedup = before[name]['mean_ms'] / max(after[name]['mean_ms'], 1e-6)
+            self.stdout.write(
+                f'{name:<36}{before[name]["mean_ms"]:>10.3f}ms{after[name]["mean_ms"]:>10.3f}ms{speedup:>9.1f}x'
+            )
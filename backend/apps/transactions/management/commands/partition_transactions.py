@@ -0,0 +1,77 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.transactions.partitions import (
+    convert_to_partitioned, drop_empty_partitions, ensure_partitions, is_partitioned,
+    list_partitions, months_ahead, partitioning_supported
+)
+
+class Command(BaseCommand):
+    help = 'Partition the transactions table by month (PostgreSQL) and keep future partitions created'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild the transactions table as a partitioned table (locks it for the copy; run once)'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=None,
+            help='Months past the current one to create partitions for (default: TRANSACTION_PARTITION_MONTHS_AHEAD, 3)'
+        )
+        parser.add_argument(
+            '--drop-empty-before',
+            default=None,
+            help='Drop empty monthly partitions ending on or before this month, YYYY-MM, e.g. after archiving (default: keep all)'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List the partitions and their bounds'
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=None,
+            help='Keep running and create upcoming partitions every N seconds, e.g. as a worker process (default: run once)'
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning_supported():
+            raise CommandError('Transaction partitioning needs PostgreSQL as the default database')
+        ahead = months_ahead() if options['months_ahead'] is None else options['months_ahead']
+        if ahead < 0:
+            raise CommandError('--months-ahead must not be negative')
+        drop_before = None
+        if options['drop_empty_before']:
+            try:
+                year, month = options['drop_empty_before'].split('-')
+                drop_before = date(int(year), int(month), 1)
+            except ValueError:
+                raise CommandError('--drop-empty-before must look like YYYY-MM')
+
+        if options['convert']:
+            if is_partitioned():
+                raise CommandError('The transactions table is already partitioned')
+            result = convert_to_partitioned(ahead=ahead)
+            self.stdout.write(self.style.SUCCESS(f'Partitioned transactions into {len(result["partitions"])} monthly partitions'))
+            for name in result['dropped_foreign_keys']:
+                self.stdout.write(f'Dropped foreign key {name}')
+        elif not is_partitioned():
+            raise CommandError('The transactions table is not partitioned yet; run with --convert first')
+
+        while True:
+            created = ensure_partitions(ahead=ahead)
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} upcoming partitions'))
+            if drop_before:
+                dropped = drop_empty_partitions(drop_before)
+                self.stdout.write(self.style.SUCCESS(f'Dropped {len(dropped)} empty partitions'))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+        if options['list']:
+            for name, bound in list_partitions():
+                self.stdout.write(f'{name}: {bound}')
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0005_suspiciouslocation'),
+        ('transactions', '0005_remove_transaction_device_fingerprint_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fraudalert',
+            index=models.Index(fields=['status', 'created_at'], name='alert_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fraudalert',
+            index=models.Index(fields=['level', 'created_at'], name='alert_level_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['client', 'created_at'], name='txn_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['client', 'status', 'created_at'], name='txn_client_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'created_at'], name='txn_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'created_at'], name='txn_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionotp',
+            index=models.Index(fields=['transaction', 'user', 'used'], name='txnotp_txn_user_used_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, Upper
+
+
+def backfill_rollups(apps, schema_editor):
+    """Seed the rollups from existing rows; later writes maintain them incrementally"""
+    Transaction = apps.get_model('transactions', 'Transaction')
+    FraudAlert = apps.get_model('transactions', 'FraudAlert')
+    TransactionDailyRollup = apps.get_model('transactions', 'TransactionDailyRollup')
+    ClientDailyRollup = apps.get_model('transactions', 'ClientDailyRollup')
+    FraudAlertDailyRollup = apps.get_model('transactions', 'FraudAlertDailyRollup')
+
+    transactions = Transaction.objects.annotate(day=TruncDate('created_at'))
+    TransactionDailyRollup.objects.bulk_create([
+        TransactionDailyRollup(**row)
+        for row in transactions.values('day', 'status').annotate(
+            transaction_count=Count('id'), total_amount=Sum('amount')
+        ).order_by()
+    ], batch_size=1000)
+    ClientDailyRollup.objects.bulk_create([
+        ClientDailyRollup(**row)
+        for row in transactions.values('day', 'client_id').annotate(
+            transaction_count=Count('id'), total_amount=Sum('amount')
+        ).order_by()
+    ], batch_size=1000)
+    FraudAlertDailyRollup.objects.bulk_create([
+        FraudAlertDailyRollup(day=row['day'], level=row['level_key'], status=row['status'], alert_count=row['alert_count'])
+        for row in FraudAlert.objects.annotate(day=TruncDate('created_at'), level_key=Upper('level')).values(
+            'day', 'level_key', 'status'
+        ).annotate(alert_count=Count('id')).order_by()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0005_suspiciouslocation'),
+        ('transactions', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FraudAlertDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('level', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High'), ('CRITICAL', 'Critical')], max_length=20)),
+                ('status', models.CharField(choices=[('Active', 'Active'), ('Reviewed', 'Reviewed'), ('Resolved', 'Resolved')], max_length=20)),
+                ('alert_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', 'level', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'level', 'status'), name='alert_rollup_day_level_status_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TransactionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'ordering': ['-day', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='txn_rollup_day_status_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClientDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='risk.clientprofile')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('client', 'day'), name='client_rollup_client_day_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
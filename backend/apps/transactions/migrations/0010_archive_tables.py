@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('risk', '0005_suspiciouslocation'),
+        ('transactions', '0009_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('transfer', 'Transfer')], default='transfer', max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('to_account_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('risk_score', models.IntegerField(default=0)),
+                ('current_lat', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('current_lng', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_transactions', to='risk.clientprofile')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedFraudAlert',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('level', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High'), ('CRITICAL', 'Critical')], max_length=20)),
+                ('risk_score', models.IntegerField()),
+                ('triggers', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('Active', 'Active'), ('Reviewed', 'Reviewed'), ('Resolved', 'Resolved')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fraud_alert', to='transactions.archivedtransaction')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['created_at', 'id'], name='archtxn_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtransaction',
+            index=models.Index(fields=['client', 'created_at'], name='archtxn_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedfraudalert',
+            index=models.Index(fields=['created_at', 'id'], name='archalert_created_id_idx'),
+        ),
+    ]
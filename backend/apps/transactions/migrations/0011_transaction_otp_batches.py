@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_archive_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='otp_batch',
+            field=models.UUIDField(blank=True, db_index=True, help_text='Bulk submission whose shared OTP confirms this transaction', null=True),
+        ),
+        migrations.AddField(
+            model_name='transactionotp',
+            name='batch',
+            field=models.UUIDField(blank=True, help_text='Transaction.otp_batch this code confirms', null=True),
+        ),
+        migrations.AlterField(
+            model_name='transactionotp',
+            name='transaction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='otps', to='transactions.transaction'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionotp',
+            index=models.Index(fields=['batch', 'user', 'used'], name='txnotp_batch_user_used_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+"""
+Viewset mixins for SafeNetAi transaction APIs
+Shapes list and retrieve querysets for the serializer that will render them, routes admin reads
+to the replica and reads archived rows where the request reaches them
+"""
+
+from django.http import Http404
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS
+from .archive import reaches_archive
+from apps.system.routers import route_reads_to_replica
+
+
+class EagerLoadingViewSetMixin:
+    """
+    Applies the serializer's setup_eager_loading() to list and retrieve querysets.
+    Hooked on filter_queryset so viewsets keep their own get_queryset untouched.
+    """
+    eager_loading_actions = ('list', 'retrieve')
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in self.eager_loading_actions:
+            setup_eager_loading = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+            if setup_eager_loading:
+                queryset = setup_eager_loading(queryset)
+        return queryset
+
+
+class ReplicaReadsMixin:
+    """
+    Serves read-only requests from the read replica when one is configured.
+    Applied after authentication, so users who just wrote stay on the primary.
+    """
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            route_reads_to_replica(request)
+
+
+class ArchiveReadsMixin:
+    """
+    Reads the archive table (archive_model) alongside the live one: listings and exports whose
+    created_after / created_before filters reach past the archive horizon merge in archived
+    rows, and retrieving an archived id falls back to the archive.
+    archive_filter applies the request's query parameters, as get_queryset does for live rows.
+    """
+    archive_model = None
+    archive_filter = None
+    archive_actions = ('list', 'export')
+    
+    def get_archive_queryset(self):
+        if self.action not in self.archive_actions or not reaches_archive(self.request.query_params):
+            return None
+        queryset = self.archive_filter(self.archive_model.objects.all(), self.request.query_params)
+        return self.filter_queryset(queryset)
+    
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve':
+                raise
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.archive_model.objects.all())
+        return get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 from apps.users.models import User
 from apps.risk.models import ClientProfile
@@ -28,18 +29,47 @@ class Transaction(models.Model):
     current_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text="Current transaction latitude")
     current_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, help_text="Current transaction longitude")
     
+    # Flagged transfers of one bulk submission share an OTP, verified once for all of them
+    otp_batch = models.UUIDField(null=True, blank=True, db_index=True, help_text="Bulk submission whose shared OTP confirms this transaction")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination of unfiltered listings on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='txn_created_id_idx'),
+            # RiskEngine windowed counts and recent-location fallback: client + time window
+            models.Index(fields=['client', 'created_at'], name='txn_client_created_idx'),
+            # RiskEngine last verified (completed) transaction lookup
+            models.Index(fields=['client', 'status', 'created_at'], name='txn_client_status_created_idx'),
+            # Admin listings filtered by status / type, newest first
+            models.Index(fields=['status', 'created_at'], name='txn_status_created_idx'),
+            models.Index(fields=['transaction_type', 'created_at'], name='txn_type_created_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save receivers can detect status changes
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have run with the previous status; from here on it is stored
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'status' in update_fields:
+            self._loaded_status = self.status
     
     def __str__(self):
         return f"Transfer - {self.amount} DZD - {self.status}"
 
 class TransactionOTP(models.Model):
-    """OTP model for transaction verification"""
-    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='otps')
+    """OTP model for transaction verification: for one transaction, or for a bulk submission's batch"""
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='otps', null=True, blank=True)
+    batch = models.UUIDField(null=True, blank=True, help_text="Transaction.otp_batch this code confirms")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transaction_otps')
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -48,7 +78,9 @@ class TransactionOTP(models.Model):
     used = models.BooleanField(default=False)
     
     def __str__(self):
-        return f"Transaction OTP for {self.user.email} - Transaction #{self.transaction.id}"
+        if self.batch:
+            return f"Transaction OTP for {self.user.email} - Batch {self.batch}"
+        return f"Transaction OTP for {self.user.email} - Transaction #{self.transaction_id}"
     
     def is_expired(self):
         return timezone.now() > self.expires_at
@@ -58,14 +90,19 @@ class TransactionOTP(models.Model):
     
     def increment_attempts(self):
         self.attempts += 1
-        self.save()
+        self.save(update_fields=['attempts'])
     
     def mark_used(self):
         self.used = True
-        self.save()
+        self.save(update_fields=['used'])
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # OTP services look up the active code by (transaction, user, used)
+            models.Index(fields=['transaction', 'user', 'used'], name='txnotp_txn_user_used_idx'),
+            models.Index(fields=['batch', 'user', 'used'], name='txnotp_batch_user_used_idx'),
+        ]
 
 class FraudAlert(models.Model):
     LEVEL_CHOICES = [
@@ -90,7 +127,153 @@ class FraudAlert(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination of unfiltered listings on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='alert_created_id_idx'),
+            # Admin alert listings filtered by status / level, newest first
+            models.Index(fields=['status', 'created_at'], name='alert_status_created_idx'),
+            models.Index(fields=['level', 'created_at'], name='alert_level_created_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save receivers can detect status changes
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have run with the previous status; from here on it is stored
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'status' in update_fields:
+            self._loaded_status = self.status
     
     def __str__(self):
         return f"Fraud Alert - {self.level} - Transaction #{self.transaction.id}"
+
+
+class IdempotencyKey(models.Model):
+    """Client-supplied Idempotency-Key claimed by a request, with the response to replay on retries"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='idempotency_keys')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            # Expired key sweeps
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+    
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+    
+    def __str__(self):
+        return f"Idempotency key {self.key} - {self.user.email}"
+
+class TransactionDailyRollup(models.Model):
+    """Transactions per day and status, maintained incrementally by apps.transactions.rollups"""
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+    transaction_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['-day', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='txn_rollup_day_status_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.status}: {self.transaction_count}"
+
+class ClientDailyRollup(models.Model):
+    """Transactions per day and client, maintained incrementally by apps.transactions.rollups"""
+    day = models.DateField()
+    client = models.ForeignKey(ClientProfile, on_delete=models.CASCADE, related_name='daily_rollups')
+    transaction_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['client', 'day'], name='client_rollup_client_day_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.client.full_name}: {self.transaction_count}"
+
+class FraudAlertDailyRollup(models.Model):
+    """Fraud alerts per day, level and status, maintained incrementally by apps.transactions.rollups"""
+    day = models.DateField()
+    level = models.CharField(max_length=20, choices=FraudAlert.LEVEL_CHOICES)
+    status = models.CharField(max_length=20, choices=FraudAlert.STATUS_CHOICES)
+    alert_count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-day', 'level', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'level', 'status'], name='alert_rollup_day_level_status_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.level}/{self.status}: {self.alert_count}"
+
+class ArchivedTransaction(models.Model):
+    """A completed, failed or cancelled transaction moved out of the hot table by apps.transactions.archive"""
+    # Keeps the original Transaction id, so links and export cursors stay valid
+    id = models.BigIntegerField(primary_key=True)
+    client = models.ForeignKey(ClientProfile, on_delete=models.CASCADE, related_name='archived_transactions')
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES, default='transfer')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    to_account_number = models.CharField(max_length=20, blank=True, null=True)
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+    risk_score = models.IntegerField(default=0)
+    current_lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    current_lng = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Keyset pagination merged with the live listing, and date-bounded reads
+            models.Index(fields=['created_at', 'id'], name='archtxn_created_id_idx'),
+            # Per-client history for statistics and admin filters
+            models.Index(fields=['client', 'created_at'], name='archtxn_client_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived transfer - {self.amount} DZD - {self.status}"
+
+class ArchivedFraudAlert(models.Model):
+    """The fraud alert of an archived transaction"""
+    id = models.BigIntegerField(primary_key=True)
+    transaction = models.OneToOneField(ArchivedTransaction, on_delete=models.CASCADE, related_name='fraud_alert')
+    level = models.CharField(max_length=20, choices=FraudAlert.LEVEL_CHOICES)
+    risk_score = models.IntegerField()
+    triggers = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=FraudAlert.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='archalert_created_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived fraud alert - {self.level} - Transaction #{self.transaction_id}"
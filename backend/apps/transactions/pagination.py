@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination for SafeNetAi
+Pages transaction and fraud alert listings on (created_at, id) so every page costs the same
+"""
+
+import base64
+import json
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first pagination on the (created_at, id) pair.
+
+    The cursor is the key of the last row served, so fetching a page is an index range
+    scan of page_size + 1 rows regardless of how deep the client has paged. Any filters
+    applied in get_queryset compose with the cursor, since it only adds a key predicate.
+    Views with a get_archive_queryset() returning a queryset get its rows merged in.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'TRANSACTION_LIST_PAGE_SIZE', 50)
+        maximum = getattr(settings, 'TRANSACTION_LIST_MAX_PAGE_SIZE', 500)
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        if page_size <= 0:
+            return default
+        return min(page_size, maximum)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['reverse'])
+
+        rows = self.fetch_page(queryset, cursor)
+        archive = view.get_archive_queryset() if hasattr(view, 'get_archive_queryset') else None
+        if archive is not None:
+            # Both tables share the (created_at, id) key space: merge their pages
+            rows = sorted(
+                rows + self.fetch_page(archive, cursor),
+                key=lambda row: (row.created_at, row.id),
+                reverse=not self.reverse
+            )[:self.page_size + 1]
+
+        self.has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.has_cursor = cursor is not None
+        self.page = rows
+        return rows
+
+    def fetch_page(self, queryset, cursor):
+        """Up to page_size + 1 rows past the cursor, in the walking direction"""
+        if cursor:
+            created_at, pk = cursor['created_at'], cursor['id']
+            if self.reverse:
+                # Walking back towards newer rows
+                queryset = queryset.filter(created_at__gte=created_at).filter(
+                    Q(created_at__gt=created_at) | Q(id__gt=pk)
+                )
+            else:
+                # created_at__lte narrows the index range; the OR breaks ties on id
+                queryset = queryset.filter(created_at__lte=created_at).filter(
+                    Q(created_at__lt=created_at) | Q(id__lt=pk)
+                )
+
+        ordering = ('created_at', 'id') if self.reverse else ('-created_at', '-id')
+        return list(queryset.order_by(*ordering)[:self.page_size + 1])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        # Going forward there are older rows when this page overflowed, or always when
+        # this page was reached by walking back from them
+        has_next = self.reverse or self.has_more
+        if not self.page or not has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        has_previous = self.has_more if self.reverse else self.has_cursor
+        if not self.page or not has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        payload = {'c': row.created_at.isoformat(), 'i': row.id}
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('ascii'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            created_at = parse_datetime(payload['c'])
+            pk = int(payload['i'])
+        except (TypeError, ValueError, KeyError, UnicodeError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'created_at': created_at, 'id': pk, 'reverse': bool(payload.get('r'))}
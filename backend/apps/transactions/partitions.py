@@ -0,0 +1,228 @@
+"""
+Monthly range partitioning for SafeNetAi
+Opt-in (PostgreSQL only): converts the transactions table to one partition per month of created_at and keeps future months created
+"""
+
+from datetime import date, datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from .models import Transaction
+from apps.utils.logger import get_transactions_logger, log_system_event
+
+logger = get_transactions_logger()
+
+# Catches rows outside every monthly range, so inserts never fail if creating partitions falls behind
+DEFAULT_PARTITION_SUFFIX = 'default'
+
+
+def partitioning_supported(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def table_name():
+    return Transaction._meta.db_table
+
+
+def months_ahead():
+    """How many months past the current one always have a partition ready"""
+    return getattr(settings, 'TRANSACTION_PARTITION_MONTHS_AHEAD', 3)
+
+
+def month_start(value):
+    """First day of the (UTC) month containing a date or datetime"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc).date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(first, last):
+    """First days of every month from first to last, both included"""
+    month = month_start(first)
+    while month <= month_start(last):
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(month):
+    return f'{table_name()}_p{month:%Y%m}'
+
+
+def _bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def create_partition_sql(month, parent=None):
+    """DDL for the partition holding created_at in [month, next month)"""
+    qn = connection.ops.quote_name
+    return (
+        f'CREATE TABLE IF NOT EXISTS {qn(partition_name(month))} PARTITION OF {qn(parent or table_name())} '
+        f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})'
+    )
+
+
+def is_partitioned():
+    """Whether the transactions table is already a partitioned table"""
+    if not partitioning_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table_name()]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """(name, bound expression) of each partition, in name order"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) '
+            'FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY child.relname',
+            [table_name()]
+        )
+        return cursor.fetchall()
+
+
+def ensure_partitions(now=None, ahead=None):
+    """
+    Create the partitions for the current month and the next `ahead` months that do not exist yet.
+    Returns the names created. No-op unless the table is partitioned.
+    """
+    if not is_partitioned():
+        return []
+    now = now or datetime.now(dt_timezone.utc)
+    ahead = months_ahead() if ahead is None else ahead
+    existing = {name for name, _ in list_partitions()}
+
+    created = []
+    with connection.cursor() as cursor:
+        for month in month_range(now, add_months(month_start(now), ahead)):
+            if partition_name(month) not in existing:
+                # Fails if the default partition already holds rows for this month; the error names it
+                cursor.execute(create_partition_sql(month))
+                created.append(partition_name(month))
+    if created:
+        logger.info(f"Created transaction partitions: {', '.join(created)}")
+        log_system_event("Transaction partitions created", "partitions", "INFO", {"partitions": created})
+    return created
+
+
+def drop_empty_partitions(before):
+    """
+    Drop monthly partitions that end on or before `before` (a date) and hold no rows, e.g.
+    once archive_transactions has moved their settled transactions out. Returns the names dropped.
+    """
+    qn = connection.ops.quote_name
+    cutoff = month_start(before)
+    dropped = []
+    with connection.cursor() as cursor:
+        for name, _ in list_partitions():
+            suffix = name[len(table_name()) + 2:]
+            if not (name.startswith(f'{table_name()}_p') and suffix.isdigit()):
+                continue
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            if add_months(month, 1) > cutoff:
+                continue
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {qn(name)})')
+            if cursor.fetchone()[0]:
+                continue
+            # Detaching first only takes a brief lock on the parent
+            cursor.execute(f'ALTER TABLE {qn(table_name())} DETACH PARTITION {qn(name)}')
+            cursor.execute(f'DROP TABLE {qn(name)}')
+            dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped empty transaction partitions: {', '.join(dropped)}")
+        log_system_event("Transaction partitions dropped", "partitions", "INFO", {"partitions": dropped})
+    return dropped
+
+
+def _fetch(cursor, sql, params):
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def convert_to_partitioned(ahead=None):
+    """
+    Rebuild the transactions table as a partitioned table, in one transaction that holds an
+    exclusive lock for the copy (run it in a maintenance window).
+
+    PostgreSQL requires every unique constraint on a partitioned table to include the partition
+    key, so the primary key becomes (id, created_at) and ids come from a plain sequence. For the
+    same reason foreign keys from other tables (fraud alerts, OTPs, idempotency keys) cannot point
+    at the partitioned table: their constraints are dropped, and Django's on_delete handling,
+    which runs in the application rather than the database, keeps the related rows consistent.
+    Returns the partitions created and the foreign keys dropped.
+    """
+    qn = connection.ops.quote_name
+    table = table_name()
+    staging = f'{table}_partitioned'
+    sequence = f'{table}_id_seq'
+    ahead = months_ahead() if ahead is None else ahead
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+
+        incoming = _fetch(cursor, (
+            'SELECT conrelid::regclass::text, conname FROM pg_constraint '
+            "WHERE contype = 'f' AND confrelid = to_regclass(%s) AND conrelid <> confrelid"
+        ), [table])
+        # Recreated on the new table under the same names once the old one is gone
+        outgoing = _fetch(cursor, (
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            "WHERE contype = 'f' AND conrelid = to_regclass(%s)"
+        ), [table])
+        indexes = [row[0] for row in _fetch(cursor, (
+            'SELECT pg_get_indexdef(indexrelid) FROM pg_index '
+            'WHERE indrelid = to_regclass(%s) AND NOT indisprimary'
+        ), [table])]
+        first, last_id = _fetch(cursor, f'SELECT MIN(created_at), MAX(id) FROM {qn(table)}', [])[0]
+
+        for referencing, name in incoming:
+            cursor.execute(f'ALTER TABLE {referencing} DROP CONSTRAINT {qn(name)}')
+
+        cursor.execute(
+            f'CREATE TABLE {qn(staging)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        now = datetime.now(dt_timezone.utc)
+        months = list(month_range(first or now, add_months(month_start(now), ahead)))
+        for month in months:
+            cursor.execute(create_partition_sql(month, parent=staging))
+        cursor.execute(
+            f'CREATE TABLE {qn(f"{table}_{DEFAULT_PARTITION_SUFFIX}")} PARTITION OF {qn(staging)} DEFAULT'
+        )
+        cursor.execute(f'INSERT INTO {qn(staging)} SELECT * FROM {qn(table)}')
+
+        cursor.execute(f'DROP TABLE {qn(table)}')
+        cursor.execute(f'ALTER TABLE {qn(staging)} RENAME TO {qn(table)}')
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, created_at)')
+
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id')
+        if last_id is not None:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, last_id])
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+        # Indexes on the parent cascade to every partition, present and future
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in outgoing:
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+
+    result = {
+        'partitions': [partition_name(month) for month in months],
+        'dropped_foreign_keys': [f'{referencing}.{name}' for referencing, name in incoming],
+    }
+    logger.info(f"Partitioned {table} into {len(months)} monthly partitions")
+    log_system_event("Transactions table partitioned", "partitions", "INFO", result)
+    return result
+
+
+def ensure_partitions_after_migrate(sender, using='default', **kwargs):
+    """post_migrate receiver: keep future partitions created on deployments that use partitioning"""
+    if using == 'default' and partitioning_supported():
+        ensure_partitions()
@@ -0,0 +1,250 @@
+"""
+Daily rollup maintenance for SafeNetAi
+Keeps per-day transaction and fraud alert counts current so time-windowed stats never scan the raw tables
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, Upper
+from django.utils import timezone
+from .models import (
+    Transaction, FraudAlert, TransactionDailyRollup, ClientDailyRollup, FraudAlertDailyRollup,
+    ArchivedTransaction, ArchivedFraudAlert
+)
+from apps.utils.logger import get_transactions_logger
+
+logger = get_transactions_logger()
+
+# Set while rows move to the archive: they leave the live tables but still count in the rollups
+_preserving = ContextVar('rollups_preserving', default=False)
+
+
+@contextmanager
+def preserve_rollups():
+    """Deletions inside the block leave the rollups untouched"""
+    token = _preserving.set(True)
+    try:
+        yield
+    finally:
+        _preserving.reset(token)
+
+
+def rollups_preserved():
+    return _preserving.get()
+
+
+def rollup_day(value):
+    """The rollup bucket for a timestamp: its date in the current time zone"""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def normalize_level(level):
+    """RiskEngine writes 'High' while the model choices are 'HIGH'; roll both up together"""
+    return str(level).upper()
+
+
+def _apply_delta(model, keys, deltas, create=True):
+    """
+    Add deltas to the rollup row identified by keys once the surrounding transaction commits.
+    Every create shares its day's (day, status) row, so incrementing it inside the create's
+    transaction would hold that row's lock until commit and serialize concurrent writers;
+    deferred, the lock lasts one autocommit UPDATE and rolled-back writes never touch it.
+    A delta lost to a crash between commit and callback is restored by rebuild_rollups.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # robust: a failed rollup update is logged by Django instead of failing a committed request
+    transaction.on_commit(lambda: _apply_delta_now(model, keys, deltas, create), robust=True)
+
+
+def _apply_delta_now(model, keys, deltas, create):
+    """
+    A single UPDATE ... SET x = x + d. The row is created on first use; decrements never
+    create rows, since a missing row means it was already removed (e.g. by a cascade deleting the client).
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**keys).update(**updates) or not create:
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:
+        # A concurrent writer created the row first
+        model.objects.filter(**keys).update(**updates)
+
+
+def record_transaction(txn, sign=1):
+    """Count a transaction in (sign=1) or out of (sign=-1) its day's rollups"""
+    day = rollup_day(txn.created_at)
+    deltas = {'transaction_count': sign, 'total_amount': Decimal(str(txn.amount)) * sign}
+    create = sign > 0
+
+    _apply_delta(TransactionDailyRollup, {'day': day, 'status': txn.status}, deltas, create)
+    _apply_delta(ClientDailyRollup, {'day': day, 'client_id': txn.client_id}, deltas, create)
+
+
+def move_transaction_status(txn, old_status):
+    """Move a transaction between status buckets of its day"""
+    day = rollup_day(txn.created_at)
+    amount = Decimal(str(txn.amount))
+
+    _apply_delta(TransactionDailyRollup, {'day': day, 'status': old_status},
+                 {'transaction_count': -1, 'total_amount': -amount}, create=False)
+    _apply_delta(TransactionDailyRollup, {'day': day, 'status': txn.status},
+                 {'transaction_count': 1, 'total_amount': amount})
+
+
+def record_fraud_alert(alert, sign=1):
+    """Count a fraud alert in (sign=1) or out of (sign=-1) its day's rollup"""
+    keys = {'day': rollup_day(alert.created_at), 'level': normalize_level(alert.level), 'status': alert.status}
+    _apply_delta(FraudAlertDailyRollup, keys, {'alert_count': sign}, create=sign > 0)
+
+
+def move_fraud_alert_status(alert, old_status):
+    """Move a fraud alert between status buckets of its day and level"""
+    day, level = rollup_day(alert.created_at), normalize_level(alert.level)
+    _apply_delta(FraudAlertDailyRollup, {'day': day, 'level': level, 'status': old_status},
+                 {'alert_count': -1}, create=False)
+    _apply_delta(FraudAlertDailyRollup, {'day': day, 'level': level, 'status': alert.status},
+                 {'alert_count': 1})
+
+
+def _apply_grouped(model, groups, count_field, create=True):
+    """Apply {keys tuple: (count, amount)} deltas, one UPDATE per rollup row"""
+    for keys, (count, amount) in groups.items():
+        deltas = {count_field: count}
+        if amount is not None:
+            deltas['total_amount'] = amount
+        _apply_delta(model, dict(keys), deltas, create)
+
+
+def record_transactions(transactions):
+    """
+    Count rows inserted with bulk_create (which bypasses post_save) into the rollups,
+    grouped so a batch costs one UPDATE per (day, status) and (day, client) row
+    """
+    by_status = defaultdict(lambda: [0, Decimal('0')])
+    by_client = defaultdict(lambda: [0, Decimal('0')])
+    for txn in transactions:
+        day, amount = rollup_day(txn.created_at), Decimal(str(txn.amount))
+        for group in (by_status[(('day', day), ('status', txn.status))],
+                      by_client[(('day', day), ('client_id', txn.client_id))]):
+            group[0] += 1
+            group[1] += amount
+
+    _apply_grouped(TransactionDailyRollup, by_status, 'transaction_count')
+    _apply_grouped(ClientDailyRollup, by_client, 'transaction_count')
+
+
+def move_transactions_status(transactions, old_status):
+    """Grouped move_transaction_status for rows updated with bulk_update"""
+    moved_out = defaultdict(lambda: [0, Decimal('0')])
+    moved_in = defaultdict(lambda: [0, Decimal('0')])
+    for txn in transactions:
+        if txn.status == old_status:
+            continue
+        day, amount = rollup_day(txn.created_at), Decimal(str(txn.amount))
+        for group, status, sign in ((moved_out, old_status, -1), (moved_in, txn.status, 1)):
+            entry = group[(('day', day), ('status', status))]
+            entry[0] += sign
+            entry[1] += amount * sign
+
+    _apply_grouped(TransactionDailyRollup, moved_out, 'transaction_count', create=False)
+    _apply_grouped(TransactionDailyRollup, moved_in, 'transaction_count')
+
+
+def record_fraud_alerts(alerts):
+    """Count alerts inserted with bulk_create into the rollups, one UPDATE per (day, level, status)"""
+    groups = defaultdict(lambda: [0, None])
+    for alert in alerts:
+        keys = (('day', rollup_day(alert.created_at)), ('level', normalize_level(alert.level)), ('status', alert.status))
+        groups[keys][0] += 1
+
+    _apply_grouped(FraudAlertDailyRollup, groups, 'alert_count')
+
+
+def _day_bounds(start_day, end_day):
+    """Aware datetime filter on created_at covering [start_day, end_day]"""
+    bounds = {}
+    if start_day:
+        bounds['created_at__gte'] = timezone.make_aware(datetime.combine(start_day, time.min))
+    if end_day:
+        bounds['created_at__lt'] = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min))
+    return bounds
+
+
+def _day_range(start_day, end_day):
+    day_range = {}
+    if start_day:
+        day_range['day__gte'] = start_day
+    if end_day:
+        day_range['day__lte'] = end_day
+    return day_range
+
+
+def _grouped(querysets, keys, **aggregates):
+    """GROUP BY keys over each queryset, with the aggregates summed per group across them"""
+    merged = {}
+    for queryset in querysets:
+        for row in queryset.values(*keys).annotate(**aggregates).order_by():
+            group = tuple(row[key] for key in keys)
+            if group in merged:
+                for name in aggregates:
+                    merged[group][name] += row[name]
+            else:
+                merged[group] = row
+    return merged.values()
+
+
+@transaction.atomic
+def rebuild_rollups(start_day=None, end_day=None):
+    """
+    Recompute the rollups for [start_day, end_day] (open-ended when None) from the raw and
+    archive tables: one GROUP BY per rollup and table. Returns the number of rollup rows written per table.
+    """
+    bounds = _day_bounds(start_day, end_day)
+    day_range = _day_range(start_day, end_day)
+
+    TransactionDailyRollup.objects.filter(**day_range).delete()
+    ClientDailyRollup.objects.filter(**day_range).delete()
+    FraudAlertDailyRollup.objects.filter(**day_range).delete()
+
+    # Archived rows keep counting towards their day
+    transactions = [
+        model.objects.filter(**bounds).annotate(day=TruncDate('created_at'))
+        for model in (Transaction, ArchivedTransaction)
+    ]
+    status_rows = TransactionDailyRollup.objects.bulk_create([
+        TransactionDailyRollup(**row)
+        for row in _grouped(transactions, ('day', 'status'), transaction_count=Count('id'), total_amount=Sum('amount'))
+    ], batch_size=1000)
+    client_rows = ClientDailyRollup.objects.bulk_create([
+        ClientDailyRollup(**row)
+        for row in _grouped(transactions, ('day', 'client_id'), transaction_count=Count('id'), total_amount=Sum('amount'))
+    ], batch_size=1000)
+
+    alerts = [
+        model.objects.filter(**bounds).annotate(day=TruncDate('created_at'), level_key=Upper('level'))
+        for model in (FraudAlert, ArchivedFraudAlert)
+    ]
+    alert_rows = FraudAlertDailyRollup.objects.bulk_create([
+        FraudAlertDailyRollup(day=row['day'], level=row['level_key'], status=row['status'], alert_count=row['alert_count'])
+        for row in _grouped(alerts, ('day', 'level_key', 'status'), alert_count=Count('id'))
+    ], batch_size=1000)
+
+    logger.info(f"Rollups rebuilt for {start_day or 'beginning'}..{end_day or 'today'}: "
+                f"{len(status_rows)} status, {len(client_rows)} client, {len(alert_rows)} alert rows")
+    return {
+        'transaction_rows': len(status_rows),
+        'client_rows': len(client_rows),
+        'alert_rows': len(alert_rows),
+    }
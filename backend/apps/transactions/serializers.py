@@ -1,12 +1,46 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Transaction, FraudAlert
 from apps.risk.models import ClientProfile
 
-class TransactionSerializer(serializers.ModelSerializer):
+# Columns read by the transaction serializers, including the client fields behind
+# client_name / client_email / from_account
+TRANSACTION_LIST_FIELDS = (
+    'id', 'client_id', 'amount', 'transaction_type', 'to_account_number', 'status',
+    'description', 'risk_score', 'created_at',
+    'client__id', 'client__first_name', 'client__last_name', 'client__bank_account_number',
+    'client__user__id', 'client__user__email',
+)
+
+FRAUD_ALERT_LIST_FIELDS = (
+    'id', 'transaction_id', 'level', 'risk_score', 'triggers', 'status', 'created_at',
+) + tuple(f'transaction__{field}' for field in TRANSACTION_LIST_FIELDS)
+
+
+class EagerLoadingMixin:
+    """
+    Serializers declare the relations and columns they read so list and retrieve
+    querysets can be shaped once, instead of issuing a query per related row
+    """
+    select_related_fields = ()
+    only_fields = ()
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.only_fields:
+            queryset = queryset.only(*cls.only_fields)
+        return queryset
+
+class TransactionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     client_name = serializers.CharField(source='client.full_name', read_only=True)
     client_email = serializers.EmailField(source='client.user.email', read_only=True)
     from_account = serializers.CharField(source='client.bank_account_number', read_only=True)
     
+    select_related_fields = ('client__user',)
+    only_fields = TRANSACTION_LIST_FIELDS
+    
     class Meta:
         model = Transaction
         fields = ['id', 'client', 'client_name', 'client_email', 'amount', 'transaction_type',
@@ -20,9 +54,8 @@ class CreateTransactionSerializer(serializers.ModelSerializer):
         fields = ['amount', 'transaction_type', 'to_account_number', 'description']
     
     def validate(self, attrs):
-        user = self.context['request'].user
         try:
-            client_profile = ClientProfile.objects.get(user=user)
+            client_profile = self.context['request'].client_profile.get()
         except ClientProfile.DoesNotExist:
             raise serializers.ValidationError("Client profile not found")
         
@@ -35,28 +68,54 @@ class CreateTransactionSerializer(serializers.ModelSerializer):
         
         return attrs
 
-class AdminTransactionSerializer(serializers.ModelSerializer):
+class BulkTransferItemSerializer(serializers.ModelSerializer):
+    """One transfer of a bulk submission; funds are checked against the running balance in the view"""
+    
+    class Meta:
+        model = Transaction
+        fields = ['amount', 'transaction_type', 'to_account_number', 'description']
+
+class BulkTransferSerializer(serializers.Serializer):
+    transfers = BulkTransferItemSerializer(many=True, allow_empty=False)
+    current_location = serializers.DictField(required=False)
+    
+    def validate_transfers(self, transfers):
+        max_items = getattr(settings, 'BULK_TRANSFER_MAX_ITEMS', 500)
+        if len(transfers) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} transfers can be submitted at once")
+        return transfers
+
+class AdminTransactionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     client_name = serializers.CharField(source='client.full_name', read_only=True)
     client_email = serializers.EmailField(source='client.user.email', read_only=True)
     from_account = serializers.CharField(source='client.bank_account_number', read_only=True)
     
+    select_related_fields = ('client__user',)
+    only_fields = TRANSACTION_LIST_FIELDS
+    
     class Meta:
         model = Transaction
         fields = ['id', 'client', 'client_name', 'client_email', 'amount', 'transaction_type',
                  'from_account', 'to_account_number', 'status', 'description', 'risk_score', 'created_at']
 
-class FraudAlertSerializer(serializers.ModelSerializer):
+class FraudAlertSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     transaction_details = TransactionSerializer(source='transaction', read_only=True)
     
+    select_related_fields = ('transaction__client__user',)
+    only_fields = FRAUD_ALERT_LIST_FIELDS
+    
     class Meta:
         model = FraudAlert
         fields = ['id', 'transaction', 'transaction_details', 'risk_score', 'level', 
                  'triggers', 'status', 'created_at']
         read_only_fields = ['transaction', 'risk_score', 'level', 'triggers', 'created_at']
 
-class AdminFraudAlertSerializer(serializers.ModelSerializer):
+class AdminFraudAlertSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     transaction_details = AdminTransactionSerializer(source='transaction', read_only=True)
     
+    select_related_fields = ('transaction__client__user',)
+    only_fields = FRAUD_ALERT_LIST_FIELDS
+    
     class Meta:
         model = FraudAlert
         fields = ['id', 'transaction', 'transaction_details', 'risk_score', 'level', 
@@ -9,40 +9,40 @@ from datetime import timedelta
 from django.conf import settings
 from .models import TransactionOTP
 from apps.users.email_service import send_otp_email, send_security_otp_email_async
+from apps.users.otp_store import (
+    get_otp_store, transaction_otp_ttl, PURPOSE_TRANSACTION, PURPOSE_TRANSACTION_BATCH,
+    OTP_VALID, OTP_EXPIRED, OTP_LOCKED, OTP_MISSING
+)
+from apps.users.sweeper import sweep_expired
 from apps.utils.logger import get_transactions_logger, log_system_event
 
 logger = get_transactions_logger()
 
+# User-facing reasons for failed verifications; anything else is a wrong code
+OTP_ERRORS = {
+    OTP_MISSING: 'No valid OTP found for this transaction',
+    OTP_EXPIRED: 'OTP has expired',
+    OTP_LOCKED: 'Too many failed attempts',
+}
+
 def generate_transaction_otp():
     """Generate a 6-digit OTP for transaction verification"""
     return str(random.randint(100000, 999999))
 
 def create_transaction_otp(transaction, user):
-    """Create and send OTP for transaction verification"""
+    """Create and send OTP for transaction verification; returns the code, or None if sending failed"""
     try:
         logger.info(f"Creating transaction OTP for transaction {transaction.id}, user {user.email}")
         
-        # Delete any existing unused OTPs for this transaction
-        deleted_count = TransactionOTP.objects.filter(
-            transaction=transaction, 
-            used=False
-        ).delete()[0]
-        
-        if deleted_count > 0:
-            logger.info(f"Deleted {deleted_count} existing unused OTPs for transaction {transaction.id}")
+        # Replaces any existing unused OTP for this transaction
+        store = get_otp_store()
+        otp = store.issue(PURPOSE_TRANSACTION, user, transaction_otp_ttl(), subject=transaction.id,
+                          code=generate_transaction_otp())
         
-        # Create new OTP
-        otp = TransactionOTP.objects.create(
-            transaction=transaction,
-            user=user,
-            otp=generate_transaction_otp(),
-            expires_at=timezone.now() + timedelta(minutes=10)  # 10 minutes expiry
-        )
-        
-        logger.info(f"Created transaction OTP {otp.otp} for transaction {transaction.id}, expires at {otp.expires_at}")
+        logger.info(f"Created transaction OTP for transaction {transaction.id}")
         
         # Send security OTP email asynchronously
-        success = send_security_otp_email_async(user, otp.otp, transaction)
+        success = send_security_otp_email_async(user, otp, transaction)
         
         if success:
             logger.info(f"Transaction OTP created and sent successfully for transaction {transaction.id}")
@@ -53,8 +53,7 @@ def create_transaction_otp(transaction, user):
                 {
                     "user_email": user.email,
                     "user_id": user.id,
-                    "transaction_id": transaction.id,
-                    "otp_id": otp.id
+                    "transaction_id": transaction.id
                 }
             )
             return otp
@@ -67,11 +66,10 @@ def create_transaction_otp(transaction, user):
                 {
                     "user_email": user.email,
                     "user_id": user.id,
-                    "transaction_id": transaction.id,
-                    "otp_id": otp.id
+                    "transaction_id": transaction.id
                 }
             )
-            otp.delete()
+            store.discard(PURPOSE_TRANSACTION, user, [transaction.id])
             return None
             
     except Exception as e:
@@ -89,54 +87,71 @@ def create_transaction_otp(transaction, user):
         )
         return None
 
-def verify_transaction_otp(transaction_id, otp_code, user):
-    """Verify transaction OTP and mark as used"""
+def create_batch_transaction_otp(batch_id, transactions, user):
+    """
+    Create one OTP for a batch of flagged transactions (all with otp_batch = batch_id) and send a
+    single email. The code is stored once under the batch, so one verification, with one attempt
+    counter, confirms every transaction in it. Returns the code, or None if sending failed.
+    """
+    if not transactions:
+        return None
+    
+    transaction_ids = [transaction.id for transaction in transactions]
     try:
-        logger.info(f"Verifying transaction OTP for transaction {transaction_id}, user {user.email}")
+        logger.info(f"Creating shared OTP for {len(transactions)} transactions in batch {batch_id}, user {user.email}")
         
-        # Find the OTP
-        transaction_otp = TransactionOTP.objects.filter(
-            transaction_id=transaction_id,
-            user=user,
-            used=False
-        ).first()
+        store = get_otp_store()
+        code = store.issue(PURPOSE_TRANSACTION_BATCH, user, transaction_otp_ttl(), subject=batch_id,
+                           code=generate_transaction_otp())
         
-        if not transaction_otp:
-            logger.warning(f"No valid OTP found for transaction {transaction_id}, user {user.email}")
-            return {
-                'success': False,
-                'error': 'No valid OTP found for this transaction'
-            }
+        if send_security_otp_email_async(user, code, transactions[0]):
+            log_system_event(
+                "Shared transaction OTP created and sent successfully",
+                "transactions",
+                "INFO",
+                {
+                    "user_email": user.email,
+                    "user_id": user.id,
+                    "batch_id": str(batch_id),
+                    "transaction_ids": transaction_ids
+                }
+            )
+            return code
         
-        # Check if OTP is expired
-        if transaction_otp.is_expired():
-            logger.warning(f"Transaction OTP expired for transaction {transaction_id}")
-            transaction_otp.mark_used()  # Mark as used to prevent reuse
-            return {
-                'success': False,
-                'error': 'OTP has expired'
-            }
+        logger.error(f"Failed to send shared OTP email for batch {batch_id}, deleting OTP")
+        store.discard(PURPOSE_TRANSACTION_BATCH, user, [batch_id])
+        return None
         
-        # Check if too many attempts
-        if transaction_otp.attempts >= 3:
-            logger.warning(f"Too many OTP attempts for transaction {transaction_id}")
-            transaction_otp.mark_used()
-            return {
-                'success': False,
-                'error': 'Too many failed attempts'
+    except Exception as e:
+        logger.error(f"Error creating shared transaction OTP for transactions {transaction_ids}: {e}")
+        log_system_event(
+            "Error creating shared transaction OTP",
+            "transactions",
+            "ERROR",
+            {
+                "user_email": user.email,
+                "user_id": user.id,
+                "transaction_ids": transaction_ids,
+                "error": str(e)
             }
+        )
+        return None
+
+def verify_transaction_otp(transaction_id, otp_code, user):
+    """Verify transaction OTP and mark as used"""
+    try:
+        logger.info(f"Verifying transaction OTP for transaction {transaction_id}, user {user.email}")
+        
+        outcome = get_otp_store().verify(PURPOSE_TRANSACTION, user, otp_code, subject=transaction_id)
         
-        # Verify OTP
-        if transaction_otp.otp != otp_code:
-            transaction_otp.increment_attempts()
-            logger.warning(f"Invalid OTP attempt for transaction {transaction_id}, attempts: {transaction_otp.attempts}")
+        if outcome != OTP_VALID:
+            error = OTP_ERRORS.get(outcome, 'Invalid OTP code')
+            logger.warning(f"Transaction OTP verification failed for transaction {transaction_id}: {outcome}")
             return {
                 'success': False,
-                'error': 'Invalid OTP code'
+                'error': error
             }
         
-        # OTP is valid - mark as used
-        transaction_otp.mark_used()
         logger.info(f"Transaction OTP verified successfully for transaction {transaction_id}")
         
         log_system_event(
@@ -146,8 +161,7 @@ def verify_transaction_otp(transaction_id, otp_code, user):
             {
                 "user_email": user.email,
                 "user_id": user.id,
-                "transaction_id": transaction_id,
-                "otp_id": transaction_otp.id
+                "transaction_id": transaction_id
             }
         )
         
@@ -174,49 +188,69 @@ def verify_transaction_otp(transaction_id, otp_code, user):
             'error': 'Verification failed'
         }
 
-def cleanup_expired_otps():
-    """Clean up expired transaction OTPs"""
+def verify_batch_transaction_otp(batch_id, otp_code, user):
+    """Verify and consume a batch's shared OTP; on success every transaction in the batch is confirmed"""
     try:
-        expired_otps = TransactionOTP.objects.filter(
-            expires_at__lt=timezone.now(),
-            used=False
-        )
+        outcome = get_otp_store().verify(PURPOSE_TRANSACTION_BATCH, user, otp_code, subject=batch_id)
         
-        count = expired_otps.count()
-        expired_otps.delete()
+        if outcome != OTP_VALID:
+            logger.warning(f"Shared OTP verification failed for batch {batch_id}: {outcome}")
+            return {
+                'success': False,
+                'error': OTP_ERRORS.get(outcome, 'Invalid OTP code')
+            }
         
-        if count > 0:
-            logger.info(f"Cleaned up {count} expired transaction OTPs")
-            log_system_event(
-                "Expired transaction OTPs cleaned up",
-                "transactions",
-                "INFO",
-                {"expired_count": count}
-            )
+        logger.info(f"Shared OTP verified successfully for batch {batch_id}")
+        log_system_event(
+            "Shared transaction OTP verified successfully",
+            "transactions",
+            "INFO",
+            {
+                "user_email": user.email,
+                "user_id": user.id,
+                "batch_id": str(batch_id)
+            }
+        )
+        return {
+            'success': True,
+            'message': 'OTP verified successfully'
+        }
         
-        return count
+    except Exception as e:
+        logger.error(f"Error verifying shared OTP for batch {batch_id}: {e}")
+        return {
+            'success': False,
+            'error': 'Verification failed'
+        }
+
+def cleanup_expired_otps():
+    """Clean up expired transaction OTPs in bounded batches (see the sweep_expired_otps command)"""
+    try:
+        return sweep_expired(TransactionOTP)['deleted']
         
     except Exception as e:
         logger.error(f"Error cleaning up expired transaction OTPs: {e}")
         return 0
 
 def resend_transaction_otp(transaction_id, user):
-    """Resend transaction OTP"""
+    """Resend transaction OTP (the shared code, for a transaction in a bulk batch)"""
     try:
+        from .models import Transaction
+        batch_id = Transaction.objects.filter(id=transaction_id).values_list('otp_batch', flat=True).first()
+        if batch_id:
+            return _resend_batch_transaction_otp(batch_id, user)
+        
         logger.info(f"Attempting to resend transaction OTP for transaction {transaction_id}, user {user.email}")
         
-        # Check if user has a valid unused OTP for this transaction
-        existing_otp = TransactionOTP.objects.filter(
-            transaction_id=transaction_id,
-            user=user,
-            used=False
-        ).first()
+        # Resend the live OTP when the store can recover it (the cache store keeps only hashes)
+        existing_otp = get_otp_store().get_code(PURPOSE_TRANSACTION, user, subject=transaction_id)
         
-        if existing_otp and not existing_otp.is_expired():
-            logger.info(f"Resending existing transaction OTP {existing_otp.otp} for transaction {transaction_id}")
+        if existing_otp:
+            logger.info(f"Resending existing transaction OTP for transaction {transaction_id}")
             # Get transaction for email template
-            from apps.users.email_service import send_security_otp_email_async
-            success = send_security_otp_email_async(user, existing_otp.otp, existing_otp.transaction)
+            from .models import Transaction
+            transaction = Transaction.objects.get(id=transaction_id)
+            success = send_security_otp_email_async(user, existing_otp, transaction)
             if success:
                 log_system_event(
                     "Transaction OTP resent successfully",
@@ -225,8 +259,7 @@ def resend_transaction_otp(transaction_id, user):
                     {
                         "user_email": user.email,
                         "user_id": user.id,
-                        "transaction_id": transaction_id,
-                        "otp_id": existing_otp.id
+                        "transaction_id": transaction_id
                     }
                 )
             return success
@@ -255,3 +288,19 @@ def resend_transaction_otp(transaction_id, user):
             }
         )
         return False
+
+def _resend_batch_transaction_otp(batch_id, user):
+    """Resend a batch's live shared OTP, or issue a new one for its still-pending transactions"""
+    from .models import Transaction
+    pending = list(Transaction.objects.filter(otp_batch=batch_id, client__user=user, status='pending'))
+    if not pending:
+        logger.error(f"No pending transactions in batch {batch_id} when trying to resend its OTP")
+        return False
+    
+    existing_otp = get_otp_store().get_code(PURPOSE_TRANSACTION_BATCH, user, subject=batch_id)
+    if existing_otp:
+        logger.info(f"Resending existing shared OTP for batch {batch_id}")
+        return send_security_otp_email_async(user, existing_otp, pending[0])
+    
+    logger.info(f"No valid shared OTP found for batch {batch_id}, creating new one")
+    return create_batch_transaction_otp(batch_id, pending, user) is not None
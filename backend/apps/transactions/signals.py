@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Transaction
+from .models import Transaction, FraudAlert
+from .rollups import (
+    record_transaction, move_transaction_status, record_fraud_alert, move_fraud_alert_status, rollups_preserved
+)
 from apps.risk.engine import RiskEngine
 
 @receiver(post_save, sender=Transaction)
@@ -15,3 +18,41 @@ def detect_fraud_on_transaction(sender, instance, created, **kwargs):
         # Create fraud alert if risk is detected
         if risk_score >= 40:  # Medium or High risk
             engine.create_fraud_alert(instance, risk_score, triggers)
+
+def _status_changed(instance, created, update_fields):
+    """Return the previously stored status when this save moved the row to another status"""
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return None
+    previous_status = getattr(instance, '_loaded_status', None)
+    if previous_status is None or previous_status == instance.status:
+        return None
+    return previous_status
+
+@receiver(post_save, sender=Transaction)
+def roll_up_transaction(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the daily transaction rollups in step with inserts and status changes"""
+    previous_status = _status_changed(instance, created, update_fields)
+    if created:
+        record_transaction(instance)
+    elif previous_status:
+        move_transaction_status(instance, previous_status)
+
+@receiver(post_save, sender=FraudAlert)
+def roll_up_fraud_alert(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the daily fraud alert rollups in step with inserts and reviews"""
+    previous_status = _status_changed(instance, created, update_fields)
+    if created:
+        record_fraud_alert(instance)
+    elif previous_status:
+        move_fraud_alert_status(instance, previous_status)
+
+@receiver(post_delete, sender=Transaction)
+def roll_up_deleted_transaction(sender, instance, **kwargs):
+    # Archived rows are still counted
+    if not rollups_preserved():
+        record_transaction(instance, sign=-1)
+
+@receiver(post_delete, sender=FraudAlert)
+def roll_up_deleted_fraud_alert(sender, instance, **kwargs):
+    if not rollups_preserved():
+        record_fraud_alert(instance, sign=-1)
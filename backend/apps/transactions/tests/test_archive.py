@@ -0,0 +1,126 @@
+import json
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from apps.risk.models import ClientProfile
+from apps.transactions.archive import archive_transactions, client_amount_stats, stream_transactions
+from apps.transactions.models import (
+    Transaction, FraudAlert, TransactionOTP, ArchivedTransaction, ArchivedFraudAlert,
+    TransactionDailyRollup, FraudAlertDailyRollup
+)
+from apps.transactions.rollups import rebuild_rollups
+from apps.users.models import User
+
+class ArchiveTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            password='AdminPass123!'
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.client_profile = ClientProfile.objects.create(first_name='John', last_name='Doe', national_id='123456789')
+
+        now = timezone.now()
+        specs = [
+            # (days ago, status, amount)
+            (800, 'completed', '100.00'),
+            (700, 'failed', '200.00'),
+            (600, 'pending', '300.00'),
+            (500, 'completed', '400.00'),
+            (400, 'completed', '500.00'),
+            (10, 'completed', '600.00'),
+        ]
+        self.transactions = Transaction.objects.bulk_create([
+            Transaction(client=self.client_profile, amount=Decimal(amount), status=status)
+            for _, status, amount in specs
+        ])
+        for txn, (days, _, _) in zip(self.transactions, specs):
+            Transaction.objects.filter(pk=txn.pk).update(created_at=now - timedelta(days=days))
+        FraudAlert.objects.bulk_create([
+            FraudAlert(transaction=self.transactions[1], level='HIGH', risk_score=80, triggers=['Large amount'], status='Reviewed'),
+            # Still under review: stays live
+            FraudAlert(transaction=self.transactions[3], level='HIGH', risk_score=85, triggers=['Large amount'], status='Active'),
+        ])
+        FraudAlert.objects.filter(transaction__in=self.transactions[:4]).update(created_at=now - timedelta(days=700))
+        TransactionOTP.objects.create(
+            transaction=self.transactions[0], user=self.admin, otp='123456', expires_at=now - timedelta(days=800)
+        )
+        rebuild_rollups()
+
+    def _rollups(self):
+        return (
+            sorted(TransactionDailyRollup.objects.values_list('day', 'status', 'transaction_count', 'total_amount')),
+            sorted(FraudAlertDailyRollup.objects.values_list('day', 'level', 'status', 'alert_count')),
+        )
+
+    def _archive(self):
+        return archive_transactions(batch_size=2, pause=0)
+
+    def test_moves_settled_rows_past_horizon(self):
+        metrics = self._archive()
+
+        archived = [self.transactions[i].id for i in (0, 1, 4)]
+        self.assertEqual(metrics['transactions'], 3)
+        self.assertEqual(metrics['fraud_alerts'], 1)
+        self.assertEqual(sorted(ArchivedTransaction.objects.values_list('id', flat=True)), archived)
+        self.assertEqual(ArchivedFraudAlert.objects.get().transaction_id, self.transactions[1].id)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('id', flat=True)),
+            [self.transactions[i].id for i in (2, 3, 5)]
+        )
+        self.assertFalse(TransactionOTP.objects.exists())
+        self.assertEqual(ArchivedTransaction.objects.get(pk=archived[1]).amount, Decimal('200.00'))
+
+    def test_rollups_keep_archived_rows(self):
+        before = self._rollups()
+        self._archive()
+        self.assertEqual(self._rollups(), before)
+
+        rebuild_rollups()
+        self.assertEqual(self._rollups(), before)
+
+    def test_listing_merges_archive_when_filters_reach_back(self):
+        self._archive()
+        since = (timezone.now() - timedelta(days=1000)).date().isoformat()
+
+        response = self.client.get('/api/admin/transactions/')
+        self.assertEqual(len(response.data['results']), 3)
+
+        ids, url = [], f'/api/admin/transactions/?created_after={since}&page_size=2'
+        while url:
+            response = self.client.get(url)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, [txn.id for txn in reversed(self.transactions)])
+
+    def test_invalid_date_filter(self):
+        response = self.client.get('/api/admin/transactions/?created_after=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_retrieve_falls_back_to_archive(self):
+        self._archive()
+        response = self.client.get(f'/api/admin/fraud-alerts/{ArchivedFraudAlert.objects.get().id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['transaction_details']['client_name'], 'John Doe')
+
+        response = self.client.patch(f'/api/admin/fraud-alerts/{ArchivedFraudAlert.objects.get().id}/approve/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_interleaves_archive_by_id(self):
+        self._archive()
+        since = (timezone.now() - timedelta(days=1000)).date().isoformat()
+        response = self.client.get(f'/api/admin/transactions/export/?output=jsonl&created_after={since}')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [txn.id for txn in self.transactions])
+
+    def test_statistics_and_training_stream_include_archive(self):
+        self._archive()
+        stats = client_amount_stats(self.client_profile)
+        self.assertEqual(stats['count'], 6)
+        self.assertEqual(stats['avg_amount'], Decimal('350'))
+        # Population standard deviation of 100..600
+        self.assertAlmostEqual(float(stats['std_amount']), 170.78, places=2)
+        self.assertEqual(len(list(stream_transactions(client=self.client_profile))), 6)
@@ -0,0 +1,143 @@
+from unittest import mock
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from apps.risk.engine import RiskEngine
+from apps.risk.models import ClientProfile
+from apps.transactions.models import (
+    Transaction, FraudAlert, TransactionOTP, TransactionDailyRollup, ClientDailyRollup, FraudAlertDailyRollup
+)
+from apps.transactions.rollups import rebuild_rollups
+from apps.users.models import User
+
+class BulkTransferTestCase(APITestCase):
+    def setUp(self):
+        patcher = mock.patch('apps.transactions.views.send_transaction_notification_async')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        otp_patcher = mock.patch('apps.transactions.services.send_security_otp_email_async', return_value=True)
+        self.send_otp = otp_patcher.start()
+        self.addCleanup(otp_patcher.stop)
+
+        self.user = User.objects.create_user(
+            email='client@example.com',
+            first_name='John',
+            last_name='Doe',
+            password='ClientPass123!'
+        )
+        self.client_profile = ClientProfile.objects.create(
+            user=self.user,
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('1000.00'),
+            home_lat=Decimal('36.753800'),
+            home_lng=Decimal('3.058800')
+        )
+        self.recipient = ClientProfile.objects.create(
+            first_name='Jane',
+            last_name='Roe',
+            national_id='987654321',
+            balance=Decimal('0.00')
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, amounts, ml_scores):
+        payload = {
+            'transfers': [
+                {'amount': amount, 'transaction_type': 'transfer', 'to_account_number': self.recipient.bank_account_number}
+                for amount in amounts
+            ],
+            'current_location': {'lat': 36.7538, 'lng': 3.0588},
+        }
+        # Rules approve everything (time-of-day rules would make outcomes clock-dependent);
+        # the ML scores decide which transfers are flagged
+        with mock.patch.object(RiskEngine, 'calculate_risk_scores',
+                               side_effect=lambda transactions, **kwargs: [(0, [], False, 'Approve')] * len(transactions)), \
+                mock.patch('apps.transactions.views.FraudMLModel') as model:
+            model.return_value.predict_batch.side_effect = lambda transactions, **kwargs: ml_scores[:len(transactions)]
+            return self.client.post('/api/client/transactions/bulk/', payload, format='json')
+
+    def test_per_item_outcomes_and_running_balance(self):
+        """Test that transfers beyond the running balance are rejected individually"""
+        response = self._post(['400.00', '300.00', '500.00', '200.00'], [0.0, 0.9, 0.0])
+
+        self.assertEqual(response.status_code, 201)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['completed', 'pending', 'rejected', 'completed'])
+        self.assertEqual(results[2]['error'], 'Insufficient funds')
+        self.assertEqual(response.data['summary']['accepted'], 3)
+        self.assertEqual(response.data['pending_transaction_ids'], [results[1]['transaction_id']])
+
+        # Only completed transfers move money; the flagged one waits for its OTP
+        self.client_profile.refresh_from_db()
+        self.recipient.refresh_from_db()
+        self.assertEqual(self.client_profile.balance, Decimal('400.00'))
+        self.assertEqual(self.recipient.balance, Decimal('600.00'))
+        self.assertTrue(FraudAlert.objects.filter(transaction_id=results[1]['transaction_id']).exists())
+
+    def test_flagged_transfers_share_one_otp(self):
+        """Test that one code, stored once for the batch, confirms every flagged transfer in one verification"""
+        response = self._post(['100.00', '100.00', '100.00'], [0.9, 0.0, 0.9])
+
+        self.assertTrue(response.data['otp_sent'])
+        self.assertEqual(self.send_otp.call_count, 1)
+        pending_ids = response.data['pending_transaction_ids']
+        self.assertEqual(len(pending_ids), 2)
+        otp = TransactionOTP.objects.get()
+        self.assertEqual(str(otp.batch), response.data['otp_batch_id'])
+        self.assertIsNone(otp.transaction_id)
+
+        verify = self.client.post(f'/api/client/transactions/{pending_ids[1]}/verify_otp/', {'otp': otp.otp}, format='json')
+        self.assertEqual(verify.status_code, 200)
+        self.assertEqual(sorted(verify.data['transaction_ids']), sorted(pending_ids))
+        self.assertEqual(Transaction.objects.filter(status='completed').count(), 3)
+        self.client_profile.refresh_from_db()
+        self.assertEqual(self.client_profile.balance, Decimal('700.00'))
+
+    def test_batch_otp_guesses_are_limited_once(self):
+        """Test that wrong guesses on any transfer of the batch count against the one shared code"""
+        response = self._post(['100.00', '100.00'], [0.9, 0.9])
+        pending_ids = response.data['pending_transaction_ids']
+        code = TransactionOTP.objects.get().otp
+        wrong = '000000' if code != '000000' else '111111'
+
+        for attempt in range(3):
+            verify = self.client.post(f'/api/client/transactions/{pending_ids[attempt % 2]}/verify_otp/', {'otp': wrong}, format='json')
+            self.assertEqual(verify.data['error'], 'Invalid OTP code')
+        verify = self.client.post(f'/api/client/transactions/{pending_ids[1]}/verify_otp/', {'otp': code}, format='json')
+        self.assertEqual(verify.data['error'], 'Too many failed attempts')
+        self.assertFalse(Transaction.objects.filter(status='completed').exists())
+
+    def test_resend_on_a_batch_transfer_resends_the_shared_code(self):
+        """Test that resending for one flagged transfer re-sends the batch code instead of issuing its own"""
+        response = self._post(['100.00', '100.00'], [0.9, 0.9])
+        pending_ids = response.data['pending_transaction_ids']
+
+        resend = self.client.post(f'/api/client/transactions/{pending_ids[0]}/resend_otp/')
+        self.assertEqual(resend.status_code, 200)
+        self.assertEqual(self.send_otp.call_count, 2)
+        self.assertEqual(self.send_otp.call_args[0][1], TransactionOTP.objects.get().otp)
+
+    def test_rollups_match_rebuild(self):
+        """Test that the grouped rollup updates agree with a rebuild from the raw tables"""
+        # Rollup deltas are applied once the request's transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self._post(['100.00', '200.00', '300.00', '900.00'], [0.0, 0.9, 0.0])
+
+        def snapshot():
+            return (
+                sorted(TransactionDailyRollup.objects.values_list('day', 'status', 'transaction_count', 'total_amount')),
+                sorted(ClientDailyRollup.objects.values_list('day', 'client_id', 'transaction_count', 'total_amount')),
+                sorted(FraudAlertDailyRollup.objects.values_list('day', 'level', 'status', 'alert_count')),
+            )
+
+        incremental = snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, snapshot())
+
+    def test_nothing_affordable(self):
+        """Test that a batch with no affordable transfer is rejected without writes"""
+        response = self._post(['5000.00'], [0.0])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
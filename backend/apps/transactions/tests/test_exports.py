@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction, FraudAlert
+from apps.users.models import User
+
+class StreamingExportTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            password='AdminPass123!'
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+        self.transactions = Transaction.objects.bulk_create([
+            Transaction(
+                client=self.client_profile,
+                amount=Decimal('100.00') * (i + 1),
+                status='failed' if i % 2 else 'completed'
+            )
+            for i in range(5)
+        ])
+        FraudAlert.objects.create(
+            transaction=self.transactions[1], level='HIGH', risk_score=80, triggers=['Large amount', 'New device']
+        )
+    
+    def _content(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+    
+    def test_csv_export_applies_filters(self):
+        """Test that the CSV export streams a header and the filtered rows in id order"""
+        response = self.client.get('/api/admin/transactions/export/?status=failed')
+        rows = list(csv.DictReader(io.StringIO(self._content(response))))
+        
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual([int(row['id']) for row in rows], [self.transactions[1].id, self.transactions[3].id])
+        self.assertEqual(rows[0]['client_last_name'], 'Doe')
+    
+    def test_jsonl_export_resumes_after_id(self):
+        """Test that after_id continues an export after the last row received"""
+        response = self.client.get(f'/api/admin/transactions/export/?output=jsonl&after_id={self.transactions[2].id}')
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+        
+        self.assertEqual([row['id'] for row in rows], [self.transactions[3].id, self.transactions[4].id])
+        self.assertEqual(rows[0]['amount'], '400.00')
+    
+    def test_fraud_alert_export(self):
+        """Test the fraud alert export with the level filter"""
+        content = self._content(self.client.get('/api/admin/fraud-alerts/export/?output=jsonl&level=HIGH'))
+        rows = [json.loads(line) for line in content.splitlines()]
+        
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['triggers'], ['Large amount', 'New device'])
+    
+    def test_invalid_parameters(self):
+        """Test that unknown formats and malformed resume ids are rejected"""
+        self.assertEqual(self.client.get('/api/admin/transactions/export/?output=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/admin/transactions/export/?after_id=abc').status_code, 400)
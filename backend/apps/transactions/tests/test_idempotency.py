@@ -0,0 +1,74 @@
+from unittest import mock
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from apps.risk.engine import RiskEngine
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction, IdempotencyKey
+from apps.users.models import User
+
+class IdempotentTransactionCreateTestCase(APITestCase):
+    def setUp(self):
+        patcher = mock.patch('apps.transactions.views.send_transaction_notification_async')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            email='client@example.com',
+            first_name='John',
+            last_name='Doe',
+            password='ClientPass123!'
+        )
+        self.client_profile = ClientProfile.objects.create(
+            user=self.user,
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00'),
+            home_lat=Decimal('36.753800'),
+            home_lng=Decimal('3.058800')
+        )
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            'amount': '100.00',
+            'transaction_type': 'transfer',
+            'to_account_number': '12345678',
+            'current_location': {'lat': 36.7538, 'lng': 3.0588},
+        }
+    
+    def _post(self, payload, key='retry-key-1'):
+        return self.client.post('/api/client/transactions/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+    
+    def test_retry_replays_stored_response(self):
+        """Test that a retried POST returns the first response without re-running scoring"""
+        first = self._post(dict(self.payload, device_fingerprint='web-1'))
+        self.assertEqual(first.status_code, 201)
+        
+        with mock.patch('apps.transactions.views.RiskEngine', wraps=RiskEngine) as engine:
+            retry = self._post(dict(self.payload, device_fingerprint='web-2'))
+        
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['transaction_id'], first.data['transaction_id'])
+        self.assertEqual(engine.call_count, 0)
+        self.assertEqual(Transaction.objects.filter(client=self.client_profile).count(), 1)
+    
+    def test_key_reused_with_different_payload(self):
+        """Test that a key cannot be replayed for a different request"""
+        self.assertEqual(self._post(self.payload).status_code, 201)
+        
+        response = self._post(dict(self.payload, amount='999.00'))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.count(), 1)
+    
+    def test_failed_request_releases_key(self):
+        """Test that an unsuccessful request does not pin its key"""
+        response = self._post(dict(self.payload, amount='90000.00'))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        
+        self.assertEqual(self._post(self.payload).status_code, 201)
+    
+    def test_without_header_each_post_creates(self):
+        """Test that requests without a key keep their existing behaviour"""
+        self.client.post('/api/client/transactions/', self.payload, format='json')
+        self.client.post('/api/client/transactions/', self.payload, format='json')
+        self.assertEqual(Transaction.objects.count(), 2)
@@ -0,0 +1,84 @@
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from datetime import timedelta
+from decimal import Decimal
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction
+from apps.users.models import User
+
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            password='AdminPass123!'
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+        
+        Transaction.objects.bulk_create([
+            Transaction(
+                client=self.client_profile,
+                amount=Decimal('100.00') * (i + 1),
+                status='failed' if i % 2 else 'completed'
+            )
+            for i in range(7)
+        ])
+        # Several rows share a timestamp so the id tie-breaker is exercised
+        now = timezone.now()
+        for i, transaction_id in enumerate(Transaction.objects.order_by('id').values_list('id', flat=True)):
+            Transaction.objects.filter(id=transaction_id).update(created_at=now - timedelta(minutes=i // 3))
+        self.expected_ids = list(Transaction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+    
+    def _walk(self, url):
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids, pages
+    
+    def test_pages_cover_every_row_once_in_order(self):
+        """Test that following next links yields each row exactly once, newest first"""
+        ids, pages = self._walk('/api/admin/transactions/?page_size=3')
+        
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]['previous'])
+    
+    def test_previous_link_returns_prior_page(self):
+        """Test that the previous cursor walks back to the same rows"""
+        first = self.client.get('/api/admin/transactions/?page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in first['results']])
+        self.assertIsNone(back['previous'])
+        self.assertIsNotNone(back['next'])
+    
+    def test_filters_compose_with_cursor(self):
+        """Test that query filters are preserved across cursor pages"""
+        ids, _ = self._walk('/api/admin/transactions/?status=failed&page_size=2')
+        
+        expected = list(Transaction.objects.filter(status='failed').order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+    
+    @override_settings(TRANSACTION_LIST_PAGE_SIZE=4, TRANSACTION_LIST_MAX_PAGE_SIZE=5)
+    def test_page_size_default_and_cap(self):
+        """Test the configured default page size and maximum"""
+        self.assertEqual(len(self.client.get('/api/admin/transactions/').data['results']), 4)
+        self.assertEqual(len(self.client.get('/api/admin/transactions/?page_size=100').data['results']), 5)
+    
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get('/api/admin/transactions/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,30 @@
+from datetime import date, datetime, timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from apps.transactions.partitions import (
+    add_months, create_partition_sql, ensure_partitions, is_partitioned, month_range, month_start, partition_name
+)
+
+class PartitionTestCase(TestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(month_start(datetime(2025, 3, 31, 23, 30, tzinfo=timezone.utc)), date(2025, 3, 1))
+        self.assertEqual(add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        self.assertEqual(
+            list(month_range(date(2024, 11, 15), date(2025, 2, 3))),
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+        )
+
+    def test_partition_ddl(self):
+        month = date(2025, 12, 1)
+        self.assertEqual(partition_name(month), 'transactions_transaction_p202512')
+        sql = create_partition_sql(month)
+        self.assertIn('PARTITION OF "transactions_transaction"', sql)
+        self.assertIn("FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')", sql)
+
+    def test_other_databases_are_left_alone(self):
+        self.assertFalse(is_partitioned())
+        self.assertEqual(ensure_partitions(), [])
+        with self.assertRaises(CommandError):
+            call_command('partition_transactions', '--convert')
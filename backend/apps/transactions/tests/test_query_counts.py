@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction, FraudAlert
+from apps.users.models import User
+
+class ListQueryCountTestCase(APITestCase):
+    """Each listing must cost a fixed number of queries, whatever the page size"""
+    
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            first_name='Admin',
+            last_name='User',
+            password='AdminPass123!'
+        )
+        self.user = User.objects.create_user(
+            email='client@example.com',
+            first_name='John',
+            last_name='Doe',
+            password='ClientPass123!'
+        )
+        
+        clients = [
+            ClientProfile.objects.create(
+                user=self.user if i == 0 else None,
+                first_name='Client',
+                last_name=str(i),
+                national_id=f'10000000{i}',
+                balance=Decimal('50000.00')
+            )
+            for i in range(4)
+        ]
+        transactions = Transaction.objects.bulk_create([
+            Transaction(client=clients[i % 4] if i % 3 else clients[0], amount=Decimal('100.00'), risk_score=70)
+            for i in range(24)
+        ])
+        FraudAlert.objects.bulk_create([
+            FraudAlert(transaction=txn, level='HIGH', risk_score=txn.risk_score, triggers=['Large amount'])
+            for txn in transactions
+        ])
+    
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+        return len(context.captured_queries)
+    
+    def _assert_constant(self, url, expected):
+        for page_size in (1, 5, 20):
+            self.assertEqual(self._count_queries(f'{url}?page_size={page_size}'), expected, f'{url} page_size={page_size}')
+    
+    def test_admin_listings(self):
+        """Test admin transaction and fraud alert listings: one query per page"""
+        self.client.force_authenticate(user=self.admin)
+        self._assert_constant('/api/admin/transactions/', 1)
+        self._assert_constant('/api/admin/fraud-alerts/', 1)
+    
+    def test_client_listings(self):
+        """Test client listings: the profile lookup plus one query per page, then one once the profile id is cached"""
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self._count_queries('/api/client/transactions/'), 2)
+        self._assert_constant('/api/client/transactions/', 1)
+        self._assert_constant('/api/client/fraud-alerts/', 1)
+    
+    def test_retrieve(self):
+        """Test that retrieving a fraud alert does not fan out into related lookups"""
+        self.client.force_authenticate(user=self.admin)
+        alert = FraudAlert.objects.filter(transaction__client__user=self.user).first()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/admin/fraud-alerts/{alert.id}/')
+        self.assertEqual(response.data['transaction_details']['client_email'], self.user.email)
+    
+    def test_recent_activity(self):
+        """Test the dashboard recent activity feed: one query per list"""
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/admin/dashboard/recent_activity/')
+        self.assertEqual(len(response.data['alerts']), 10)
@@ -0,0 +1,87 @@
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from apps.risk.models import ClientProfile
+from apps.transactions.models import (
+    Transaction, FraudAlert, TransactionDailyRollup, ClientDailyRollup, FraudAlertDailyRollup
+)
+from apps.transactions.rollups import rebuild_rollups
+
+class DailyRollupTestCase(TestCase):
+    def setUp(self):
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('50000.00')
+        )
+        self.today = timezone.localdate()
+    
+    def _snapshot(self):
+        return (
+            sorted(TransactionDailyRollup.objects.filter(transaction_count__gt=0).values_list(
+                'day', 'status', 'transaction_count', 'total_amount')),
+            sorted(ClientDailyRollup.objects.filter(transaction_count__gt=0).values_list(
+                'day', 'client_id', 'transaction_count', 'total_amount')),
+            sorted(FraudAlertDailyRollup.objects.filter(alert_count__gt=0).values_list(
+                'day', 'level', 'status', 'alert_count')),
+        )
+    
+    def _create_transaction(self, amount):
+        transaction = Transaction.objects.create(client=self.client_profile, amount=Decimal(amount))
+        FraudAlert.objects.filter(transaction=transaction).delete()
+        return transaction
+    
+    def test_inserts_and_status_changes_are_rolled_up(self):
+        """Test that creates count into the day and status changes move between buckets"""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._create_transaction('100.00')
+            self._create_transaction('250.00')
+            
+            first.status = 'completed'
+            first.save()
+            first.save()
+        
+        rollups = dict(TransactionDailyRollup.objects.filter(day=self.today).values_list('status', 'transaction_count'))
+        self.assertEqual(rollups, {'pending': 1, 'completed': 1})
+        client_rollup = ClientDailyRollup.objects.get(day=self.today, client=self.client_profile)
+        self.assertEqual((client_rollup.transaction_count, client_rollup.total_amount), (2, Decimal('350.00')))
+    
+    def test_alert_levels_are_normalized(self):
+        """Test that alerts roll up per upper-cased level and follow status changes"""
+        with self.captureOnCommitCallbacks(execute=True):
+            alert = FraudAlert.objects.create(transaction=self._create_transaction('100.00'), level='High', risk_score=75)
+            FraudAlert.objects.create(transaction=self._create_transaction('200.00'), level='HIGH', risk_score=80)
+            
+            alert = FraudAlert.objects.get(id=alert.id)
+            alert.status = 'Reviewed'
+            alert.save()
+        
+        rollups = dict(FraudAlertDailyRollup.objects.filter(alert_count__gt=0).values_list('status', 'alert_count'))
+        self.assertEqual(rollups, {'Active': 1, 'Reviewed': 1})
+        self.assertEqual(set(FraudAlertDailyRollup.objects.values_list('level', flat=True)), {'HIGH'})
+    
+    def test_incremental_rollups_match_rebuild(self):
+        """Test that incrementally maintained rollups equal a rebuild from the raw tables"""
+        with self.captureOnCommitCallbacks(execute=True):
+            transactions = [self._create_transaction(amount) for amount in ('100.00', '200.00', '300.00')]
+            transactions[0].status = 'failed'
+            transactions[0].save()
+            FraudAlert.objects.create(transaction=transactions[1], level='Medium', risk_score=50)
+            transactions[2].delete()
+        
+        incremental = self._snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self._snapshot())
+    
+    def test_deltas_wait_for_the_commit(self):
+        """Test that deltas wait for the commit, so the shared day row is not locked by open transactions"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._create_transaction('100.00')
+            self.assertFalse(TransactionDailyRollup.objects.exists())
+        self.assertTrue(callbacks)
+        
+        for callback in callbacks:
+            callback()
+        rollup = TransactionDailyRollup.objects.get(day=self.today, status='pending')
+        self.assertEqual((rollup.transaction_count, rollup.total_amount), (1, Decimal('100.00')))
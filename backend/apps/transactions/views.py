@@ -1,3 +1,4 @@
+import uuid
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -5,53 +6,68 @@ from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
 from .serializers import (
-    TransactionSerializer, CreateTransactionSerializer, AdminTransactionSerializer,
+    TransactionSerializer, CreateTransactionSerializer, BulkTransferSerializer, AdminTransactionSerializer,
     FraudAlertSerializer, AdminFraudAlertSerializer
 )
 from .models import Transaction, FraudAlert
+from .pagination import KeysetPagination
+from .mixins import EagerLoadingViewSetMixin
+from .filters import filter_transactions, filter_fraud_alerts
+from .idempotency import idempotent
+from .rollups import record_transactions, move_transactions_status, record_fraud_alerts
 from apps.risk.models import ClientProfile
-from apps.risk.engine import RiskEngine, haversine_distance
+from apps.risk.engine import RiskEngine, decide, has_distance_violation, haversine_distance
+from apps.risk.feature_store import get_client_features, record_completions
+from apps.risk.location_index import get_suspicious_location_index
+from apps.risk.shadow import submit_shadow_scoring
+from apps.risk.location_history import record_recent_location
+from apps.risk.dashboard import bump_dashboard_counters
 from apps.risk.ml import FraudMLModel
 from apps.users.email_service import send_fraud_alert_email, send_transaction_notification, send_transaction_notification_async
-from apps.transactions.services import create_transaction_otp, verify_transaction_otp, resend_transaction_otp
+from apps.transactions.services import (
+    create_transaction_otp, create_batch_transaction_otp, verify_transaction_otp, verify_batch_transaction_otp,
+    resend_transaction_otp
+)
+from apps.users.otp_store import (
+    get_otp_store, transaction_otp_ttl, PURPOSE_TRANSACTION, OTP_VALID, OTP_EXPIRED, OTP_LOCKED
+)
+from apps.users.throttling import rate_limits
+from apps.system.sqlite import retry_on_locked
 from apps.utils.logger import get_transactions_logger, log_transaction, log_system_event
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
-import random
-import string
 
 # Set up logger
 logger = get_transactions_logger()
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """Transaction viewset for clients"""
     """Transaction viewset for clients"""
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        try:
-            client_profile = ClientProfile.objects.get(user=self.request.user)
-            return Transaction.objects.filter(client=client_profile)
-        except ClientProfile.DoesNotExist:
-            return Transaction.objects.none()
-        try:
-            client_profile = ClientProfile.objects.get(user=self.request.user)
-            return Transaction.objects.filter(client=client_profile)
-        except ClientProfile.DoesNotExist:
+        client_profile_id = self.request.client_profile.id
+        if client_profile_id is None:
             return Transaction.objects.none()
+        return Transaction.objects.filter(client_id=client_profile_id)
     
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateTransactionSerializer
             return CreateTransactionSerializer
+        if self.action == 'bulk':
+            return BulkTransferSerializer
         return TransactionSerializer
     
+    @retry_on_locked
     @transaction.atomic
+    @idempotent(ignore_fields=('device_fingerprint',))
     def create(self, request, *args, **kwargs):
         """Create transaction with fraud detection and balance updates"""
         logger.info(f"Creating transaction for user {request.user.email}")
@@ -60,7 +76,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             try:
                 # Get client profile
-                client_profile = ClientProfile.objects.get(user=request.user)
+                client_profile = request.client_profile.get()
                 logger.info(f"Client profile found: {client_profile.full_name}")
                 
                 # ENHANCED LOCATION VALIDATION AND INTEGRITY CHECKS
@@ -105,40 +121,15 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     abs(transaction_lng - round(transaction_lng)) == 0.0):
                     suspicious_patterns.append("Exact integer coordinates (possible fake)")
                 
-                # Check for common fake coordinates
-                fake_coordinates = [
-                    (0.0, 0.0),     # Null Island
-                    (37.4419, -122.1430),  # Google HQ (common VPN endpoint)
-                    (40.7589, -73.9851),   # Times Square (common fake location)
-                    (51.5074, -0.1278),    # London center
-                    (48.8566, 2.3522),     # Paris center
-                ]
-                
-                for fake_lat, fake_lng in fake_coordinates:
-                    if (abs(transaction_lat - fake_lat) < 0.001 and 
-                        abs(transaction_lng - fake_lng) < 0.001):
-                        suspicious_patterns.append(f"Matches known fake location: ({fake_lat}, {fake_lng})")
-                
-                # Check for extremely rapid location changes (teleportation detection)
-                if (client_profile.last_known_lat and client_profile.last_known_lng):
-                    prev_distance = haversine_distance(
-                        float(client_profile.last_known_lat), float(client_profile.last_known_lng),
-                        transaction_lat, transaction_lng
+                # Check against admin-managed known fake / high-risk coordinates (grid index lookup)
+                for match in get_suspicious_location_index().lookup(transaction_lat, transaction_lng):
+                    suspicious_patterns.append(
+                        f"Matches known fake location: {match['name']} ({match['lat']}, {match['lng']})"
                     )
-                    
-                    # Check recent transactions for time calculation
-                    recent_transaction = Transaction.objects.filter(
-                        client=client_profile
-                    ).order_by('-created_at').first()
-                    
-                    if recent_transaction:
-                        time_diff = timezone.now() - recent_transaction.created_at
-                        time_hours = time_diff.total_seconds() / 3600
-                        
-                        # If moved more than 500km in less than 1 hour (impossible without flight)
-                        if prev_distance > 500 and time_hours < 1:
-                            suspicious_patterns.append(f"Impossible travel: {prev_distance:.1f}km in {time_hours:.1f}h")
                 
+                # Impossible travel (teleportation) is scored by RiskEngine Rule 8 from the
+                # client's recent-location ring buffer, so no history query is needed here
+
                 # Log suspicious patterns but don't block (just add to risk assessment)
                 if suspicious_patterns:
                     logger.warning(f"Suspicious location patterns detected for user {request.user.email}: {suspicious_patterns}")
@@ -193,15 +184,24 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 
                 # Run fraud detection
                 risk_engine = RiskEngine()
-                risk_score, triggers, requires_otp, decision = risk_engine.calculate_risk_score(transaction_obj)
+                client_features = get_client_features(client_profile)
+                recent_transaction_count = risk_engine.count_recent_transactions(client_profile)
+                risk_score, triggers, requires_otp, decision = risk_engine.calculate_risk_score(
+                    transaction_obj, recent_transaction_count=recent_transaction_count, client_features=client_features
+                )
                 logger.info(f"Risk assessment: Score={risk_score}, Triggers={triggers}, Requires OTP={requires_otp}, Decision={decision}")
-                
+
+                # Remember this location for the next impossible-travel check once the transaction is committed
+                transaction.on_commit(lambda: record_recent_location(
+                    client_profile.id, transaction_lat, transaction_lng, transaction_obj.created_at
+                ))
+
                 # Add ML score if available
                 ml_model = FraudMLModel()
                 ml_score = ml_model.predict(transaction_obj)
-                ml_contribution = int(ml_score * 40)  # ML contributes up to 40 points
-                risk_score += ml_contribution
-                logger.info(f"ML score: {ml_score}, Contribution: {ml_contribution}, Final risk score: {risk_score}")
+                rule_score = risk_score
+                risk_score, policy_decision, otp_reasons = decide(rule_score, triggers, requires_otp, ml_score)
+                logger.info(f"ML score: {ml_score}, Contribution: {risk_score - rule_score}, Final risk score: {risk_score}")
                 
                 # Update transaction with risk score
                 transaction_obj.risk_score = risk_score
@@ -222,41 +222,20 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     risk_level=f"Score_{risk_score}"
                 )
                 
-                # Check if OTP is required (Enhanced logic for distance-based fraud detection)
-                # OTP required if:
-                # 1. Any business rules triggered (len(triggers) > 0)
-                # 2. High risk score (>= 70)
-                # 3. High AI score (ml_score >= 0.6)
-                # 4. Explicit requires_otp flag (including distance violations)
-                # 5. MANDATORY: Distance-based violations (cannot be bypassed)
-                
-                # Check for distance-based violations (these ALWAYS require OTP)
-                distance_violation = any('distance exceeded' in trigger.lower() for trigger in triggers)
-                
-                requires_otp_final = (
-                    len(triggers) > 0 or           # ANY rule triggered
-                    risk_score >= 70 or            # High combined risk score
-                    ml_score >= 0.6 or             # High AI risk score
-                    requires_otp or                # Explicit OTP requirement from risk engine
-                    distance_violation             # MANDATORY: Distance-based fraud detection
-                )
+                # OTP required on any triggered rule, a high combined or AI score, an explicit
+                # requirement, or (MANDATORY, cannot be bypassed) a distance-based violation
+                distance_violation = has_distance_violation(triggers)
+                requires_otp_final = policy_decision == 'otp'
                 
                 # Log OTP decision reasoning
-                otp_reasons = []
-                if len(triggers) > 0:
-                    otp_reasons.append(f"Business rules triggered: {len(triggers)}")
-                if risk_score >= 70:
-                    otp_reasons.append(f"High risk score: {risk_score}")
-                if ml_score >= 0.6:
-                    otp_reasons.append(f"High AI score: {ml_score:.3f}")
-                if requires_otp:
-                    otp_reasons.append("Risk engine explicit requirement")
-                if distance_violation:
-                    otp_reasons.append("MANDATORY distance violation")
-                
                 logger.info(f"OTP decision for transaction {transaction_obj.id}: "
                            f"Required={requires_otp_final}, Reasons={otp_reasons}")
                 
+                # Candidate thresholds / models score a copy off the request path, after commit
+                submit_shadow_scoring(
+                    transaction_obj, rule_score, triggers, requires_otp, ml_score, client_features, recent_transaction_count
+                )
+                
                 if requires_otp_final:
                     # Set transaction to pending and require OTP
                     transaction_obj.status = 'pending'
@@ -311,7 +290,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
                             'error': 'Failed to send verification code. Please try again.'
                         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
                 
-                elif risk_score >= 40:  # Medium risk - complete with alert
+                elif policy_decision == 'alert':  # Medium risk - complete with alert
                     # Update balances for completed transaction
                     self._update_balances(transaction_obj, client_profile)
                     
@@ -378,7 +357,209 @@ class TransactionViewSet(viewsets.ModelViewSet):
         logger.error(f"Transaction validation failed: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=True, methods=['post'])
+    @action(detail=False, methods=['post'])
+    @retry_on_locked
+    @transaction.atomic
+    @idempotent(ignore_fields=('device_fingerprint',))
+    def bulk(self, request):
+        """
+        Submit many transfers at once. Each transfer is checked against the running balance
+        and gets its own outcome; the batch is inserted, scored and settled with a fixed
+        number of queries, and a single OTP, verified once, covers every transfer that needs verification.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Bulk transfer validation failed: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            client_profile = ClientProfile.objects.select_for_update().get(user=request.user)
+        except ClientProfile.DoesNotExist:
+            logger.error(f"Client profile not found for user {request.user.email}")
+            return Response({
+                'error': 'Client profile not found'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        items = serializer.validated_data['transfers']
+        logger.info(f"Bulk transfer submission of {len(items)} transfers for user {request.user.email}")
+        
+        # The whole batch shares one location, validated as in create
+        current_location = serializer.validated_data.get('current_location') or {}
+        try:
+            transaction_lat = float(current_location.get('lat', 0.0))
+            transaction_lng = float(current_location.get('lng', 0.0))
+        except (TypeError, ValueError):
+            transaction_lat = transaction_lng = 0.0
+        
+        if transaction_lat == 0.0 and transaction_lng == 0.0:
+            logger.warning(f"Bulk transfer blocked: Invalid location coordinates (0.0, 0.0) for user {request.user.email}")
+            return Response({
+                'error': 'Transaction blocked: Location verification required. Please ensure your location services are enabled and try again.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not (-90 <= transaction_lat <= 90) or not (-180 <= transaction_lng <= 180):
+            logger.warning(f"Bulk transfer blocked: Invalid location coordinates ({transaction_lat}, {transaction_lng}) for user {request.user.email}")
+            return Response({
+                'error': 'Transaction blocked: Invalid location coordinates detected.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Funds: every accepted transfer must fit in what the earlier ones left over
+        outcomes = []
+        accepted = []
+        available = client_profile.balance
+        for index, item in enumerate(items):
+            if item['amount'] > available:
+                outcomes.append({'index': index, 'status': 'rejected', 'error': 'Insufficient funds'})
+                continue
+            available -= item['amount']
+            outcome = {'index': index}
+            outcomes.append(outcome)
+            accepted.append((outcome, Transaction(
+                client=client_profile,
+                current_lat=Decimal(str(transaction_lat)),
+                current_lng=Decimal(str(transaction_lng)),
+                status='pending',
+                **item
+            )))
+        
+        if not accepted:
+            logger.warning(f"Bulk transfer rejected: no transfer fits the balance of user {request.user.email}")
+            return Response({
+                'error': 'Insufficient funds',
+                'results': outcomes
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Set home location if not set (first transaction)
+        if not client_profile.home_lat or not client_profile.home_lng:
+            client_profile.home_lat = Decimal(str(transaction_lat))
+            client_profile.home_lng = Decimal(str(transaction_lng))
+            client_profile.save()
+            logger.info(f"Setting home location for user {request.user.email}: ({transaction_lat}, {transaction_lng})")
+        
+        # bulk_create skips post_save, so the rollups and dashboard are counted here per batch
+        transactions = Transaction.objects.bulk_create([transaction_obj for _, transaction_obj in accepted])
+        record_transactions(transactions)
+        transaction.on_commit(lambda: bump_dashboard_counters(
+            total_transactions=len(transactions),
+            recent_transactions=len(transactions),
+            last_month_transactions=len(transactions)
+        ))
+        
+        # Score the batch: client history lookups and the ML model run once
+        risk_engine = RiskEngine()
+        client_features = get_client_features(client_profile)
+        prior_transaction_count = risk_engine.count_recent_transactions(
+            client_profile, exclude_ids=[transaction_obj.id for transaction_obj in transactions]
+        )
+        assessments = risk_engine.calculate_risk_scores(
+            transactions, client_features=client_features, prior_transaction_count=prior_transaction_count
+        )
+        ml_scores = FraudMLModel().predict_batch(transactions, risk_engine=risk_engine)
+        
+        flagged, completed, alerts = [], [], []
+        batch_id = uuid.uuid4()
+        for position, ((outcome, transaction_obj), (risk_score, triggers, requires_otp, decision), ml_score) in enumerate(
+            zip(accepted, assessments, ml_scores), start=1
+        ):
+            # Rule 2 counted the earlier transfers of the batch, as calculate_risk_scores does
+            submit_shadow_scoring(
+                transaction_obj, risk_score, triggers, requires_otp, ml_score, client_features,
+                prior_transaction_count + position
+            )
+            # Same policy as create
+            risk_score, policy_decision, _ = decide(risk_score, triggers, requires_otp, ml_score)
+            transaction_obj.risk_score = risk_score
+            requires_otp_final = policy_decision == 'otp'
+            
+            if requires_otp_final:
+                transaction_obj.otp_batch = batch_id
+                flagged.append(transaction_obj)
+            else:
+                transaction_obj.status = 'completed'
+                completed.append(transaction_obj)
+            
+            if policy_decision != 'approve':
+                alerts.append(FraudAlert(
+                    transaction=transaction_obj,
+                    risk_score=risk_score,
+                    level=risk_engine.get_risk_level(risk_score),
+                    triggers=triggers
+                ))
+            
+            outcome.update({
+                'transaction_id': transaction_obj.id,
+                'status': transaction_obj.status,
+                'risk_score': risk_score,
+                'requires_otp': requires_otp_final,
+            })
+        
+        # bulk_update leaves auto_now alone; the feature store orders completions by updated_at
+        updated_at = timezone.now()
+        for transaction_obj in transactions:
+            transaction_obj.updated_at = updated_at
+        Transaction.objects.bulk_update(transactions, ['status', 'risk_score', 'otp_batch', 'updated_at'])
+        move_transactions_status(completed, 'pending')
+        record_completions(completed)
+        
+        if alerts:
+            alerts = FraudAlert.objects.bulk_create(alerts)
+            record_fraud_alerts(alerts)
+            alert_deltas = {'recent_alerts': len(alerts), 'pending_alerts': len(alerts)}
+            for alert in alerts:
+                level_counter = f'risk_{alert.level.lower()}'
+                alert_deltas[level_counter] = alert_deltas.get(level_counter, 0) + 1
+            transaction.on_commit(lambda: bump_dashboard_counters(**alert_deltas))
+        
+        if completed:
+            self._update_batch_balances(completed, client_profile)
+        
+        otp_sent = False
+        if flagged:
+            otp_sent = create_batch_transaction_otp(batch_id, flagged, request.user) is not None
+            if not otp_sent:
+                # Without a code the flagged transfers can never be verified
+                logger.error(f"Failed to send shared OTP for bulk transfer of user {request.user.email}")
+                for transaction_obj in flagged:
+                    transaction_obj.status = 'failed'
+                Transaction.objects.bulk_update(flagged, ['status'])
+                move_transactions_status(flagged, 'pending')
+                for outcome, transaction_obj in accepted:
+                    outcome['status'] = transaction_obj.status
+        
+        transaction.on_commit(lambda: record_recent_location(
+            client_profile.id, transaction_lat, transaction_lng, transactions[-1].created_at
+        ))
+        
+        summary = {
+            'submitted': len(items),
+            'accepted': len(transactions),
+            'rejected': len(items) - len(transactions),
+            'completed': len(completed),
+            'pending': len(flagged) if otp_sent else 0,
+            'failed': 0 if otp_sent else len(flagged),
+        }
+        logger.info(f"Bulk transfer processed for user {request.user.email}: {summary}")
+        log_system_event(
+            "Bulk transfer processed",
+            "transactions",
+            "WARNING" if flagged else "INFO",
+            {
+                "user_id": request.user.id,
+                "summary": summary,
+                "flagged_transaction_ids": [transaction_obj.id for transaction_obj in flagged],
+            }
+        )
+        
+        return Response({
+            'message': 'Bulk transfer processed.',
+            'summary': summary,
+            'results': outcomes,
+            'otp_sent': otp_sent,
+            'pending_transaction_ids': [transaction_obj.id for transaction_obj in flagged] if otp_sent else [],
+            'otp_batch_id': str(batch_id) if otp_sent else None,
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], throttle_classes=rate_limits('otp_verify', 'ip', 'user'))
     def verify_otp(self, request, pk=None):
         """Verify OTP for a pending transaction"""
         try:
@@ -395,6 +576,10 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     'error': 'OTP code is required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
+            # Transfers of a bulk submission are confirmed together by its shared OTP
+            if transaction_obj.otp_batch:
+                return self._verify_batch_otp(request, transaction_obj, otp_code)
+            
             # Verify OTP
             result = verify_transaction_otp(transaction_obj.id, otp_code, request.user)
             
@@ -454,7 +639,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 'error': 'OTP verification failed'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'], throttle_classes=rate_limits('otp_send', 'ip', 'user'))
     def resend_otp(self, request, pk=None):
         """Resend OTP for a pending transaction"""
         try:
@@ -483,6 +668,54 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 'error': 'Failed to resend OTP'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    def _verify_batch_otp(self, request, transaction_obj, otp_code):
+        """Verify a bulk submission's shared OTP once and complete every transfer still pending in it"""
+        batch_id = transaction_obj.otp_batch
+        result = verify_batch_transaction_otp(batch_id, otp_code, request.user)
+        if not result['success']:
+            return Response({
+                'error': result['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            with transaction.atomic():
+                client_profile = ClientProfile.objects.select_for_update().get(pk=transaction_obj.client_id)
+                batch = list(Transaction.objects.select_for_update().filter(
+                    otp_batch=batch_id, client=client_profile, status='pending'
+                ).order_by('id'))
+                
+                # The whole submission shares one location; as after any OTP success, it becomes the last known one
+                if transaction_obj.current_lat and transaction_obj.current_lng:
+                    client_profile.last_known_lat = transaction_obj.current_lat
+                    client_profile.last_known_lng = transaction_obj.current_lng
+                
+                updated_at = timezone.now()
+                for batch_transaction in batch:
+                    batch_transaction.status = 'completed'
+                    batch_transaction.updated_at = updated_at
+                Transaction.objects.bulk_update(batch, ['status', 'updated_at'])
+                move_transactions_status(batch, 'pending')
+                record_completions(batch)
+                self._update_batch_balances(batch, client_profile)
+        except Exception as e:
+            logger.error(f"Error completing batch {batch_id} after OTP verification: {e}")
+            return Response({
+                'error': 'Failed to complete transaction'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        logger.info(f"Batch {batch_id} completed after OTP verification: {len(batch)} transactions")
+        if client_profile.user:
+            for batch_transaction in batch:
+                risk_level = "HIGH" if batch_transaction.risk_score >= 70 else "MEDIUM"
+                send_transaction_notification_async(client_profile.user, batch_transaction, "COMPLETED", risk_level)
+        
+        return Response({
+            'message': 'Transactions completed successfully after OTP verification.',
+            'transaction_id': transaction_obj.id,
+            'transaction_ids': [batch_transaction.id for batch_transaction in batch],
+            'status': 'completed'
+        })
+    
     def _update_balances(self, transaction_obj, client_profile):
         """Update balances for completed transactions"""
         try:
@@ -522,137 +755,103 @@ class TransactionViewSet(viewsets.ModelViewSet):
             logger.error(f"Error updating balances: {e}")
             raise
     
+    def _update_batch_balances(self, transactions, client_profile):
+        """Settle many completed transfers from one sender: one save per affected profile"""
+        credits = {}
+        for transaction_obj in transactions:
+            client_profile.balance -= transaction_obj.amount
+            if transaction_obj.to_account_number:
+                credits[transaction_obj.to_account_number] = (
+                    credits.get(transaction_obj.to_account_number, Decimal('0')) + transaction_obj.amount
+                )
+        
+        # A transfer to one's own account credits the locked profile we already hold
+        own_credit = credits.pop(client_profile.bank_account_number, None)
+        if own_credit:
+            client_profile.balance += own_credit
+        
+        recipients = list(ClientProfile.objects.select_for_update().filter(bank_account_number__in=credits))
+        for recipient_profile in recipients:
+            recipient_profile.balance += credits[recipient_profile.bank_account_number]
+        ClientProfile.objects.bulk_update(recipients, ['balance'])
+        
+        missing = set(credits) - {recipient_profile.bank_account_number for recipient_profile in recipients}
+        if missing:
+            logger.warning(f"Recipient accounts {sorted(missing)} not found for bulk transfer")
+        
+        client_profile.save()
+        for profile in [client_profile, *recipients]:
+            self._update_client_statistics(profile)
+        
+        logger.info(f"Bulk balance update completed for client {client_profile.full_name}: "
+                    f"{len(transactions)} transfers, {len(recipients)} recipients, "
+                    f"new balance {client_profile.balance} DZD")
+    
     def _update_client_statistics(self, client_profile):
         """Update client profile statistics (avg_amount, std_amount) based on transaction history"""
         try:
-            from django.db.models import Avg, StdDev, Count
-            from decimal import Decimal
-            import math
-            
             logger.info(f"Updating statistics for client {client_profile.full_name}")
             
-            # Get all completed transactions for this client
-            completed_transactions = Transaction.objects.filter(
-                client=client_profile,
-                status='completed'
-            )
+            # Kept current by the feature store as transactions complete: no aggregate over the history
+            client_features = get_client_features(client_profile)
             
-            if completed_transactions.exists():
-                # Calculate statistics
-                stats = completed_transactions.aggregate(
-                    avg_amount=Avg('amount'),
-                    std_amount=StdDev('amount'),
-                    transaction_count=Count('id')
-                )
-                
-                # Update client profile with calculated statistics
-                client_profile.avg_amount = Decimal(str(stats['avg_amount'] or 0))
-                
-                # Handle standard deviation (can be None if only one transaction)
-                std_dev = stats['std_amount'] or 0
-                client_profile.std_amount = Decimal(str(std_dev))
+            if client_features.completed_count:
+                client_profile.avg_amount = client_features.amount_mean
+                client_profile.std_amount = client_features.amount_std
                 
                 client_profile.save()
                 
                 logger.info(f"Statistics updated for {client_profile.full_name}: "
                           f"avg_amount={client_profile.avg_amount}, "
                           f"std_amount={client_profile.std_amount}, "
-                          f"transaction_count={stats['transaction_count']}")
+                          f"transaction_count={client_features.completed_count}")
             else:
                 logger.info(f"No completed transactions found for client {client_profile.full_name}")
                 
         except Exception as e:
             logger.error(f"Error updating client statistics for {client_profile.full_name}: {e}")
 
-class FraudAlertViewSet(viewsets.ReadOnlyModelViewSet):
+class FraudAlertViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Fraud alert viewset for clients"""
     """Fraud alert viewset for clients"""
     serializer_class = FraudAlertSerializer
     permission_classes = [permissions.IsAuthenticated]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        try:
-            client_profile = ClientProfile.objects.get(user=self.request.user)
-            return FraudAlert.objects.filter(transaction__client=client_profile)
-        except ClientProfile.DoesNotExist:
-            return FraudAlert.objects.none()
-        try:
-            client_profile = ClientProfile.objects.get(user=self.request.user)
-            return FraudAlert.objects.filter(transaction__client=client_profile)
-        except ClientProfile.DoesNotExist:
+        client_profile_id = self.request.client_profile.id
+        if client_profile_id is None:
             return FraudAlert.objects.none()
+        return FraudAlert.objects.filter(transaction__client_id=client_profile_id)
 
-class AdminTransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class AdminTransactionViewSet(EagerLoadingViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Admin transaction viewset"""
     serializer_class = AdminTransactionSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
     queryset = Transaction.objects.all()
     
     def get_queryset(self):
-        queryset = Transaction.objects.all()
-        
-        # Filter by client
-        client_id = self.request.query_params.get('client_id', None)
-        if client_id:
-            queryset = queryset.filter(client_id=client_id)
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by transaction type
-        transaction_type = self.request.query_params.get('transaction_type', None)
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-        
-        return queryset
+        return filter_transactions(Transaction.objects.all(), self.request.query_params)
     """Admin transaction viewset"""
     serializer_class = AdminTransactionSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
     queryset = Transaction.objects.all()
     
     def get_queryset(self):
-        queryset = Transaction.objects.all()
-        
-        # Filter by client
-        client_id = self.request.query_params.get('client_id', None)
-        if client_id:
-            queryset = queryset.filter(client_id=client_id)
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by transaction type
-        transaction_type = self.request.query_params.get('transaction_type', None)
-        if transaction_type:
-            queryset = queryset.filter(transaction_type=transaction_type)
-        
-        return queryset
+        return filter_transactions(Transaction.objects.all(), self.request.query_params)
 
-class AdminFraudAlertViewSet(viewsets.ModelViewSet):
+class AdminFraudAlertViewSet(EagerLoadingViewSetMixin, viewsets.ModelViewSet):
     """Admin fraud alert viewset"""
     serializer_class = AdminFraudAlertSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
     queryset = FraudAlert.objects.all()
     
     def get_queryset(self):
-        queryset = FraudAlert.objects.all()
-        
-        # Filter by level
-        level = self.request.query_params.get('level', None)
-        if level:
-            queryset = queryset.filter(level=level)
-        
-        # Filter by status
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        return queryset
+        return filter_fraud_alerts(FraudAlert.objects.all(), self.request.query_params)
     
     @action(detail=True, methods=['patch'])
     def approve(self, request, pk=None):
@@ -778,38 +977,21 @@ class AdminFraudAlertViewSet(viewsets.ModelViewSet):
     def _update_client_statistics(self, client_profile):
         """Update client profile statistics - same as in TransactionViewSet"""
         try:
-            from django.db.models import Avg, StdDev, Count
-            from decimal import Decimal
-            
             logger.info(f"Admin updating statistics for client {client_profile.full_name}")
             
-            # Get all completed transactions for this client
-            completed_transactions = Transaction.objects.filter(
-                client=client_profile,
-                status='completed'
-            )
+            # Kept current by the feature store as transactions complete: no aggregate over the history
+            client_features = get_client_features(client_profile)
             
-            if completed_transactions.exists():
-                # Calculate statistics
-                stats = completed_transactions.aggregate(
-                    avg_amount=Avg('amount'),
-                    std_amount=StdDev('amount'),
-                    transaction_count=Count('id')
-                )
-                
-                # Update client profile with calculated statistics
-                client_profile.avg_amount = Decimal(str(stats['avg_amount'] or 0))
-                
-                # Handle standard deviation (can be None if only one transaction)
-                std_dev = stats['std_amount'] or 0
-                client_profile.std_amount = Decimal(str(std_dev))
+            if client_features.completed_count:
+                client_profile.avg_amount = client_features.amount_mean
+                client_profile.std_amount = client_features.amount_std
                 
                 client_profile.save()
                 
                 logger.info(f"Admin statistics updated for {client_profile.full_name}: "
                           f"avg_amount={client_profile.avg_amount}, "
                           f"std_amount={client_profile.std_amount}, "
-                          f"transaction_count={stats['transaction_count']}")
+                          f"transaction_count={client_features.completed_count}")
             else:
                 logger.info(f"No completed transactions found for client {client_profile.full_name}")
                 
@@ -818,6 +1000,7 @@ class AdminFraudAlertViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes(rate_limits('otp_send', 'ip', 'user'))
 def send_security_otp(request):
     """Send security OTP for high-risk transactions"""
     try:
@@ -835,21 +1018,8 @@ def send_security_otp(request):
         if transaction.status != 'pending':
             return Response({'error': 'Transaction does not require OTP verification'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Generate OTP
-        otp = ''.join(random.choices(string.digits, k=6))
-        expires_at = timezone.now() + timedelta(minutes=10)
-        
-        # Create or update OTP
-        otp_obj, created = TransactionOTP.objects.update_or_create(
-            transaction=transaction,
-            user=request.user,
-            defaults={
-                'otp': otp,
-                'expires_at': expires_at,
-                'attempts': 0,
-                'used': False
-            }
-        )
+        # Generate OTP, replacing any previous code for this transaction
+        otp = get_otp_store().issue(PURPOSE_TRANSACTION, request.user, transaction_otp_ttl(), subject=transaction.id)
         
         # Send OTP via email asynchronously (in production, this would be SMS or push notification)
         try:
@@ -871,6 +1041,7 @@ def send_security_otp(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes(rate_limits('otp_verify', 'ip', 'user'))
 def verify_security_otp(request):
     """Verify security OTP and complete transaction"""
     try:
@@ -890,27 +1061,14 @@ def verify_security_otp(request):
         if transaction.status != 'pending':
             return Response({'error': 'Transaction does not require OTP verification'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Verify OTP
-        try:
-            otp_obj = TransactionOTP.objects.get(
-                transaction=transaction,
-                user=request.user,
-                otp=otp_code,
-                used=False
-            )
-        except TransactionOTP.DoesNotExist:
-            return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if OTP is expired
-        if otp_obj.is_expired():
+        # Verify and consume the OTP
+        outcome = get_otp_store().verify(PURPOSE_TRANSACTION, request.user, otp_code, subject=transaction.id)
+        if outcome == OTP_EXPIRED:
             return Response({'error': 'OTP has expired'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check attempts
-        if otp_obj.attempts >= 3:
+        if outcome == OTP_LOCKED:
             return Response({'error': 'Too many OTP attempts'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Mark OTP as used
-        otp_obj.mark_used()
+        if outcome != OTP_VALID:
+            return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Complete the transaction
         try:
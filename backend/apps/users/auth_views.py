@@ -1,5 +1,5 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -9,11 +9,13 @@ from .serializers import (
     LoginSerializer, UserRegistrationSerializer, OTPVerificationSerializer, ResendOTPSerializer
 )
 from .email_service import create_otp_for_user
+from .throttling import rate_limits
 from apps.risk.models import ClientProfile
 from apps.utils.logger import log_user_action, log_security_event
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limits('login', 'ip', 'account'))
 def login_view(request):
     """Login endpoint"""
     serializer = LoginSerializer(data=request.data)
@@ -64,6 +66,7 @@ def login_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limits('register', 'ip'))
 def register_view(request):
     """Registration endpoint"""
     serializer = UserRegistrationSerializer(data=request.data)
@@ -110,15 +113,12 @@ def register_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limits('otp_verify', 'ip', 'account'))
 def verify_otp_view(request):
     """OTP verification endpoint"""
     serializer = OTPVerificationSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        otp_obj = serializer.validated_data['otp_obj']
-        
-        # Mark OTP as used
-        otp_obj.mark_used()
         
         # Mark user as verified
         user.is_email_verified = True
@@ -171,6 +171,7 @@ def verify_otp_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(rate_limits('otp_send', 'ip', 'account'))
 def resend_otp_view(request):
     """Resend OTP endpoint with rate limiting"""
     serializer = ResendOTPSerializer(data=request.data)
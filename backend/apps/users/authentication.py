@@ -0,0 +1,125 @@
+"""
+Authenticated-user resolution for SafeNetAi
+Caches the JWT user and the user -> ClientProfile mapping so API calls skip the repeated lookups
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_KEY = 'auth:user:{user_id}'
+PROFILE_ID_CACHE_KEY = 'auth:profile-id:{user_id}'
+
+# Cached in place of None, which the cache cannot tell apart from a miss
+NO_PROFILE = 0
+
+
+def _cache_ttl():
+    return getattr(settings, 'AUTH_CACHE_TTL', 60)
+
+
+def _cached_user_fields(model):
+    # Everything but the password hash, which has no place in a cache other services may read
+    return [field.attname for field in model._meta.concrete_fields if field.attname != 'password']
+
+
+def invalidate_user(user_id):
+    """Drop the cached user and profile mapping, e.g. after the user row changed"""
+    if user_id is not None:
+        cache.delete_many([
+            USER_CACHE_KEY.format(user_id=user_id),
+            PROFILE_ID_CACHE_KEY.format(user_id=user_id),
+        ])
+
+
+def invalidate_client_profile(*user_ids):
+    """Drop the cached profile mapping of the users a profile belonged to"""
+    cache.delete_many([PROFILE_ID_CACHE_KEY.format(user_id=user_id) for user_id in user_ids if user_id is not None])
+
+
+def get_client_profile_id(user):
+    """The id of the user's ClientProfile (None without one), cached for AUTH_CACHE_TTL seconds"""
+    # Import here to avoid circular imports
+    from apps.risk.models import ClientProfile
+
+    key = PROFILE_ID_CACHE_KEY.format(user_id=user.pk)
+    profile_id = cache.get(key)
+    if profile_id is None:
+        profile_id = ClientProfile.objects.filter(user=user).values_list('id', flat=True).first() or NO_PROFILE
+        cache.set(key, profile_id, _cache_ttl())
+    return profile_id or None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the token's user in the cache for AUTH_CACHE_TTL seconds.
+    The token signature and expiry are still checked on every request; only the user row
+    lookup is skipped. Saving or deleting the user invalidates the entry (apps.users.signals).
+    Only the user's fields are cached, never the password hash: the rebuilt user defers it,
+    so reading it loads it fresh and save() leaves it untouched.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares against the current password hash, which needs a fresh row
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        field_names = _cached_user_fields(self.user_model)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(key, [getattr(user, name) for name in field_names], _cache_ttl())
+            return user
+        return self.user_model.from_db(router.db_for_read(self.user_model), field_names, values)
+
+
+class ClientProfileRef:
+    """
+    The authenticated user's ClientProfile, resolved lazily once per request.
+    `id` comes from the cross-request cache, so scoping a queryset to the client costs no
+    query; `get()` loads the row itself (fresh, since balances change) on first use.
+    """
+
+    def __init__(self, request):
+        self._request = request
+
+    @cached_property
+    def id(self):
+        user = getattr(self._request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        return get_client_profile_id(user)
+
+    @cached_property
+    def _profile(self):
+        # Import here to avoid circular imports
+        from apps.risk.models import ClientProfile
+
+        if self.id is None:
+            return None
+        profile = ClientProfile.objects.filter(pk=self.id).first()
+        if profile is not None and profile.user_id == self._request.user.pk:
+            profile.user = self._request.user
+            return profile
+        # Stale mapping: the profile was removed or relinked since it was cached
+        invalidate_client_profile(self._request.user.pk)
+        return ClientProfile.objects.filter(user=self._request.user).first()
+
+    def get(self):
+        """The ClientProfile, raising ClientProfile.DoesNotExist like objects.get(user=...)"""
+        # Import here to avoid circular imports
+        from apps.risk.models import ClientProfile
+
+        if self._profile is None:
+            raise ClientProfile.DoesNotExist("Client profile not found")
+        return self._profile
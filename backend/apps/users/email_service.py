@@ -9,7 +9,7 @@ from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
 from datetime import timedelta
-from .models import EmailOTP
+from .otp_store import get_otp_store, email_otp_ttl, PURPOSE_EMAIL
 from apps.utils.logger import get_email_logger, log_system_event
 from .email_templates import (
     get_otp_email_template,
@@ -708,22 +708,14 @@ def create_otp_for_user(user, language=None):
         # Use provided language or get from user preference
         user_language = language or get_user_language(user)
         
-        # Delete any existing unused OTPs for this user
-        deleted_count = EmailOTP.objects.filter(user=user, used=False).delete()[0]
-        if deleted_count > 0:
-            logger.info(f"Deleted {deleted_count} existing unused OTPs for user {user.email}")
+        # Replaces any existing unused OTP for this user
+        store = get_otp_store()
+        otp = store.issue(PURPOSE_EMAIL, user, email_otp_ttl(), code=generate_otp())
 
-        # Create new OTP
-        otp = EmailOTP.objects.create(
-            user=user,
-            otp=generate_otp(),
-            expires_at=timezone.now() + timedelta(hours=settings.EMAIL_TOKEN_TTL_HOURS)
-        )
-
-        logger.info(f"Created OTP {otp.otp} for user {user.email}, expires at {otp.expires_at}")
+        logger.info(f"Created OTP for user {user.email}, valid for {settings.EMAIL_TOKEN_TTL_HOURS}h")
 
         # Send email asynchronously
-        success = send_otp_email_async(user, otp.otp, user_language)
+        success = send_otp_email_async(user, otp, user_language)
 
         if success:
             logger.info(f"OTP created and sent successfully for user {user.email}")
@@ -731,7 +723,7 @@ def create_otp_for_user(user, language=None):
                 "OTP created and sent successfully",
                 "email_service",
                 "INFO",
-                {"user_email": user.email, "user_id": user.id, "otp_id": otp.id}
+                {"user_email": user.email, "user_id": user.id}
             )
             return otp
         else:
@@ -740,9 +732,9 @@ def create_otp_for_user(user, language=None):
                 "OTP creation failed - email not sent",
                 "email_service",
                 "ERROR",
-                {"user_email": user.email, "user_id": user.id, "otp_id": otp.id}
+                {"user_email": user.email, "user_id": user.id}
             )
-            otp.delete()
+            store.discard(PURPOSE_EMAIL, user)
             return None
             
     except Exception as e:
@@ -763,18 +755,18 @@ def resend_otp_email(user, language=None):
         # Use provided language or get from user preference
         user_language = language or get_user_language(user)
         
-        # Check if user has a valid unused OTP
-        existing_otp = EmailOTP.objects.filter(user=user, used=False).first()
+        # Resend the live OTP when the store can recover it (the cache store keeps only hashes)
+        existing_otp = get_otp_store().get_code(PURPOSE_EMAIL, user)
         
-        if existing_otp and existing_otp.expires_at > timezone.now():
-            logger.info(f"Resending existing OTP {existing_otp.otp} for user {user.email}")
-            success = send_otp_email_async(user, existing_otp.otp, user_language)
+        if existing_otp:
+            logger.info(f"Resending existing OTP for user {user.email}")
+            success = send_otp_email_async(user, existing_otp, user_language)
             if success:
                 log_system_event(
                     "OTP resent successfully",
                     "email_service",
                     "INFO",
-                    {"user_email": user.email, "user_id": user.id, "otp_id": existing_otp.id}
+                    {"user_email": user.email, "user_id": user.id}
                 )
             return success
         else:
@@ -799,18 +791,18 @@ def resend_otp(user, language=None):
         # Use provided language or get from user preference
         user_language = language or get_user_language(user)
         
-        # Check if user has a valid unused OTP
-        existing_otp = EmailOTP.objects.filter(user=user, used=False).first()
+        # Resend the live OTP when the store can recover it (the cache store keeps only hashes)
+        existing_otp = get_otp_store().get_code(PURPOSE_EMAIL, user)
         
-        if existing_otp and existing_otp.expires_at > timezone.now():
-            logger.info(f"Resending existing OTP {existing_otp.otp} for user {user.email}")
-            success = send_otp_email_async(user, existing_otp.otp, user_language)
+        if existing_otp:
+            logger.info(f"Resending existing OTP for user {user.email}")
+            success = send_otp_email_async(user, existing_otp, user_language)
             if success:
                 log_system_event(
                     "OTP resent successfully",
                     "email_service",
                     "INFO",
-                    {"user_email": user.email, "user_id": user.id, "otp_id": existing_otp.id}
+                    {"user_email": user.email, "user_id": user.id}
                 )
             return success
         else:
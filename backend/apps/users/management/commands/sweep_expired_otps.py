@@ -0,0 +1,67 @@
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from apps.users.sweeper import SWEEP_TARGETS, sweep_expired
+
+class Command(BaseCommand):
+    help = 'Delete expired OTPs (and idempotency keys) in throttled primary-key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=sorted(SWEEP_TARGETS),
+            default=sorted(SWEEP_TARGETS),
+            help='Tables to sweep (default: all)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement (default: 1000)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.05,
+            help='Seconds to sleep between batches (default: 0.05)'
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop each table after N batches (default: no limit)'
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=None,
+            help='Keep running and sweep every N seconds, e.g. as a worker process (default: run once)'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['pause'] < 0:
+            raise CommandError('--pause cannot be negative')
+
+        while True:
+            self.sweep(options)
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def sweep(self, options):
+        total = 0
+        for name in options['tables']:
+            metrics = sweep_expired(
+                apps.get_model(SWEEP_TARGETS[name]),
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                max_batches=options['max_batches']
+            )
+            total += metrics['deleted']
+            self.stdout.write(f'  {name}: {metrics["deleted"]} rows in {metrics["batches"]} batches, '
+                              f'{metrics["elapsed_seconds"]}s ({metrics["rows_per_second"]} rows/s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Swept {total} expired rows'))
@@ -1,5 +1,6 @@
 from django.utils import translation
 from django.utils.deprecation import MiddlewareMixin
+from .authentication import ClientProfileRef
 from .models import User
 
 class UserLanguageMiddleware(MiddlewareMixin):
@@ -24,4 +25,14 @@ class UserLanguageMiddleware(MiddlewareMixin):
         else:
             # For anonymous users, use the default language
             translation.activate('en')
-            request.LANGUAGE_CODE = 'en'
\ No newline at end of file
+            request.LANGUAGE_CODE = 'en'
+
+
+class ClientProfileMiddleware(MiddlewareMixin):
+    """
+    Middleware to expose the authenticated user's client profile as request.client_profile.
+    Resolution is lazy, so it sees the user DRF authenticates from the JWT later on.
+    """
+
+    def process_request(self, request):
+        request.client_profile = ClientProfileRef(request)
@@ -75,11 +75,11 @@ class EmailOTP(models.Model):
     
     def increment_attempts(self):
         self.attempts += 1
-        self.save()
+        self.save(update_fields=['attempts'])
     
     def mark_used(self):
         self.used = True
-        self.save()
+        self.save(update_fields=['used'])
     
     class Meta:
         ordering = ['-created_at']
@@ -0,0 +1,203 @@
+"""
+OTP storage backends for SafeNetAi
+One interface for email and transaction codes, kept either in the database or in the cache
+"""
+
+import hashlib
+import hmac
+import random
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+# Purposes: what a code unlocks. Transaction codes are additionally scoped by transaction id,
+# batch codes by the Transaction.otp_batch of a bulk submission's flagged transfers.
+PURPOSE_EMAIL = 'email'
+PURPOSE_TRANSACTION = 'transaction'
+PURPOSE_TRANSACTION_BATCH = 'transaction_batch'
+
+# Verification outcomes
+OTP_VALID = 'valid'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+OTP_LOCKED = 'locked'
+OTP_MISSING = 'missing'
+
+MAX_ATTEMPTS = 3
+
+
+def generate_otp_code():
+    """Generate a 6-digit OTP"""
+    return str(random.randint(100000, 999999))
+
+
+class OTPStore(ABC):
+    """
+    Issues and verifies one-time codes for a (purpose, user, subject) triple.
+    A code allows MAX_ATTEMPTS wrong guesses and is consumed by the first correct one.
+    Every guess claims an attempt atomically before the code is compared, so concurrent
+    guesses cannot all pass a limit check made on the same stale count.
+    """
+
+    @abstractmethod
+    def issue(self, purpose, user, ttl, subject=None, code=None):
+        """
+        Replace any live code for the triple with `code` (generated when None) and return it.
+        Codes confirming many rows at once take a single subject (PURPOSE_TRANSACTION_BATCH).
+        """
+
+    @abstractmethod
+    def verify(self, purpose, user, code, subject=None):
+        """Check and consume a code. Returns one of the OTP_* outcomes."""
+
+    @abstractmethod
+    def get_code(self, purpose, user, subject=None):
+        """The live plaintext code for resending, or None when the store cannot recover it"""
+
+    @abstractmethod
+    def discard(self, purpose, user, subjects=(None,)):
+        """Drop any live codes for the given subjects"""
+
+
+class DatabaseOTPStore(OTPStore):
+    """Codes as EmailOTP / TransactionOTP rows; verification updates only the changed columns"""
+
+    def _model(self, purpose):
+        # Import here to avoid circular imports
+        if purpose in (PURPOSE_TRANSACTION, PURPOSE_TRANSACTION_BATCH):
+            from apps.transactions.models import TransactionOTP
+            return TransactionOTP
+        from .models import EmailOTP
+        return EmailOTP
+
+    def _live(self, purpose, user, subjects):
+        queryset = self._model(purpose).objects.filter(user=user, used=False)
+        if purpose == PURPOSE_TRANSACTION:
+            queryset = queryset.filter(transaction_id__in=subjects)
+        elif purpose == PURPOSE_TRANSACTION_BATCH:
+            queryset = queryset.filter(batch__in=subjects)
+        return queryset
+
+    def issue(self, purpose, user, ttl, subject=None, code=None):
+        code = code or generate_otp_code()
+        model = self._model(purpose)
+
+        self._live(purpose, user, [subject]).delete()
+        fields = {'user': user, 'otp': code, 'expires_at': timezone.now() + ttl}
+        if purpose == PURPOSE_TRANSACTION:
+            fields['transaction_id'] = subject
+        elif purpose == PURPOSE_TRANSACTION_BATCH:
+            fields['batch'] = subject
+        model.objects.create(**fields)
+        return code
+
+    def verify(self, purpose, user, code, subject=None):
+        otp = self._live(purpose, user, [subject]).order_by('-created_at').first()
+        if otp is None:
+            return OTP_MISSING
+
+        rows = type(otp).objects.filter(pk=otp.pk, used=False)
+        # The conditional increment is the limit check: a guess only proceeds if it claimed an attempt
+        if not rows.filter(attempts__lt=MAX_ATTEMPTS).update(attempts=F('attempts') + 1):
+            # Either out of attempts, or a concurrent verification consumed the code
+            return OTP_LOCKED if rows.update(used=True) else OTP_MISSING
+        if not hmac.compare_digest(otp.otp, str(code)):
+            return OTP_INVALID
+        if otp.is_expired():
+            rows.update(used=True)
+            return OTP_EXPIRED
+
+        # The used=False guard makes a concurrent verification of the same code lose
+        return OTP_VALID if rows.update(used=True) else OTP_MISSING
+
+    def get_code(self, purpose, user, subject=None):
+        otp = self._live(purpose, user, [subject]).filter(
+            expires_at__gt=timezone.now()
+        ).order_by('-created_at').first()
+        return otp.otp if otp else None
+
+    def discard(self, purpose, user, subjects=(None,)):
+        self._live(purpose, user, list(subjects)).delete()
+
+
+class CacheOTPStore(OTPStore):
+    """
+    Codes as salted HMACs in the cache under otp:<purpose>:<user>[:<subject>], expiring with
+    the cache TTL so no sweeper is needed. Guesses go to an atomic counter next to
+    the code. Plaintext codes are never stored, so resending always issues a new code.
+    """
+
+    key_prefix = 'otp'
+
+    def _key(self, purpose, user, subject):
+        key = f'{self.key_prefix}:{purpose}:{user.pk}'
+        return f'{key}:{subject}' if subject is not None else key
+
+    def _digest(self, key, code):
+        return hmac.new(settings.SECRET_KEY.encode('utf-8'), f'{key}:{code}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def issue(self, purpose, user, ttl, subject=None, code=None):
+        code = code or generate_otp_code()
+        key = self._key(purpose, user, subject)
+        # The attempt counter lives and expires alongside its code
+        cache.set_many({key: self._digest(key, code), f'{key}:attempts': 0}, int(ttl.total_seconds()))
+        return code
+
+    def verify(self, purpose, user, code, subject=None):
+        key = self._key(purpose, user, subject)
+        attempts_key = f'{key}:attempts'
+        digest = cache.get(key)
+        if digest is None:
+            # Expired codes are gone; the cache cannot tell them from never-issued ones
+            return OTP_MISSING
+        # Count the guess before comparing; incr is atomic, so each concurrent guess gets its own number
+        try:
+            attempts = cache.incr(attempts_key)
+        except ValueError:
+            # The code expired since it was read
+            return OTP_MISSING
+        if attempts > MAX_ATTEMPTS:
+            cache.delete(key)
+            return OTP_LOCKED
+        if not hmac.compare_digest(digest, self._digest(key, code)):
+            return OTP_INVALID
+
+        # delete() reports whether the key existed, so only one concurrent verification wins
+        return OTP_VALID if cache.delete(key) else OTP_MISSING
+
+    def get_code(self, purpose, user, subject=None):
+        return None
+
+    def discard(self, purpose, user, subjects=(None,)):
+        keys = [self._key(purpose, user, subject) for subject in subjects]
+        cache.delete_many(keys + [f'{key}:attempts' for key in keys])
+
+
+OTP_STORES = {
+    'db': DatabaseOTPStore,
+    'cache': CacheOTPStore,
+}
+
+_store = None
+
+
+def get_otp_store():
+    """The configured store: OTP_STORE = 'db' (default) or 'cache' (needs a shared cache backend)"""
+    global _store
+    name = getattr(settings, 'OTP_STORE', 'db')
+    if _store is None or not isinstance(_store, OTP_STORES[name]):
+        _store = OTP_STORES[name]()
+    return _store
+
+
+def transaction_otp_ttl():
+    """Lifetime of transaction verification codes"""
+    return timedelta(minutes=getattr(settings, 'TRANSACTION_OTP_TTL_MINUTES', 10))
+
+
+def email_otp_ttl():
+    """Lifetime of email verification codes"""
+    return timedelta(hours=settings.EMAIL_TOKEN_TTL_HOURS)
@@ -2,7 +2,10 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from decimal import Decimal
-from .models import User, EmailOTP
+from .models import User
+from .otp_store import (
+    get_otp_store, PURPOSE_EMAIL, OTP_VALID, OTP_EXPIRED, OTP_LOCKED
+)
 from apps.risk.models import ClientProfile
 from apps.utils.logger import get_auth_logger
 
@@ -115,25 +118,16 @@ class OTPVerificationSerializer(serializers.Serializer):
         if user.is_email_verified:
             raise serializers.ValidationError("Email already verified")
         
-        # Check OTP
-        try:
-            otp_obj = EmailOTP.objects.get(
-                user=user,
-                otp=attrs['otp'],
-                used=False
-            )
-            
-            if otp_obj.is_expired():
-                raise serializers.ValidationError("OTP has expired")
-            
-            if not otp_obj.is_valid():
-                raise serializers.ValidationError("Invalid OTP")
-                
-        except EmailOTP.DoesNotExist:
+        # Check OTP; a valid code is consumed here
+        outcome = get_otp_store().verify(PURPOSE_EMAIL, user, attrs['otp'])
+        if outcome == OTP_EXPIRED:
+            raise serializers.ValidationError("OTP has expired")
+        if outcome == OTP_LOCKED:
+            raise serializers.ValidationError("Too many failed attempts")
+        if outcome != OTP_VALID:
             raise serializers.ValidationError("Invalid OTP")
         
         attrs['user'] = user
-        attrs['otp_obj'] = otp_obj
         return attrs
 
 class ResendOTPSerializer(serializers.Serializer):
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.risk.models import ClientProfile
+from .authentication import invalidate_client_profile, invalidate_user
+from .models import User
+
+# Keep the cached JWT user and user -> profile mapping (apps.users.authentication) in step with the rows
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    """Forget the cached user so deactivation, role or language changes apply on the next request"""
+    invalidate_user(instance.pk)
+
+@receiver(post_save, sender=ClientProfile)
+@receiver(post_delete, sender=ClientProfile)
+def drop_cached_profile_mapping(sender, instance, **kwargs):
+    """Forget the profile mapping of the profile's current and previous owner"""
+    invalidate_client_profile(instance.user_id, getattr(instance, '_loaded_user_id', None))
@@ -0,0 +1,68 @@
+"""
+Expired-row sweeper for SafeNetAi
+Deletes rows past their expires_at in small primary-key ranges so no single DELETE holds long locks
+"""
+
+import time
+from django.conf import settings
+from django.utils import timezone
+from apps.utils.logger import get_system_logger, log_system_event
+
+logger = get_system_logger()
+
+# Tables with an expires_at column that grow without bound unless swept
+SWEEP_TARGETS = {
+    'email_otp': 'users.EmailOTP',
+    'transaction_otp': 'transactions.TransactionOTP',
+    'idempotency_key': 'transactions.IdempotencyKey',
+}
+
+
+def sweep_expired(model, batch_size=None, pause=None, max_batches=None, now=None):
+    """
+    Delete rows of `model` whose expires_at is before `now`, oldest primary keys first.
+
+    Each batch reads the next `batch_size` expired ids after the last one seen, then deletes
+    that id range, so every statement touches a bounded slice of the primary-key index.
+    Sleeps `pause` seconds between batches to leave room for foreground writes.
+    Returns metrics: deleted rows, batches, elapsed seconds and rows per second.
+    """
+    batch_size = batch_size or getattr(settings, 'SWEEP_BATCH_SIZE', 1000)
+    pause = getattr(settings, 'SWEEP_PAUSE_SECONDS', 0.05) if pause is None else pause
+    cutoff = now or timezone.now()
+
+    expired = model.objects.filter(expires_at__lt=cutoff)
+    deleted = batches = 0
+    last_pk = None
+    started = time.monotonic()
+
+    while max_batches is None or batches < max_batches:
+        candidates = expired if last_pk is None else expired.filter(pk__gt=last_pk)
+        ids = list(candidates.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+
+        # Rows in the range that were not expired when read stay put
+        count, _ = expired.filter(pk__gte=ids[0], pk__lte=ids[-1]).delete()
+        deleted += count
+        batches += 1
+        last_pk = ids[-1]
+
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    elapsed = time.monotonic() - started
+    metrics = {
+        'table': model._meta.db_table,
+        'deleted': deleted,
+        'batches': batches,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(deleted / elapsed, 1) if elapsed > 0 else float(deleted),
+    }
+
+    if deleted:
+        logger.info(f"Swept {deleted} expired rows from {metrics['table']} in {batches} batches ({elapsed:.2f}s)")
+        log_system_event("Expired rows swept", "sweeper", "INFO", metrics)
+    return metrics
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.risk.models import ClientProfile
+from apps.transactions.models import Transaction
+from apps.users.authentication import CachedJWTAuthentication, USER_CACHE_KEY
+from apps.users.models import User
+
+class AuthCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(
+            email='client@example.com',
+            first_name='John',
+            last_name='Doe',
+            password='ClientPass123!'
+        )
+        self.profile = ClientProfile.objects.create(
+            user=self.user,
+            first_name='John',
+            last_name='Doe',
+            national_id='123456789',
+            balance=Decimal('1000.00')
+        )
+        Transaction.objects.create(client=self.profile, amount=Decimal('100.00'))
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, len(context.captured_queries)
+
+    def test_second_request_skips_user_and_profile_lookups(self):
+        """Test that the user and profile id come from the cache once warm"""
+        first, cold = self._get('/api/client/transactions/')
+        second, warm = self._get('/api/client/transactions/')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['results'], first.data['results'])
+        self.assertEqual(cold, 3)
+        self.assertEqual(warm, 1)
+
+    def test_password_hash_is_not_cached(self):
+        """Test that the cached user leaves out the password and loads it on demand"""
+        self._get('/api/client/transactions/')
+        cached = cache.get(USER_CACHE_KEY.format(user_id=self.user.pk))
+        self.assertNotIn(self.user.password, cached)
+
+        token = RefreshToken.for_user(self.user).access_token
+        user = CachedJWTAuthentication().get_user(token)
+        self.assertEqual(user.email, 'client@example.com')
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertTrue(user.check_password('ClientPass123!'))
+
+    def test_profile_is_read_fresh(self):
+        """Test that only the profile id is cached, never the balance"""
+        self._get('/api/client/profile/me/')
+        ClientProfile.objects.filter(pk=self.profile.pk).update(balance=Decimal('5.00'))
+
+        response, _ = self._get('/api/client/profile/me/')
+        self.assertEqual(Decimal(str(response.data['balance'])), Decimal('5.00'))
+
+    def test_deactivated_user_is_rejected(self):
+        self._get('/api/client/transactions/')
+        self.user.is_active = False
+        self.user.save()
+
+        response, _ = self._get('/api/client/transactions/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_relinked_profile_invalidates_previous_owner(self):
+        self._get('/api/client/transactions/')
+        other = User.objects.create_user(
+            email='other@example.com',
+            first_name='Jane',
+            last_name='Roe',
+            password='ClientPass123!'
+        )
+        profile = ClientProfile.objects.get(pk=self.profile.pk)
+        profile.user = other
+        profile.save()
+
+        response, _ = self._get('/api/client/transactions/')
+        self.assertEqual(response.data['results'], [])
+        response, _ = self._get('/api/client/profile/me/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_new_profile_is_picked_up(self):
+        """Test that a cached "no profile" answer is dropped when the profile is created"""
+        self.profile.delete()
+        response, _ = self._get('/api/client/profile/me/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        ClientProfile.objects.create(user=self.user, first_name='John', last_name='Doe', national_id='555555555')
+        response, _ = self._get('/api/client/profile/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
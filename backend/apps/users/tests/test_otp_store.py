@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from apps.users.models import User, EmailOTP
+from apps.users.otp_store import (
+    DatabaseOTPStore, CacheOTPStore, MAX_ATTEMPTS, PURPOSE_EMAIL,
+    OTP_VALID, OTP_INVALID, OTP_EXPIRED, OTP_LOCKED, OTP_MISSING
+)
+
+class OTPStoreTestMixin:
+    """Behaviour both stores share"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='john.doe@example.com',
+            password='testpass123',
+            first_name='John',
+            last_name='Doe'
+        )
+        self.ttl = timedelta(minutes=10)
+
+    def test_code_is_single_use(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl)
+        self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, code), OTP_VALID)
+        self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, code), OTP_MISSING)
+
+    def test_wrong_guesses_lock_the_code(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl, code='123456')
+        for _ in range(3):
+            self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, '000000'), OTP_INVALID)
+        self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, code), OTP_LOCKED)
+
+    def test_reissue_replaces_code(self):
+        first = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl, code='111111')
+        self.store.issue(PURPOSE_EMAIL, self.user, self.ttl, code='222222')
+        self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, first), OTP_INVALID)
+        self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, '222222'), OTP_VALID)
+
+class DatabaseOTPStoreTestCase(OTPStoreTestMixin, TestCase):
+    store = DatabaseOTPStore()
+
+    def test_expired_code(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, timedelta(seconds=-1))
+        self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, code), OTP_EXPIRED)
+
+    def test_guess_from_a_stale_read_is_still_limited(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl, code='123456')
+        stale = EmailOTP.objects.get(user=self.user)
+        # Concurrent guesses used up the attempts after this request read the row
+        EmailOTP.objects.filter(pk=stale.pk).update(attempts=MAX_ATTEMPTS)
+        with mock.patch.object(DatabaseOTPStore, '_live') as live:
+            live.return_value.order_by.return_value.first.return_value = stale
+            self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, code), OTP_LOCKED)
+        self.assertTrue(EmailOTP.objects.get(pk=stale.pk).used)
+
+    def test_resend_recovers_live_code(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl)
+        self.assertEqual(self.store.get_code(PURPOSE_EMAIL, self.user), code)
+
+class CacheOTPStoreTestCase(OTPStoreTestMixin, TestCase):
+    store = CacheOTPStore()
+
+    def test_codes_are_hashed_and_not_in_database(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl)
+        self.assertFalse(EmailOTP.objects.exists())
+        self.assertNotEqual(cache.get(f'otp:{PURPOSE_EMAIL}:{self.user.pk}'), code)
+        self.assertIsNone(self.store.get_code(PURPOSE_EMAIL, self.user))
+
+    def test_verification_does_not_touch_database(self):
+        code = self.store.issue(PURPOSE_EMAIL, self.user, self.ttl)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.store.verify(PURPOSE_EMAIL, self.user, code), OTP_VALID)
+
+    def test_parallel_wrong_guesses_share_the_limit(self):
+        self.store.issue(PURPOSE_EMAIL, self.user, self.ttl, code='123456')
+        compare_digest = __import__('hmac').compare_digest
+        outcomes, barrier = [], threading.Barrier(10)
+
+        def slow_compare(a, b):
+            # Hold every guess between its limit check and its comparison
+            time.sleep(0.05)
+            return compare_digest(a, b)
+
+        def guess():
+            barrier.wait()
+            outcomes.append(self.store.verify(PURPOSE_EMAIL, self.user, '000000'))
+
+        with mock.patch('apps.users.otp_store.hmac.compare_digest', side_effect=slow_compare):
+            threads = [threading.Thread(target=guess) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        # Only MAX_ATTEMPTS guesses reached the comparison; the rest found the code locked or gone
+        self.assertEqual(outcomes.count(OTP_INVALID), MAX_ATTEMPTS)
+        self.assertEqual(outcomes.count(OTP_LOCKED) + outcomes.count(OTP_MISSING), 10 - MAX_ATTEMPTS)
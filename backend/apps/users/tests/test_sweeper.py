@@ -0,0 +1,42 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from apps.users.models import User, EmailOTP
+from apps.users.sweeper import sweep_expired
+
+class SweepExpiredTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='john.doe@example.com',
+            password='testpass123',
+            first_name='John',
+            last_name='Doe'
+        )
+        now = timezone.now()
+        EmailOTP.objects.bulk_create(
+            [EmailOTP(user=self.user, otp='111111', expires_at=now - timedelta(minutes=5)) for _ in range(7)] +
+            [EmailOTP(user=self.user, otp='222222', expires_at=now + timedelta(minutes=5)) for _ in range(3)]
+        )
+
+    def test_deletes_only_expired_rows_in_batches(self):
+        """Test that expired rows go in bounded batches and live codes survive"""
+        with self.assertNumQueries(6):
+            metrics = sweep_expired(EmailOTP, batch_size=3, pause=0)
+
+        self.assertEqual(metrics['deleted'], 7)
+        self.assertEqual(metrics['batches'], 3)
+        self.assertEqual(EmailOTP.objects.count(), 3)
+        self.assertFalse(EmailOTP.objects.filter(expires_at__lt=timezone.now()).exists())
+
+    def test_max_batches_bounds_the_run(self):
+        metrics = sweep_expired(EmailOTP, batch_size=2, pause=0, max_batches=2)
+        self.assertEqual(metrics['deleted'], 4)
+        self.assertEqual(EmailOTP.objects.count(), 6)
+
+    def test_command_reports_metrics(self):
+        out = StringIO()
+        call_command('sweep_expired_otps', '--tables', 'email_otp', '--pause', '0', stdout=out)
+        self.assertIn('email_otp: 7 rows', out.getvalue())
+        self.assertEqual(EmailOTP.objects.count(), 3)
@@ -0,0 +1,59 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from apps.users.models import User
+
+@override_settings(RATE_LIMITS={'login_ip': '5/min', 'login_account': '3/min'})
+class LoginRateLimitTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.url = reverse('login')
+        User.objects.create_user(
+            email='john.doe@example.com',
+            password='testpass123',
+            first_name='John',
+            last_name='Doe'
+        )
+
+    def _login(self, email='john.doe@example.com'):
+        return self.client.post(self.url, {'email': email, 'password': 'wrong-password'})
+
+    def test_account_bucket_returns_429_with_retry_after(self):
+        """Test that a burst against one account is cut off with a Retry-After hint"""
+        with mock.patch('apps.users.throttling.time.time', return_value=1_000_000.0):
+            for _ in range(3):
+                self.assertEqual(self._login().status_code, status.HTTP_400_BAD_REQUEST)
+            response = self._login()
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # 3 tokens per minute: the next one is 20 seconds away
+        self.assertEqual(int(response['Retry-After']), 20)
+
+    def test_account_key_is_case_insensitive(self):
+        for email in ('john.doe@example.com', 'JOHN.DOE@example.com', 'John.Doe@Example.com'):
+            self._login(email)
+        self.assertEqual(self._login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_ip_bucket_spans_accounts(self):
+        """Test that one IP cannot spread a flood across many accounts"""
+        for index in range(5):
+            self.assertNotEqual(self._login(f'user{index}@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self._login('user9@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(RATE_LIMITS={'login_ip': '100/min', 'login_account': '3/min'})
+    def test_tokens_refill_over_time(self):
+        """Test that the bucket refills at capacity/period and denied requests do not extend the wait"""
+        with mock.patch('apps.users.throttling.time.time', return_value=1_000_000.0) as clock:
+            for _ in range(3):
+                self._login()
+            for _ in range(5):
+                self.assertEqual(self._login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            clock.return_value += 20
+            self.assertEqual(self._login().status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(self._login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,147 @@
+"""
+Rate limiting for SafeNetAi
+Token-bucket throttles kept in the Django cache, keyed by client IP, authenticated user or target account
+"""
+
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+from apps.utils.logger import log_security_event
+
+# Bucket capacity / refill period per (scope, key kind); override entries with RATE_LIMITS
+DEFAULT_RATE_LIMITS = {
+    'login_ip': '30/min',
+    'login_account': '10/min',
+    'register_ip': '20/hour',
+    'otp_send_ip': '20/hour',
+    'otp_send_account': '5/hour',
+    'otp_send_user': '10/hour',
+    'otp_verify_ip': '60/min',
+    'otp_verify_account': '10/min',
+    'otp_verify_user': '20/min',
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60.0): a bucket of 10 tokens refilled over 60 seconds"""
+    count, period = rate.split('/')
+    return int(count), float(PERIODS[period[0]])
+
+
+def get_rate(name):
+    rates = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+    rate = rates.get(name)
+    return parse_rate(rate) if rate else None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket in GCRA form: the cache holds one integer per key, the "theoretical arrival
+    time" (TAT) in milliseconds at which the bucket would be full again. A request adds one
+    token's worth of time with an atomic cache.incr and is allowed while the TAT stays within
+    capacity tokens of now. Denied requests hand their token back, so hammering a full bucket
+    does not extend the wait. Keys expire once the bucket has refilled.
+
+    Subclasses set `scope` and `kind` and implement get_ident_value().
+    """
+
+    cache = cache
+    cache_key_prefix = 'throttle'
+    scope = None
+    kind = None
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        rate = get_rate(f'{self.scope}_{self.kind}')
+        ident = self.get_ident_value(request)
+        if rate is None or ident is None:
+            return True
+
+        capacity, period = rate
+        interval = int(period * 1000 / capacity)
+        ttl = int(period) + 1
+        key = f'{self.cache_key_prefix}:{self.scope}:{self.kind}:{ident}'
+        now = int(time.time() * 1000)
+
+        self.cache.add(key, now, ttl)
+        try:
+            tat = self.cache.incr(key, interval)
+        except ValueError:
+            # Expired between add and incr: the bucket is full
+            self.cache.set(key, now + interval, ttl)
+            tat = now + interval
+        if tat < now + interval:
+            # Idle long enough to refill completely; a full bucket holds no extra credit
+            tat = now + interval
+            self.cache.set(key, tat, ttl)
+        else:
+            self.cache.touch(key, ttl)
+
+        if tat - now <= capacity * interval:
+            return True
+
+        try:
+            self.cache.decr(key, interval)
+        except ValueError:
+            pass
+        # After the refund, the next token fits once now reaches tat - capacity * interval
+        self.wait_seconds = (tat - capacity * interval - now) / 1000
+        log_security_event(
+            event="Rate limit exceeded",
+            user_id=request.user.id if request.user and request.user.is_authenticated else None,
+            ip_address=self.get_ident(request),
+            extra_data={"scope": self.scope, "kind": self.kind, "retry_after": math.ceil(self.wait_seconds)}
+        )
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UserThrottle(TokenBucketThrottle):
+    kind = 'user'
+
+    def get_ident_value(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class AccountThrottle(TokenBucketThrottle):
+    """Keyed by the account a request targets (its email), so one account cannot be attacked from many IPs"""
+    kind = 'account'
+
+    def get_ident_value(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
+
+
+THROTTLE_KINDS = {
+    'ip': IPThrottle,
+    'user': UserThrottle,
+    'account': AccountThrottle,
+}
+
+
+def rate_limits(scope, *kinds):
+    """Throttle classes for a view: e.g. @throttle_classes(rate_limits('login', 'ip', 'account'))"""
+    return [
+        type(f'{scope.title().replace("_", "")}{THROTTLE_KINDS[kind].__name__}', (THROTTLE_KINDS[kind],), {'scope': scope})
+        for kind in kinds
+    ]
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .serializers import ClientProfileSerializer, AdminClientProfileSerializer, UserLanguageSerializer
 from apps.risk.models import ClientProfile
+from apps.transactions.mixins import ReplicaReadsMixin
 from django.db import models
 from .models import User
 
@@ -13,7 +14,7 @@ class ClientProfileViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return ClientProfile.objects.filter(user=self.request.user)
+        return ClientProfile.objects.filter(pk=self.request.client_profile.id)
     
     @action(detail=False, methods=['get'])
     def me(self, request):
@@ -35,7 +36,7 @@ class ClientProfileViewSet(viewsets.ReadOnlyModelViewSet):
                 })
             else:
                 # Return client profile for regular users
-                profile = ClientProfile.objects.get(user=request.user)
+                profile = request.client_profile.get()
                 serializer = self.get_serializer(profile)
                 return Response(serializer.data)
         except ClientProfile.DoesNotExist:
@@ -53,7 +54,7 @@ class ClientProfileViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'message': 'Language updated successfully'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class AdminClientProfileViewSet(viewsets.ModelViewSet):
+class AdminClientProfileViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     """Admin viewset for managing client profiles"""
     serializer_class = AdminClientProfileSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -89,10 +90,6 @@ class VerifyOTPView(viewsets.ViewSet):
         serializer = OTPVerificationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            otp_obj = serializer.validated_data['otp_obj']
-            
-            # Mark OTP as used
-            otp_obj.mark_used()
             
             # Mark user as verified
             user.is_email_verified = True
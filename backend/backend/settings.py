@@ -1,8 +1,10 @@
+import importlib.util
 import os
 import logging
 import logging
 from datetime import timedelta
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -39,12 +41,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "apps.system.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "apps.users.middleware.UserLanguageMiddleware",
     "apps.users.middleware.UserLanguageMiddleware",
+    "apps.users.middleware.ClientProfileMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -74,6 +78,23 @@ WSGI_APPLICATION = "backend.wsgi.application"
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///db.sqlite3")
+# Seconds a server connection stays open across requests (0 closes it after every request)
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+# Check a reused connection before each request so a dropped one is replaced instead of failing the request
+DB_CONN_HEALTH_CHECKS = os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+# Use psycopg's connection pool instead of persistent connections (PostgreSQL with psycopg[pool] installed)
+DB_POOL = os.getenv("DB_POOL", "False").lower() == "true"
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+# SQLite performance profile: WAL, busy timeout, mmap, cache size and synchronous=NORMAL on each
+# connection (apps.system.sqlite), with writes taking the lock up front and retried while locked
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "False").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "64000"))
+SQLITE_WRITE_RETRIES = int(os.getenv("SQLITE_WRITE_RETRIES", "5"))
+
 if DATABASE_URL.startswith("sqlite:///"):
     DATABASES = {
         "default": {
@@ -81,27 +102,54 @@ if DATABASE_URL.startswith("sqlite:///"):
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
+    if SQLITE_TUNING:
+        # BEGIN IMMEDIATE takes the write lock when a transaction starts, so concurrent writers
+        # queue on busy_timeout instead of failing when a read lock cannot be upgraded
+        DATABASES["default"]["OPTIONS"] = {"transaction_mode": "IMMEDIATE"}
 else:
     # For PostgreSQL or other databases
     import dj_database_url
     DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL)
+        "default": dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
     }
-# Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///db.sqlite3")
-if DATABASE_URL.startswith("sqlite:///"):
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
+    if (
+        DB_POOL
+        and DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql"
+        and importlib.util.find_spec("psycopg_pool") is not None
+    ):
+        # Pooled connections go back to the pool after each request; Django rejects CONN_MAX_AGE alongside a pool
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
         }
+
+# Optional read replica for admin listings, the dashboard, exports and ML training (apps.system.routers).
+# Locally, sqlite:///db-replica.sqlite3 simulates one; the sync_sqlite_replica command copies the primary into it
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+# Seconds a user's reads stay on the primary after they write, so they see their own changes
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+if DATABASE_REPLICA_URL.startswith("sqlite:///"):
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / DATABASE_REPLICA_URL[len("sqlite:///"):],
     }
-else:
-    # For PostgreSQL or other databases
+elif DATABASE_REPLICA_URL:
     import dj_database_url
-    DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL)
-    }
+    DATABASES["replica"] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+if "replica" in DATABASES:
+    # The test runner points the replica at the test primary instead of creating a second database
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+DATABASE_ROUTERS = ["apps.system.routers.ReplicaRouter"]
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -119,7 +167,7 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -127,6 +175,7 @@ REST_FRAMEWORK = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=12),
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from apps.risk.admin_views import (
     ThresholdViewSet, 
     RuleViewSet, 
+    SuspiciousLocationViewSet,
     ClientProfileAdminViewSet,
     TransactionAdminViewSet,
     FraudAlertAdminViewSet,
@@ -27,6 +28,7 @@ admin_router.register(r'dashboard', DashboardViewSet, basename='admin-dashboard'
 admin_router.register(r'clients', AdminClientProfileViewSet, basename='admin-client')
 admin_router.register(r'thresholds', ThresholdViewSet, basename='threshold')
 admin_router.register(r'rules', RuleViewSet, basename='rule')
+admin_router.register(r'suspicious-locations', SuspiciousLocationViewSet, basename='suspicious-location')
 admin_router.register(r'transactions', TransactionAdminViewSet, basename='admin-transaction')
 admin_router.register(r'fraud-alerts', FraudAlertAdminViewSet, basename='admin-fraud-alert')
 
@@ -43,11 +43,11 @@ const Dashboard = () => {
     try {
       const [profileRes, transactionsRes] = await Promise.all([
         api.get('/api/client/profile/me/'),
-        api.get('/api/client/transactions/')
+        api.get('/api/client/transactions/?page_size=5')
       ]);
       
       setProfile(profileRes.data);
-      setTransactions(transactionsRes.data.slice(0, 5)); // Get last 5 transactions
+      setTransactions(transactionsRes.data.results); // Get last 5 transactions
     } catch (error) {
       setError('Failed to load dashboard data');
     } finally {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { 
@@ -24,6 +24,8 @@ const Transfer = () => {
     to_account_number: '',
   });
   const [currentLocation, setCurrentLocation] = useState(null);
+  // One Idempotency-Key per transfer attempt, reused if the request is retried
+  const idempotencyKeyRef = useRef(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
@@ -71,6 +73,7 @@ const Transfer = () => {
   };
 
   const handleChange = (e) => {
+    idempotencyKeyRef.current = null;
     setFormData({
       ...formData,
       [e.target.name]: e.target.value,
@@ -90,7 +93,13 @@ const Transfer = () => {
         device_fingerprint: 'web-' + Date.now(), // Simple device fingerprint
       };
 
-      const response = await api.post('/api/client/transactions/', transactionData);
+      if (!idempotencyKeyRef.current) {
+        idempotencyKeyRef.current = crypto.randomUUID();
+      }
+      const response = await api.post('/api/client/transactions/', transactionData, {
+        headers: { 'Idempotency-Key': idempotencyKeyRef.current },
+      });
+      idempotencyKeyRef.current = null;
       
       if (response.data.requires_otp) {
         // Transaction requires OTP verification
@@ -122,6 +131,10 @@ const Transfer = () => {
       }
       
     } catch (error) {
+      // Keep the key only when no response arrived, so a retry cannot create a second transfer
+      if (error.response) {
+        idempotencyKeyRef.current = null;
+      }
       if (error.response?.data) {
         if (typeof error.response.data === 'object') {
           const errorMessages = Object.values(error.response.data).flat();
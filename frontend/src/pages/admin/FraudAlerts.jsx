@@ -26,6 +26,8 @@ import api from '../../api';
 
 const FraudAlerts = () => {
   const [alerts, setAlerts] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [levelFilter, setLevelFilter] = useState('');
@@ -45,7 +47,8 @@ const FraudAlerts = () => {
       if (params.toString()) url += '?' + params.toString();
       
       const response = await api.get(url);
-      setAlerts(response.data);
+      setAlerts(response.data.results);
+      setNextUrl(response.data.next);
     } catch (error) {
       setError('Failed to load fraud alerts');
     } finally {
@@ -53,6 +56,21 @@ const FraudAlerts = () => {
     }
   };
 
+  // Keyset pagination: follow the cursor in `next` to append the following page
+  const loadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get(nextUrl);
+      setAlerts((previous) => [...previous, ...response.data.results]);
+      setNextUrl(response.data.next);
+    } catch (error) {
+      setError('Failed to load fraud alerts');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleApprove = async (alertId) => {
     try {
       await api.patch(`/api/admin/fraud-alerts/${alertId}/approve/`);
@@ -218,6 +236,17 @@ const FraudAlerts = () => {
             </TableBody>
           </Table>
         </TableContainer>
+
+        <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', gap: 2, my: 3 }}>
+          <Typography variant="body2" color="text.secondary">
+            Showing {alerts.length} alerts{nextUrl ? ' (more available)' : ''}
+          </Typography>
+          {nextUrl && (
+            <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          )}
+        </Box>
       </Container>
     </Box>
   );
@@ -26,6 +26,8 @@ import api from '../../api';
 
 const Transactions = () => {
   const [transactions, setTransactions] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [statusFilter, setStatusFilter] = useState('');
@@ -45,7 +47,8 @@ const Transactions = () => {
       if (params.toString()) url += '?' + params.toString();
       
       const response = await api.get(url);
-      setTransactions(response.data);
+      setTransactions(response.data.results);
+      setNextUrl(response.data.next);
     } catch (error) {
       setError('Failed to load transactions');
     } finally {
@@ -53,6 +56,21 @@ const Transactions = () => {
     }
   };
 
+  // Keyset pagination: follow the cursor in `next` to append the following page
+  const loadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get(nextUrl);
+      setTransactions((previous) => [...previous, ...response.data.results]);
+      setNextUrl(response.data.next);
+    } catch (error) {
+      setError('Failed to load transactions');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getStatusColor = (status) => {
     switch (status) {
       case 'completed': return 'success.main';
@@ -178,6 +196,17 @@ const Transactions = () => {
             </TableBody>
           </Table>
         </TableContainer>
+
+        <Box sx={{ display: 'flex', justifyContent: 'center', alignItems: 'center', gap: 2, my: 3 }}>
+          <Typography variant="body2" color="text.secondary">
+            Showing {transactions.length} transactions{nextUrl ? ' (more available)' : ''}
+          </Typography>
+          {nextUrl && (
+            <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          )}
+        </Box>
       </Container>
     </Box>
   );